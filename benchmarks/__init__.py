@@ -0,0 +1,10 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Benchmarks measuring the cost of configuration assembly on synthetic program trees.
+
+Benchmarks are not part of the distributed package. Run them from the root of the repository, for example:
+
+    python -m benchmarks.bench_traversal --scale mbed-os
+"""
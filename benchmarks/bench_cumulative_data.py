@@ -0,0 +1,68 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Benchmarks of applying cumulative overrides, like "target.features_add"."""
+import random
+from typing import List
+
+import click
+
+from benchmarks.measure import Measurement, measure, report_measurements
+from mbed_build._internal.config.cumulative_data import CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE, CumulativeData
+from mbed_build._internal.config.source import Source
+
+
+def generate_sources(source_count: int, overrides_per_source: int, seed: int = 0) -> List[Source]:
+    """Generate Sources with random cumulative overrides, each adding, removing or setting a few values."""
+    rng = random.Random(seed)
+    values = [f"VALUE_{index}" for index in range(64)]
+    return [
+        Source(
+            human_name=f"File: source_{source_index}/mbed_lib.json",
+            config={},
+            overrides={
+                key: rng.sample(values, 3)
+                for key in rng.sample(CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE, overrides_per_source)
+            },
+            macros=[],
+        )
+        for source_index in range(source_count)
+    ]
+
+
+def run_benchmarks(sources: List[Source], repeat: int) -> List[Measurement]:
+    """Apply cumulative overrides of the generated Sources."""
+    overrides = [(key, value) for source in sources for key, value in source.overrides.items()]
+
+    def apply_overrides() -> None:
+        data = CumulativeData()
+        for key, value in overrides:
+            data.apply_override(key, value)
+
+    return [
+        measure("apply_override", apply_overrides, repeat),
+        measure("CumulativeData.from_sources", lambda: CumulativeData.from_sources(sources), repeat),
+    ]
+
+
+@click.command()
+@click.option("--sources", "source_count", type=int, default=500, help="Number of generated Sources.")
+@click.option("--overrides", "overrides_per_source", type=int, default=6, help="Number of overrides of each Source.")
+@click.option("--repeat", type=int, default=5, help="Number of timed runs of each benchmark.")
+@click.option("--output", type=click.Path(), help="Save measurements as JSON to this file.")
+@click.option("--baseline", type=click.Path(exists=True), help="Compare measurements with a previously saved file.")
+@click.option("--tolerance", type=float, default=0.2, help="Allowed growth of time and memory against the baseline.")
+def main(
+    source_count: int, overrides_per_source: int, repeat: int, output: str, baseline: str, tolerance: float
+) -> None:
+    """Benchmark applying cumulative overrides of generated Sources."""
+    sources = generate_sources(source_count, overrides_per_source)
+    click.echo(f"Applying {source_count * overrides_per_source} cumulative overrides of {source_count} Sources.")
+    measurements = run_benchmarks(sources, repeat)
+
+    report_measurements(measurements, output, baseline, tolerance)
+
+
+if __name__ == "__main__":
+    main()
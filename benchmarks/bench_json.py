@@ -0,0 +1,56 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Benchmarks of JSON backends decoding mbed_lib.json files."""
+import json
+import pathlib
+import tempfile
+from typing import List
+
+import click
+
+from benchmarks.measure import Measurement, measure, report_measurements
+from benchmarks.program_tree import SCALES, GeneratedProgram, generate_program_tree
+from mbed_build._internal.config.json_backend import BACKENDS, loads
+
+
+def run_benchmarks(program: GeneratedProgram, repeat: int) -> List[Measurement]:
+    """Decode all mbed_lib.json files of the generated program with each installed JSON backend."""
+    paths = program.mbed_lib_files
+    documents = [path.read_bytes() for path in paths]
+    measurements = [
+        measure("json, read as text", lambda: [json.loads(path.read_text()) for path in paths], repeat),
+    ]
+    for backend in BACKENDS.values():
+        measurements.append(
+            measure(
+                f"{backend.name}, read as bytes", lambda: [loads(path.read_bytes(), backend) for path in paths], repeat
+            )
+        )
+        measurements.append(
+            measure(
+                f"{backend.name}, decode only", lambda: [loads(document, backend) for document in documents], repeat
+            )
+        )
+    return measurements
+
+
+@click.command()
+@click.option("--scale", type=click.Choice(sorted(SCALES)), default="medium", help="Size of the generated program.")
+@click.option("--repeat", type=int, default=5, help="Number of timed runs of each benchmark.")
+@click.option("--output", type=click.Path(), help="Save measurements as JSON to this file.")
+@click.option("--baseline", type=click.Path(exists=True), help="Compare measurements with a previously saved file.")
+@click.option("--tolerance", type=float, default=0.2, help="Allowed growth of time and memory against the baseline.")
+def main(scale: str, repeat: int, output: str, baseline: str, tolerance: float) -> None:
+    """Benchmark JSON backends decoding mbed_lib.json files of a generated program."""
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        program = generate_program_tree(pathlib.Path(temporary_directory, "program"), SCALES[scale])
+        click.echo(f"Decoding {len(program.mbed_lib_files)} mbed_lib.json files with: {', '.join(BACKENDS)}.")
+        measurements = run_benchmarks(program, repeat)
+
+    report_measurements(measurements, output, baseline, tolerance)
+
+
+if __name__ == "__main__":
+    main()
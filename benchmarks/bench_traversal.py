@@ -0,0 +1,95 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Benchmarks of program tree traversal and path filtering."""
+import pathlib
+import tempfile
+from typing import List
+
+import click
+
+from benchmarks.measure import Measurement, measure, report_measurements
+from benchmarks.program_tree import SCALES, GeneratedProgram, generate_program_tree
+from mbed_build._internal.find_files import (
+    LabelFilter,
+    LabelIndex,
+    MbedignoreFilter,
+    ProgramFileIndex,
+    filter_files,
+    find_files,
+)
+from mbed_build._internal.traversal_cache import TraversalCache
+
+
+def run_benchmarks(program: GeneratedProgram, repeat: int) -> List[Measurement]:
+    """Run all traversal and filtering benchmarks on the generated program."""
+    root = program.root
+    allowed_label_values = program.allowed_label_values()
+    measurements = [
+        measure("find_files", lambda: find_files("mbed_lib.json", root), repeat),
+        measure("ProgramFileIndex", lambda: ProgramFileIndex.from_directory(root), repeat),
+        measure(
+            "ProgramFileIndex pruned by labels",
+            lambda: ProgramFileIndex.from_directory(root, allowed_label_values=allowed_label_values),
+            repeat,
+        ),
+    ]
+
+    traversal_cache = TraversalCache.empty()
+    ProgramFileIndex.from_directory(root, traversal_cache=traversal_cache)
+    measurements.append(
+        measure(
+            "ProgramFileIndex with warm traversal cache",
+            lambda: ProgramFileIndex.from_directory(root, traversal_cache=traversal_cache),
+            repeat,
+        )
+    )
+
+    all_paths = [path for path in root.rglob("*")]
+    mbedignore_filters = [
+        MbedignoreFilter(("*/TESTS", "*/TEST_APPS")),
+        MbedignoreFilter.from_lines(["docs/*", "*.py"], root / "mbed-os"),
+        MbedignoreFilter.from_lines(["*.txt"], root / "mbed-os" / "lib0"),
+    ]
+    measurements.append(
+        measure(
+            "filter_files with stacked MbedignoreFilters", lambda: filter_files(all_paths, mbedignore_filters), repeat
+        )
+    )
+
+    mbed_lib_files = ProgramFileIndex.from_directory(root).get("mbed_lib.json")
+    label_filters = [
+        LabelFilter(label_type, allowed_label_values[label_type]) for label_type in ("TARGET", "FEATURE", "COMPONENT")
+    ]
+    measurements.append(
+        measure("filter_files with LabelFilters", lambda: filter_files(mbed_lib_files, label_filters), repeat)
+    )
+    label_index = LabelIndex(mbed_lib_files)
+    measurements.append(measure("LabelIndex.filter", lambda: label_index.filter(allowed_label_values), repeat))
+    return measurements
+
+
+@click.command()
+@click.option("--scale", type=click.Choice(sorted(SCALES)), default="medium", help="Size of the generated program.")
+@click.option("--repeat", type=int, default=5, help="Number of timed runs of each benchmark.")
+@click.option("--tree-directory", type=click.Path(), help="Generate the program here instead of a temporary directory.")
+@click.option("--output", type=click.Path(), help="Save measurements as JSON to this file.")
+@click.option("--baseline", type=click.Path(exists=True), help="Compare measurements with a previously saved file.")
+@click.option("--tolerance", type=float, default=0.2, help="Allowed growth of time and memory against the baseline.")
+def main(scale: str, repeat: int, tree_directory: str, output: str, baseline: str, tolerance: float) -> None:
+    """Benchmark program tree traversal and path filtering on a generated program."""
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        root = pathlib.Path(tree_directory or temporary_directory, "program")
+        program = generate_program_tree(root, SCALES[scale])
+        click.echo(
+            f"Generated {program.directories} directories and {program.files} files, including "
+            f"{len(program.mbed_lib_files)} mbed_lib.json and {program.mbedignore_files} .mbedignore files."
+        )
+        measurements = run_benchmarks(program, repeat)
+
+    report_measurements(measurements, output, baseline, tolerance)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Measurement of wall time, filesystem calls and peak memory of benchmarked functions."""
+import builtins
+import contextlib
+import io
+import json
+import os
+import pathlib
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from unittest import mock
+
+import click
+import tabulate
+
+# Functions counted as filesystem calls. Python doesn't expose syscall counters portably, so calls of these
+# functions serve as a proxy. Type checks on `os.DirEntry` which fall back to `stat` are not counted.
+_COUNTED_FUNCTIONS = {
+    "scandir": (os, "scandir"),
+    "listdir": (os, "listdir"),
+    "stat": (os, "stat"),
+    "lstat": (os, "lstat"),
+    "open": (io, "open"),
+    "builtins.open": (builtins, "open"),
+}
+
+
+@dataclass
+class Measurement:
+    """Result of a single benchmark.
+
+    Attributes:
+        name: Name of the benchmark.
+        wall_time: Best wall time of all repetitions, in seconds.
+        filesystem_calls: Number of calls of each counted filesystem function, in a single run.
+        peak_memory: Peak size of memory allocated by Python during a single run, in bytes.
+    """
+
+    name: str
+    wall_time: float
+    filesystem_calls: Dict[str, int] = field(default_factory=dict)
+    peak_memory: int = 0
+
+    @property
+    def total_filesystem_calls(self) -> int:
+        """Number of calls of all counted filesystem functions."""
+        return sum(self.filesystem_calls.values())
+
+
+def measure(
+    name: str, function: Callable[[], Any], repeat: int = 5, setup: Optional[Callable[[], None]] = None
+) -> Measurement:
+    """Measure the function.
+
+    Timing, counting and memory tracing are done in separate runs, so they don't affect each other.
+
+    Args:
+        name: Name of the benchmark.
+        function: Benchmarked function.
+        repeat: Number of timed runs, the best one is reported.
+        setup: Optional function called before each run, which is not measured.
+    """
+    wall_times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        wall_times.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    with count_filesystem_calls() as filesystem_calls:
+        function()
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(
+        name=name, wall_time=min(wall_times), filesystem_calls=dict(filesystem_calls), peak_memory=peak_memory
+    )
+
+
+@contextlib.contextmanager
+def count_filesystem_calls() -> Iterator[Counter]:
+    """Count calls of filesystem functions made within the context."""
+    counter: Counter = Counter()
+    with contextlib.ExitStack() as stack:
+        for counted_name, (module, attribute) in _COUNTED_FUNCTIONS.items():
+            original = getattr(module, attribute)
+            stack.enter_context(mock.patch.object(module, attribute, _counting(original, counted_name, counter)))
+        yield counter
+
+
+def _counting(function: Callable, counted_name: str, counter: Counter) -> Callable:
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        counter[counted_name] += 1
+        return function(*args, **kwargs)
+
+    return wrapper
+
+
+def report_measurements(
+    measurements: List[Measurement], output: Optional[str], baseline: Optional[str], tolerance: float
+) -> None:
+    """Print measurements, optionally saving them and comparing them with a baseline.
+
+    Raises:
+        click.ClickException: measurements regressed against the baseline.
+    """
+    print_measurements(measurements)
+    if output:
+        save_measurements(measurements, pathlib.Path(output))
+    if baseline:
+        regressions = find_regressions(measurements, pathlib.Path(baseline), tolerance)
+        if regressions:
+            raise click.ClickException("Regressions found:\n" + "\n".join(regressions))
+        click.echo("No regressions found.")
+
+
+def print_measurements(measurements: List[Measurement]) -> None:
+    """Print measurements as a table."""
+    rows = [
+        (
+            measurement.name,
+            f"{measurement.wall_time * 1000:.2f}",
+            measurement.total_filesystem_calls,
+            ", ".join(f"{name}={count}" for name, count in sorted(measurement.filesystem_calls.items())),
+            f"{measurement.peak_memory / 1024:.0f}",
+        )
+        for measurement in measurements
+    ]
+    headers = ("benchmark", "wall time [ms]", "fs calls", "fs calls by function", "peak memory [KiB]")
+    click.echo(tabulate.tabulate(rows, headers=headers))
+
+
+def save_measurements(measurements: List[Measurement], path: pathlib.Path) -> None:
+    """Save measurements as JSON, to be used as a baseline by later runs."""
+    path.write_text(json.dumps([asdict(measurement) for measurement in measurements], indent=4))
+
+
+def find_regressions(measurements: List[Measurement], baseline_path: pathlib.Path, tolerance: float) -> List[str]:
+    """Compare measurements with a saved baseline.
+
+    Wall time and peak memory are allowed to grow by the tolerance, given as a fraction of the baseline value.
+    Filesystem calls are deterministic, so any increase is reported.
+
+    Returns:
+        Descriptions of regressions found.
+    """
+    baseline = {entry["name"]: Measurement(**entry) for entry in json.loads(baseline_path.read_text())}
+    regressions = []
+    for measurement in measurements:
+        previous = baseline.get(measurement.name)
+        if previous is None:
+            continue
+        if measurement.wall_time > previous.wall_time * (1 + tolerance):
+            regressions.append(
+                f"{measurement.name}: wall time "
+                f"{previous.wall_time * 1000:.2f}ms -> {measurement.wall_time * 1000:.2f}ms"
+            )
+        if measurement.total_filesystem_calls > previous.total_filesystem_calls:
+            regressions.append(
+                f"{measurement.name}: filesystem calls "
+                f"{previous.total_filesystem_calls} -> {measurement.total_filesystem_calls}"
+            )
+        if measurement.peak_memory > previous.peak_memory * (1 + tolerance):
+            regressions.append(
+                f"{measurement.name}: peak memory {previous.peak_memory} -> {measurement.peak_memory} bytes"
+            )
+    return regressions
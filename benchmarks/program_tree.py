@@ -0,0 +1,199 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Generator of synthetic Mbed program trees resembling the layout of Mbed OS."""
+import json
+import os
+import pathlib
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Timestamp given to every generated file and directory, so that the tree looks settled to traversal caches.
+SETTLED_TIMESTAMP = 1_500_000_000
+
+
+@dataclass
+class ProgramTreeSpec:
+    """Shape of a generated program tree.
+
+    Attributes:
+        library_depth: Depth of directory nesting inside each library.
+        library_fan_out: Number of subdirectories in each library directory.
+        libraries: Number of top level libraries in mbed-os.
+        target_vendors: Number of TARGET_ directories directly in mbed-os/targets.
+        target_nesting: Depth of TARGET_ directory nesting under each vendor.
+        target_fan_out: Number of TARGET_ subdirectories in each TARGET_ directory.
+        features: Number of FEATURE_ directories.
+        components: Number of COMPONENT_ directories.
+        files_per_directory: Number of source files in each directory.
+        mbed_lib_ratio: Probability of a directory containing mbed_lib.json.
+        mbedignore_ratio: Probability of a library directory containing .mbedignore.
+        tests_ratio: Probability of a library directory containing an ignored TESTS directory.
+        seed: Seed of the random number generator, the same spec always generates the same tree.
+    """
+
+    library_depth: int = 3
+    library_fan_out: int = 3
+    libraries: int = 12
+    target_vendors: int = 10
+    target_nesting: int = 3
+    target_fan_out: int = 3
+    features: int = 8
+    components: int = 8
+    files_per_directory: int = 6
+    mbed_lib_ratio: float = 0.3
+    mbedignore_ratio: float = 0.05
+    tests_ratio: float = 0.1
+    seed: int = 0
+
+
+SCALES = {
+    "small": ProgramTreeSpec(libraries=4, target_vendors=3, target_nesting=2, features=3, components=3),
+    "medium": ProgramTreeSpec(),
+    "mbed-os": ProgramTreeSpec(libraries=20, library_fan_out=4, target_vendors=25, files_per_directory=8),
+}
+
+
+@dataclass
+class GeneratedProgram:
+    """Description of a generated program tree.
+
+    Attributes:
+        root: Root directory of the program.
+        directories: Number of generated directories.
+        files: Number of generated files.
+        mbed_lib_files: Paths to generated mbed_lib.json files.
+        mbedignore_files: Number of generated .mbedignore files.
+        target_labels: Labels of one of the generated targets, from the vendor down to the board.
+        features: Names of all generated features.
+        components: Names of all generated components.
+    """
+
+    root: pathlib.Path
+    directories: int = 0
+    files: int = 0
+    mbed_lib_files: List[pathlib.Path] = field(default_factory=list)
+    mbedignore_files: int = 0
+    target_labels: List[str] = field(default_factory=list)
+    features: List[str] = field(default_factory=list)
+    components: List[str] = field(default_factory=list)
+
+    def allowed_label_values(self) -> Dict[str, List[str]]:
+        """Return label values enabled when configuring the program for its target, keyed by label type."""
+        return {"TARGET": self.target_labels, "FEATURE": self.features[:1], "COMPONENT": self.components[:1]}
+
+
+def generate_program_tree(root: pathlib.Path, spec: ProgramTreeSpec) -> GeneratedProgram:
+    """Generate a program tree in the given directory, which must be empty or not exist."""
+    generator = _TreeGenerator(root, spec)
+    return generator.generate()
+
+
+class _TreeGenerator:
+    def __init__(self, root: pathlib.Path, spec: ProgramTreeSpec) -> None:
+        self._spec = spec
+        self._random = random.Random(spec.seed)
+        self._program = GeneratedProgram(root=root)
+        self._created_paths: List[pathlib.Path] = []
+
+    def generate(self) -> GeneratedProgram:
+        root = self._program.root
+        self._make_directory(root)
+        self._write_json(root / "mbed_app.json", {"target_overrides": {"*": {"platform.stdio-baud-rate": 115200}}})
+        mbed_os = root / "mbed-os"
+        self._make_directory(mbed_os)
+
+        for index in range(self._spec.libraries):
+            self._make_library(mbed_os / f"lib{index}", f"lib{index}", self._spec.library_depth)
+
+        targets = mbed_os / "targets"
+        self._make_directory(targets)
+        self._write_json(targets / "targets.json", {})
+        for vendor in range(self._spec.target_vendors):
+            self._make_target(targets, f"V{vendor}", self._spec.target_nesting, vendor == 0)
+
+        self._make_directory(mbed_os / "features")
+        for index in range(self._spec.features):
+            name = f"F{index}"
+            self._program.features.append(name)
+            self._make_library(mbed_os / "features" / f"FEATURE_{name}", f"feature-{name.lower()}", 1)
+
+        self._make_directory(mbed_os / "components")
+        for index in range(self._spec.components):
+            name = f"C{index}"
+            self._program.components.append(name)
+            self._make_library(mbed_os / "components" / f"COMPONENT_{name}", f"component-{name.lower()}", 1)
+
+        for path in reversed(self._created_paths):
+            os.utime(path, (SETTLED_TIMESTAMP, SETTLED_TIMESTAMP))
+        return self._program
+
+    def _make_library(self, directory: pathlib.Path, name: str, depth: int) -> None:
+        self._make_directory(directory)
+        self._make_sources(directory)
+        if self._random.random() < self._spec.mbed_lib_ratio or depth == self._spec.library_depth:
+            self._make_mbed_lib(directory, name)
+        if self._random.random() < self._spec.mbedignore_ratio:
+            self._write_text(directory / ".mbedignore", "docs/*\n*.py\n")
+            self._program.mbedignore_files += 1
+        if self._random.random() < self._spec.tests_ratio:
+            tests = directory / "TESTS"
+            self._make_directory(tests)
+            self._make_sources(tests)
+            self._make_mbed_lib(tests, f"{name}-tests")
+
+        if depth > 0:
+            for index in range(self._spec.library_fan_out):
+                self._make_library(directory / f"dir{index}", f"{name}-{index}", depth - 1)
+
+    def _make_target(self, parent: pathlib.Path, label: str, depth: int, is_selected: bool) -> None:
+        directory = parent / f"TARGET_{label}"
+        self._make_directory(directory)
+        self._make_sources(directory)
+        if is_selected:
+            self._program.target_labels.append(label)
+        if self._random.random() < self._spec.mbed_lib_ratio:
+            self._make_mbed_lib(directory, f"target-{label.lower()}")
+
+        if depth > 0:
+            for index in range(self._spec.target_fan_out):
+                self._make_target(directory, f"{label}_{index}", depth - 1, is_selected and index == 0)
+
+    def _make_mbed_lib(self, directory: pathlib.Path, name: str) -> None:
+        path = directory / "mbed_lib.json"
+        contents = {
+            "name": name,
+            "config": {
+                f"option-{index}": {"help": f"Option {index} of {name}", "value": self._random.randint(0, 1024)}
+                for index in range(self._random.randint(1, 8))
+            },
+            "target_overrides": {
+                "*": {"option-0": 1},
+                f"V{self._random.randrange(max(self._spec.target_vendors, 1))}": {
+                    "target.features_add": [f"F{self._random.randrange(max(self._spec.features, 1))}"]
+                },
+            },
+            "macros": [f"{name.upper().replace('-', '_')}_ENABLED=1"],
+        }
+        self._write_json(path, contents)
+        self._program.mbed_lib_files.append(path)
+
+    def _make_sources(self, directory: pathlib.Path) -> None:
+        for index in range(self._spec.files_per_directory):
+            extension = ".c" if index % 2 else ".h"
+            self._write_text(directory / f"source{index}{extension}", "")
+
+    def _make_directory(self, directory: pathlib.Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        self._program.directories += 1
+        self._created_paths.append(directory)
+
+    def _write_json(self, path: pathlib.Path, contents: dict) -> None:
+        self._write_text(path, json.dumps(contents, indent=4))
+
+    def _write_text(self, path: pathlib.Path, contents: str) -> None:
+        path.write_text(contents)
+        self._program.files += 1
+        self._created_paths.append(path)
@@ -5,7 +5,7 @@
 """Entrypoint for development purposes."""
 import click
 
-from mbed_build.mbed_tools import configure
+from mbed_build.mbed_tools import configure, configure_many
 
 
 @click.group()
@@ -15,5 +15,6 @@ def cli() -> None:
 
 
 cli.add_command(configure)
+cli.add_command(configure_many)
 
 cli()
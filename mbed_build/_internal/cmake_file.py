@@ -3,38 +3,335 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 """Module in charge of CMake file generation."""
+import dataclasses
 import datetime
+import enum
+import functools
+import itertools
+import os
 import pathlib
-from typing import Iterable
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import jinja2
-from mbed_targets import get_target_by_name, Target
+from mbed_targets import Target
 
-from mbed_build._internal.config.config import Config
-from mbed_build._internal.config.assemble_build_config import assemble_config
+from mbed_build._internal.config.config import Config, Macro, Option
+from mbed_build._internal.config.assemble_build_config import ProgramConfigFiles, assemble_config
+from mbed_build._internal.config.config_file_cache import LoadExecutors, load_executors
+from mbed_build._internal.config.source import FILE_SOURCE_NAME_PREFIX, Source
+from mbed_build._internal.program_paths import ProgramPaths, relative_to_program_root
+from mbed_build._internal.result_cache import ResultCache, hash_program_inputs, result_key
+from mbed_build._internal.target_cache import get_target, get_targets
 
 TEMPLATES_DIRECTORY = pathlib.Path("_internal", "templates")
 TEMPLATE_NAME = "mbed_config.tmpl"
+HEADER_TEMPLATE_NAME = "mbed_config_header.tmpl"
+CMAKE_FILE_NAME = "mbed_config.cmake"
+HEADER_FILE_NAME = "mbed_config.h"
+MACROS_HEADER_FILE_NAME = "mbed_config_macros.h"
+DEPFILE_NAME = "mbed_config.d"
+NAMESPACE_HEADERS_DIRECTORY = "mbed_config"
+# Stands for the program root in paths of input files stored in the result cache.
+PROGRAM_ROOT_PLACEHOLDER = "@MBED_PROGRAM_ROOT@"
+# Sets of input files listed by generated files, which are part of result keys. Files generated for a single
+# target only list inputs in subtrees its labels enable, files generated for many targets list all of them.
+TARGET_INPUTS = "target-inputs"
+PROGRAM_INPUTS = "program-inputs"
+# Names a value can refer to, like option macros.
+_IDENTIFIER_REGEX = re.compile(r"[A-Za-z_]\w*")
 
 
-def generate_mbed_config_cmake_file(mbed_target: str, program_path: str, toolchain_name: str) -> str:
+class ConfigOutput(enum.Enum):
+    """Way configuration options and macros are passed to the compiler.
+
+    Attributes:
+        DEFINITIONS: Each option and macro is a -D definition added in mbed_config.cmake.
+        HEADER: Options and macros are defined in mbed_config.h, which mbed_config.cmake force-includes in every
+            C and C++ source. Compiler command lines stay short, and the header's directory is added to include
+            directories, so sources can also include it explicitly.
+        SPLIT_HEADERS: Options of each namespace, like "lwip", are defined in mbed_config/<namespace>.h, and
+            macros in mbed_config_macros.h. Each namespace header includes the macros header and headers of
+            namespaces whose options its values refer to, so it is complete on its own. mbed_config.h includes
+            all of them. mbed_config.cmake force-includes mbed_config.h in targets linking gen_config, which
+            still depend on every namespace, and mbed_config/<namespace>.h in targets linking
+            mbed_config_<namespace>. As only headers of changed namespaces are rewritten, a changed option only
+            rebuilds sources of targets linking libraries of namespaces which depend on it, instead of
+            gen_config.
+    """
+
+    DEFINITIONS = "definitions"
+    HEADER = "header"
+    SPLIT_HEADERS = "split-headers"
+
+
+def generate_mbed_config_cmake_file(
+    mbed_target: str,
+    program_path: str,
+    toolchain_name: str,
+    cache_directory: Optional[pathlib.Path] = None,
+    jobs: Optional[int] = 1,
+) -> str:
     """Generate the top-level CMakeLists.txt file containing the correct definitions for a build.
 
     Args:
         mbed_target: the target the application is being built for
         program_path: the path to the local Mbed program
         toolchain_name: the toolchain to be used to build the application
+        cache_directory: the location of data cached between runs, no cache is used if not given
+        jobs: the number of threads loading configuration files, chosen automatically if None
 
     Returns:
         A string of rendered contents for the file.
     """
-    target_build_attributes = get_target_by_name(mbed_target, program_path)
-    config = assemble_config(mbed_target, pathlib.Path(program_path))
-    return _render_mbed_config_cmake_template(target_build_attributes, config, toolchain_name, mbed_target,)
+    return generate_toolchain_mbed_config_cmake_files(
+        mbed_target, program_path, [toolchain_name], cache_directory, jobs
+    )[toolchain_name][CMAKE_FILE_NAME]
+
+
+def generate_toolchain_mbed_config_cmake_files(
+    mbed_target: str,
+    program_path: str,
+    toolchain_names: Iterable[str],
+    cache_directory: Optional[pathlib.Path] = None,
+    jobs: Optional[int] = 1,
+    config_output: ConfigOutput = ConfigOutput.DEFINITIONS,
+    reproducible: bool = False,
+    result_cache: Optional[ResultCache] = None,
+) -> Dict[str, Dict[str, str]]:
+    """Generate contents of mbed_config.cmake files for each of given toolchains, from a single configuration.
+
+    Configuration doesn't depend on the toolchain, so it is assembled once and only rendered for each toolchain.
+    Reproducible results are taken from the result cache, if given and it has them, without assembling
+    configuration.
+
+    Args:
+        mbed_target: the target the application is being built for
+        program_path: the path to the local Mbed program
+        toolchain_names: the toolchains to be used to build the application
+        cache_directory: the location of data cached between runs, no cache is used if not given
+        jobs: the number of threads loading configuration files, chosen automatically if None
+        config_output: the way configuration is passed to the compiler
+        reproducible: omit the build timestamp, so files only change when configuration changes
+        result_cache: the cache of generated files, only used for reproducible results
+
+    Returns:
+        Rendered contents of mbed_config.cmake and files it refers to, keyed by toolchain name and file name.
+    """
+    toolchain_names = list(toolchain_names)
+    key = None
+    if result_cache is not None and reproducible:
+        program_paths = ProgramPaths.from_directory(pathlib.Path(program_path))
+        inputs_digest = hash_program_inputs(pathlib.Path(program_path), program_paths, cache_directory)
+        key = result_key(inputs_digest, TARGET_INPUTS, mbed_target, toolchain_names, config_output.value)
+        cached_files = result_cache.get(key)
+        if isinstance(cached_files, dict):
+            return _relocated_files(cached_files, program_paths.root)
+
+    config = assemble_config(mbed_target, pathlib.Path(program_path), cache_directory, jobs)
+    # Resolved while assembling the configuration, so this doesn't read targets.json again
+    target_build_attributes = get_target(mbed_target, pathlib.Path(program_path), cache_directory)
+    files = {
+        toolchain_name: _render_config_files(
+            target_build_attributes, config, toolchain_name, mbed_target, config_output, reproducible
+        )
+        for toolchain_name in toolchain_names
+    }
+    if result_cache is not None and key is not None:
+        result_cache.put(key, _relocatable_files(files, program_paths.root))
+    return files
+
+
+def generate_mbed_config_cmake_files(
+    mbed_targets: Iterable[str],
+    program_path: str,
+    toolchain_names: Iterable[str],
+    cache_directory: Optional[pathlib.Path] = None,
+    jobs: Optional[int] = 1,
+    processes: Optional[int] = 1,
+    config_output: ConfigOutput = ConfigOutput.DEFINITIONS,
+    reproducible: bool = False,
+    result_cache: Optional[ResultCache] = None,
+) -> Dict[Tuple[str, str], Dict[str, str]]:
+    """Generate contents of mbed_config.cmake files for each combination of given targets and toolchains.
+
+    The program is traversed once. Configuration is then assembled for each target, and rendered for each
+    toolchain. Configuration files are parsed once enabled by a target, and shared with following targets.
+    Worker processes parse files enabled by their targets with their own copies of the cache. Reproducible
+    results of targets the result cache has, if given, are taken from it instead, and configuration files are not
+    parsed at all if it has every target.
+
+    Args:
+        mbed_targets: the targets the application is being built for
+        program_path: the path to the local Mbed program
+        toolchain_names: the toolchains to be used to build the application
+        cache_directory: the location of data cached between runs, no cache is used if not given
+        jobs: the number of threads loading configuration files, chosen automatically if None. Only used if
+            targets are assembled by this process.
+        processes: the number of processes assembling configuration of different targets, chosen automatically
+            if None
+        config_output: the way configuration is passed to the compiler
+        reproducible: omit the build timestamp, so files only change when configuration changes
+        result_cache: the cache of generated files, only used for reproducible results
+
+    Returns:
+        Rendered contents of mbed_config.cmake and files it refers to, keyed by target and toolchain name,
+        and by file name.
+    """
+    mbed_targets = list(dict.fromkeys(mbed_targets))
+    toolchain_names = list(toolchain_names)
+    keys = {}
+    target_results: Dict[str, Dict[str, Dict[str, str]]] = {}
+    if result_cache is not None and reproducible:
+        program_paths = ProgramPaths.from_directory(pathlib.Path(program_path))
+        inputs_digest = hash_program_inputs(pathlib.Path(program_path), program_paths, cache_directory)
+        for mbed_target in mbed_targets:
+            keys[mbed_target] = result_key(
+                inputs_digest, PROGRAM_INPUTS, mbed_target, toolchain_names, config_output.value
+            )
+            cached_files = result_cache.get(keys[mbed_target])
+            if isinstance(cached_files, dict):
+                target_results[mbed_target] = _relocated_files(cached_files, program_paths.root)
+
+    missing_targets = [mbed_target for mbed_target in mbed_targets if mbed_target not in target_results]
+    if missing_targets:
+        program_config_files = ProgramConfigFiles.from_directory(pathlib.Path(program_path), cache_directory)
+        targets = get_targets(missing_targets, pathlib.Path(program_path), cache_directory)
+        tasks = [
+            (mbed_target, targets[mbed_target], toolchain_names, config_output, reproducible)
+            for mbed_target in missing_targets
+        ]
+        if processes == 1 or len(tasks) < 2:
+            with load_executors(jobs) as executors:
+                results = [_generate_target_files(program_config_files, *task, executors) for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                processes, initializer=_set_worker_program_config_files, initargs=(program_config_files,)
+            ) as executor:
+                worker_results = list(executor.map(_generate_target_files_in_worker, tasks))
+            results = [target_files for target_files, _ in worker_results]
+            for _, decoded_files in worker_results:
+                program_config_files.config_files.add_decoded_files(decoded_files)
+        if cache_directory is not None:
+            program_config_files.config_files.save(cache_directory)
+
+        for mbed_target, target_files in zip(missing_targets, results):
+            target_results[mbed_target] = target_files
+            if result_cache is not None and mbed_target in keys:
+                result_cache.put(keys[mbed_target], _relocatable_files(target_files, program_paths.root))
+
+    return {
+        (mbed_target, toolchain_name): files
+        for mbed_target in mbed_targets
+        for toolchain_name, files in target_results[mbed_target].items()
+    }
+
+
+def _generate_target_files(
+    program_config_files: ProgramConfigFiles,
+    mbed_target: str,
+    target: Target,
+    toolchain_names: List[str],
+    config_output: ConfigOutput,
+    reproducible: bool,
+    executors: Optional[LoadExecutors] = None,
+) -> Dict[str, Dict[str, str]]:
+    config = program_config_files.assemble_config(Source.from_resolved_target(mbed_target, target), executors=executors)
+    return {
+        toolchain_name: _render_config_files(target, config, toolchain_name, mbed_target, config_output, reproducible)
+        for toolchain_name in toolchain_names
+    }
+
+
+# Configuration files of the program, shared by all tasks of a worker process.
+_worker_program_config_files: List[ProgramConfigFiles] = []
+
+
+def _set_worker_program_config_files(program_config_files: ProgramConfigFiles) -> None:
+    _worker_program_config_files[:] = [program_config_files]
+
+
+def _generate_target_files_in_worker(
+    task: Tuple[str, Target, List[str], ConfigOutput, bool]
+) -> Tuple[Dict[str, Dict[str, str]], Dict[str, Any]]:
+    """Return files generated for the target, and decoded files the worker used, so they are stored between runs."""
+    program_config_files = _worker_program_config_files[0]
+    return (
+        _generate_target_files(program_config_files, *task),
+        program_config_files.config_files.used_decoded_files(),
+    )
+
+
+def _render_config_files(
+    target_build_attributes: Target,
+    config: Config,
+    toolchain_name: str,
+    target_name: str,
+    config_output: ConfigOutput = ConfigOutput.DEFINITIONS,
+    reproducible: bool = False,
+) -> Dict[str, str]:
+    """Renders mbed_config.cmake and files it refers to, keyed by file name.
+
+    If the configuration records files it was assembled from, a Makefile-style depfile listing them as
+    dependencies of mbed_config.cmake is rendered as well. Headers name files setting each option relative to
+    the program root, if the configuration records it, so they don't depend on the location of the program.
+    """
+    depfile = {DEPFILE_NAME: _render_depfile(CMAKE_FILE_NAME, config.input_files)} if config.input_files else {}
+    if config_output is ConfigOutput.DEFINITIONS:
+        return {
+            CMAKE_FILE_NAME: _render_mbed_config_cmake_template(
+                target_build_attributes, config, toolchain_name, target_name, reproducible=reproducible
+            ),
+            **depfile,
+        }
+
+    namespace_headers = {}
+    if config_output is ConfigOutput.HEADER:
+        headers = {
+            HEADER_FILE_NAME: _render_header(
+                "__MBED_CONFIG_DATA__", config.options.values(), config.macros.values(), config.program_root
+            )
+        }
+    else:
+        headers = {
+            MACROS_HEADER_FILE_NAME: _render_header(
+                "__MBED_CONFIG_MACROS__", [], config.macros.values(), config.program_root
+            )
+        }
+        options_by_namespace = _group_options_by_namespace(config.options.values())
+        for namespace in options_by_namespace:
+            namespace_headers[namespace] = f"{NAMESPACE_HEADERS_DIRECTORY}/{namespace}.h"
+        for namespace, dependencies in _namespace_dependencies(options_by_namespace).items():
+            guard = "MBED_CONFIG_" + re.sub(r"\W", "_", namespace).upper() + "_H"
+            includes = [MACROS_HEADER_FILE_NAME] + [namespace_headers[dependency] for dependency in dependencies]
+            headers[namespace_headers[namespace]] = _render_header(
+                guard, options_by_namespace[namespace], [], config.program_root, includes
+            )
+        headers[HEADER_FILE_NAME] = _render_header(
+            "__MBED_CONFIG_DATA__", [], [], config.program_root, [MACROS_HEADER_FILE_NAME, *namespace_headers.values()]
+        )
+
+    cmake_file = _render_mbed_config_cmake_template(
+        target_build_attributes,
+        config,
+        toolchain_name,
+        target_name,
+        config_header=HEADER_FILE_NAME,
+        namespace_headers=namespace_headers,
+        reproducible=reproducible,
+    )
+    return {CMAKE_FILE_NAME: cmake_file, **headers, **depfile}
 
 
 def _render_mbed_config_cmake_template(
-    target_build_attributes: Target, config: Config, toolchain_name: str, target_name: str
+    target_build_attributes: Target,
+    config: Config,
+    toolchain_name: str,
+    target_name: str,
+    config_header: Optional[str] = None,
+    namespace_headers: Optional[Dict[str, str]] = None,
+    reproducible: bool = False,
 ) -> str:
     """Renders the mbed_config template with the relevant information.
 
@@ -43,32 +340,158 @@ def _render_mbed_config_cmake_template(
         config: Config object holding information parsed from the mbed config system.
         toolchain_name: Name of the toolchain being used.
         target_name: Name of the target.
+        config_header: Name of the header defining options and macros, located next to the CMake file. Options
+            and macros are added as definitions if not given.
+        namespace_headers: Paths to headers defining options of each namespace, relative to the CMake file.
+            If given, the config header is only force-included by the gen_config target.
+        reproducible: Omit MBED_BUILD_TIMESTAMP, so the file only changes when the build configuration changes.
 
     Returns:
         The contents of the rendered CMake file.
     """
-    env = jinja2.Environment(loader=jinja2.PackageLoader("mbed_build", str(TEMPLATES_DIRECTORY)),)
-    template = env.get_template(TEMPLATE_NAME)
-    options = list(config.options.values())
-    macros = list(config.macros.values())
-
+    template = _get_template(TEMPLATE_NAME)
     context = {
-        "labels": target_build_attributes.labels,
-        "features": target_build_attributes.features,
-        "components": target_build_attributes.components,
-        "device_has": target_build_attributes.device_has,
-        "target_macros": target_build_attributes.macros,
-        "supported_form_factors": target_build_attributes.supported_form_factors,
-        "timestamp": datetime.datetime.now().timestamp(),
+        # Target attributes are sets, sorted so their order doesn't depend on the process rendering them
+        "labels": sorted(target_build_attributes.labels),
+        "features": sorted(target_build_attributes.features),
+        "components": sorted(target_build_attributes.components),
+        "device_has": sorted(target_build_attributes.device_has),
+        "target_macros": sorted(target_build_attributes.macros),
+        "supported_form_factors": sorted(target_build_attributes.supported_form_factors),
+        "timestamp": None if reproducible else datetime.datetime.now().timestamp(),
         "core": target_build_attributes.core,
         "target_name": target_name,
         "toolchain_name": toolchain_name,
+        "config_header": config_header,
+        "namespace_headers": namespace_headers or {},
+        "input_files": [_escape_cmake_argument(_absolute_posix_path(input_file)) for input_file in config.input_files],
+        **_config_context(config.options.values(), config.macros.values()),
+    }
+    return template.render(context)
+
+
+def _render_header(
+    include_guard: str,
+    options: Iterable[Option],
+    macros: Iterable[Macro],
+    program_root: Optional[pathlib.Path] = None,
+    includes: Iterable[str] = (),
+) -> str:
+    options = [
+        dataclasses.replace(option, set_by=_relative_set_by(option.set_by, program_root))
+        for option in options
+        if option.value is not None
+    ]
+    macros = [dataclasses.replace(macro, set_by=_relative_set_by(macro.set_by, program_root)) for macro in macros]
+    context = {"include_guard": include_guard, "includes": list(includes), **_config_context(options, macros)}
+    header: str = _get_template(HEADER_TEMPLATE_NAME).render(context)
+    return header
+
+
+def _relative_set_by(set_by: str, program_root: Optional[pathlib.Path]) -> str:
+    """Return name of the source setting a value, with the path of a file relative to the program root."""
+    if program_root is None or not set_by.startswith(FILE_SOURCE_NAME_PREFIX):
+        return set_by
+    file_path = pathlib.Path(set_by[len(FILE_SOURCE_NAME_PREFIX) :])
+    return FILE_SOURCE_NAME_PREFIX + relative_to_program_root(file_path, program_root)
+
+
+def _relocatable_files(files: Dict[str, Dict[str, str]], program_root: pathlib.Path) -> Dict[str, Dict[str, str]]:
+    """Return files rendered for each toolchain with the program root in paths of input files replaced.
+
+    Results are stored in the result cache in this form, as they are shared by copies of the program in different
+    locations. The root is replaced by `PROGRAM_ROOT_PLACEHOLDER`. Headers don't need it, as they name files
+    relative to the program root.
+    """
+    return _replace_program_root(
+        files, _escaped_roots(_absolute_posix_path(program_root)), _escaped_roots(PROGRAM_ROOT_PLACEHOLDER)
+    )
+
+
+def _relocated_files(files: Dict[str, Dict[str, str]], program_root: pathlib.Path) -> Dict[str, Dict[str, str]]:
+    """Return files returned by `_relocatable_files` with paths of input files in the program root restored."""
+    return _replace_program_root(
+        files, _escaped_roots(PROGRAM_ROOT_PLACEHOLDER), _escaped_roots(_absolute_posix_path(program_root))
+    )
+
+
+def _escaped_roots(root: str) -> Dict[str, str]:
+    return {CMAKE_FILE_NAME: _escape_cmake_argument(root), DEPFILE_NAME: _escape_make_path(root)}
+
+
+def _replace_program_root(
+    files: Dict[str, Dict[str, str]], old_roots: Dict[str, str], new_roots: Dict[str, str]
+) -> Dict[str, Dict[str, str]]:
+    replaced_files = {}
+    for toolchain_name, toolchain_files in files.items():
+        replaced_files[toolchain_name] = dict(toolchain_files)
+        for file_name, old_root in old_roots.items():
+            if file_name in toolchain_files:
+                # Only whole path components, so a root doesn't match the start of a sibling directory
+                pattern = re.escape(old_root) + r'(?=[/"\s]|$)'
+                new_root = new_roots[file_name]
+                replaced_files[toolchain_name][file_name] = re.sub(
+                    pattern, lambda _: new_root, toolchain_files[file_name]
+                )
+    return replaced_files
+
+
+def _render_depfile(target: str, dependencies: Iterable[pathlib.Path]) -> str:
+    lines = [f"{target}:"] + [_escape_make_path(_absolute_posix_path(dependency)) for dependency in dependencies]
+    return " \\\n  ".join(lines) + "\n"
+
+
+def _escape_make_path(path: str) -> str:
+    return path.replace("$", "$$").replace("#", "\\#").replace(" ", "\\ ")
+
+
+def _escape_cmake_argument(argument: str) -> str:
+    # Contents of a quoted argument, where variable references would otherwise be evaluated
+    return argument.replace("\\", "\\\\").replace('"', '\\"').replace("$", "\\$")
+
+
+def _absolute_posix_path(path: pathlib.Path) -> str:
+    # Unlike Path.resolve, abspath doesn't query the file system
+    return pathlib.Path(os.path.abspath(path)).as_posix()
+
+
+def _group_options_by_namespace(options: Iterable[Option]) -> Dict[str, List[Option]]:
+    options_by_namespace: Dict[str, List[Option]] = {}
+    for option in options:
+        if option.value is not None:
+            options_by_namespace.setdefault(option.key.split(".", 1)[0], []).append(option)
+    return dict(sorted(options_by_namespace.items()))
+
+
+def _namespace_dependencies(options_by_namespace: Dict[str, List[Option]]) -> Dict[str, List[str]]:
+    """Return namespaces whose option macros are referred to by option values of each namespace, sorted by name."""
+    macro_namespaces = {
+        option.macro_name: namespace for namespace, options in options_by_namespace.items() for option in options
+    }
+    dependencies = {}
+    for namespace, options in options_by_namespace.items():
+        names = itertools.chain.from_iterable(_IDENTIFIER_REGEX.findall(str(option.value)) for option in options)
+        dependencies[namespace] = sorted(
+            {macro_namespaces[name] for name in names if name in macro_namespaces} - {namespace}
+        )
+    return dependencies
+
+
+def _config_context(options: Iterable[Option], macros: Iterable[Macro]) -> Dict[str, Any]:
+    options = list(options)
+    macros = list(macros)
+    return {
         "options": sorted(options, key=lambda option: option.macro_name),
         "macros": sorted(macros, key=lambda macro: macro.name),
         "max_name_length": max(_max_attribute_length(options, "macro_name"), _max_attribute_length(macros, "name")),
         "max_value_length": max(_max_attribute_length(options, "value"), _max_attribute_length(macros, "value")),
     }
-    return template.render(context)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_template(name: str) -> jinja2.Template:
+    env = jinja2.Environment(loader=jinja2.PackageLoader("mbed_build", str(TEMPLATES_DIRECTORY)),)
+    return env.get_template(name)
 
 
 def _max_attribute_length(objects: Iterable[object], attribute: str) -> int:
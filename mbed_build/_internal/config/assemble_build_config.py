@@ -3,51 +3,177 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 """Configuration assembly algorithm."""
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional
 
 from mbed_build._internal.config.config import Config
+from mbed_build._internal.config.config_file_cache import ConfigFileCache, LoadExecutors, load_executors
 from mbed_build._internal.config.cumulative_data import CumulativeData
+from mbed_build._internal.config.incremental_assembly import (
+    DEFAULT_MAX_PASSES,
+    IncrementalAssembly,
+    allowed_label_values_of,
+)
 from mbed_build._internal.config.source import Source
-from mbed_build._internal.find_files import LabelFilter, filter_files, find_files
-from mbed_project import MbedProgram
+from mbed_build._internal.find_files import ProgramFileIndex
+from mbed_build._internal.program_paths import ProgramPaths
+from mbed_build._internal.traversal_cache import TraversalCache
 
 
-def assemble_config(mbed_target: str, mbed_program_directory: Path) -> Config:
+def assemble_config(
+    mbed_target: str,
+    mbed_program_directory: Path,
+    cache_directory: Optional[Path] = None,
+    jobs: Optional[int] = 1,
+    decode_processes: int = 0,
+    max_passes: int = DEFAULT_MAX_PASSES,
+) -> Config:
     """Assemble Config for given target and program directory.
 
     The structure and configuration of MbedOS requires us to do multiple passes over
     configuration files, as each pass might affect which configuration files should be included
     in the final configuration.
+
+    Args:
+        mbed_target: Name of the target to assemble the configuration for.
+        mbed_program_directory: Location of the program.
+        cache_directory: Optional location of data cached between runs. No cache is used if not given.
+        jobs: Number of threads loading configuration files, see `load_executors`.
+        decode_processes: Number of processes decoding configuration files, see `load_executors`.
+        max_passes: Maximum number of passes over configuration files.
+
+    Raises:
+        ConfigurationCycle: configuration files keep enabling and disabling each other.
+        ConfigurationPassLimitExceeded: configuration didn't settle in the maximum number of passes.
     """
-    target_source = Source.from_target(mbed_target, mbed_program_directory)
-    mbed_lib_files = find_files("mbed_lib.json", mbed_program_directory)
-    mbed_program = MbedProgram.from_existing(mbed_program_directory)
-    mbed_app_file = mbed_program.files.app_config_file
-    return _assemble_config_from_sources_and_lib_files(target_source, mbed_lib_files, mbed_app_file)
+    target_source = Source.from_target(mbed_target, mbed_program_directory, cache_directory)
+    program_paths = ProgramPaths.from_directory(mbed_program_directory)
+    traversal_cache = None if cache_directory is None else TraversalCache.load(cache_directory)
+    config_files = ConfigFileCache() if cache_directory is None else ConfigFileCache.load(cache_directory)
+    # Only subtrees enabled by the target are traversed upfront, others are traversed once enabled by config.
+    program_files = ProgramFileIndex.from_directory(
+        mbed_program_directory,
+        traversal_cache=traversal_cache,
+        allowed_label_values=allowed_label_values_of(CumulativeData.from_sources([target_source])),
+    )
+    mbed_lib_files = program_files.get("mbed_lib.json")
+    mbed_app_file = program_paths.app_config_file
+    with load_executors(jobs, decode_processes) as executors:
+        config = _assemble_config_from_sources_and_lib_files(
+            target_source, mbed_lib_files, mbed_app_file, program_files, config_files, executors, max_passes
+        )
+    # The index includes mbed_lib.json files found in subtrees enabled during assembly
+    config.input_files = _input_files(program_paths, program_files)
+    config.program_root = program_paths.root
+    if traversal_cache is not None and cache_directory is not None:
+        traversal_cache.save(cache_directory)
+        config_files.save(cache_directory)
+    return config
+
+
+@dataclass
+class ProgramConfigFiles:
+    """Configuration files of a program, found once to assemble configuration for many targets.
+
+    Files are parsed when configuration of a target enables them, and kept in the cache shared by all targets,
+    so each file is parsed at most once, and a file which can't be parsed only fails targets enabling it.
+
+    Attributes:
+        mbed_lib_files: Paths to all mbed_lib.json files of the program, regardless of their labels.
+        mbed_app_file: Path to mbed_app.json file in the program root, if any.
+        config_files: Cache of the parsed files. Files parsed by targets are stored between runs once it is saved.
+        input_files: Files configuration of every target is assembled from, see `Config.input_files`.
+        program_root: Root of the program, see `Config.program_root`.
+    """
+
+    mbed_lib_files: List[Path]
+    mbed_app_file: Optional[Path]
+    config_files: ConfigFileCache
+    input_files: List[Path] = field(default_factory=list)
+    program_root: Optional[Path] = None
+
+    @classmethod
+    def from_directory(
+        cls, mbed_program_directory: Path, cache_directory: Optional[Path] = None
+    ) -> "ProgramConfigFiles":
+        """Find all configuration files of the program.
+
+        The whole program tree is traversed, as labels enabling its subtrees depend on the target.
+
+        Args:
+            mbed_program_directory: Location of the program.
+            cache_directory: Optional location of data cached between runs. No cache is used if not given.
+        """
+        program_paths = ProgramPaths.from_directory(mbed_program_directory)
+        traversal_cache = None if cache_directory is None else TraversalCache.load(cache_directory)
+        config_files = ConfigFileCache() if cache_directory is None else ConfigFileCache.load(cache_directory)
+        program_files = ProgramFileIndex.from_directory(mbed_program_directory, traversal_cache=traversal_cache)
+        if traversal_cache is not None and cache_directory is not None:
+            traversal_cache.save(cache_directory)
+        return cls(
+            mbed_lib_files=program_files.get("mbed_lib.json"),
+            mbed_app_file=program_paths.app_config_file,
+            config_files=config_files,
+            input_files=_input_files(program_paths, program_files),
+            program_root=program_paths.root,
+        )
+
+    def assemble_config(
+        self, target_source: Source, max_passes: int = DEFAULT_MAX_PASSES, executors: Optional[LoadExecutors] = None
+    ) -> Config:
+        """Assemble Config for the target described by given Source, see `assemble_config`.
+
+        Only files enabled by the target's configuration are parsed, those which weren't parsed for previous
+        targets are loaded with given executors, if any.
+        """
+        config = _assemble_config_from_sources_and_lib_files(
+            target_source,
+            self.mbed_lib_files,
+            self.mbed_app_file,
+            config_files=self.config_files,
+            executors=executors,
+            max_passes=max_passes,
+        )
+        config.input_files = list(self.input_files)
+        config.program_root = self.program_root
+        return config
 
 
 def _assemble_config_from_sources_and_lib_files(
-    target_source: Source, mbed_lib_files: Iterable[Path], mbed_app_file: Optional[Path] = None
+    target_source: Source,
+    mbed_lib_files: Iterable[Path],
+    mbed_app_file: Optional[Path] = None,
+    program_files: Optional[ProgramFileIndex] = None,
+    config_files: Optional[ConfigFileCache] = None,
+    executors: Optional[LoadExecutors] = None,
+    max_passes: int = DEFAULT_MAX_PASSES,
 ) -> Config:
-    previous_cumulative_data = None
-    current_cumulative_data = CumulativeData.from_sources([target_source])
-    while previous_cumulative_data != current_cumulative_data:
-        filtered_files = _filter_files(mbed_lib_files, current_cumulative_data)
-        mbed_lib_sources = [Source.from_mbed_lib(file, current_cumulative_data.labels) for file in filtered_files]
-        all_sources = [target_source] + mbed_lib_sources
-        if mbed_app_file:
-            all_sources = all_sources + [Source.from_mbed_app(mbed_app_file, current_cumulative_data.labels)]
-        previous_cumulative_data = current_cumulative_data
-        current_cumulative_data = CumulativeData.from_sources(all_sources)
-
-    return Config.from_sources(all_sources)
-
-
-def _filter_files(files: Iterable[Path], cumulative_data: CumulativeData) -> Iterable[Path]:
-    filters = (
-        LabelFilter("TARGET", cumulative_data.labels),
-        LabelFilter("FEATURE", cumulative_data.features),
-        LabelFilter("COMPONENT", cumulative_data.components),
-    )
-    return filter_files(files, filters)
+    """Assemble Config from given sources and configuration files, in passes until the set of files settles.
+
+    If the index of program files is given, subtrees it skipped are traversed as soon as their labels are
+    enabled, and mbed_lib.json files found in them are taken into account.
+
+    Each file is parsed once, and each pass only processes changes caused by the previous one, see
+    `IncrementalAssembly`. Parsed files are taken from the given cache, if any. Files enabled in a pass are
+    loaded concurrently if executors are given, the order of their Sources doesn't depend on it.
+    """
+    return IncrementalAssembly(
+        target_source, mbed_lib_files, mbed_app_file, program_files, config_files, executors
+    ).run(max_passes)
+
+
+def _input_files(program_paths: ProgramPaths, program_files: ProgramFileIndex) -> List[Path]:
+    input_files = [
+        program_paths.targets_json_file,
+        *program_files.get(".mbedignore"),
+        *program_files.get("mbed_lib.json"),
+    ]
+    if program_paths.app_config_file is not None:
+        input_files.append(program_paths.app_config_file)
+    # Files are added to and removed from the configuration by changes to the directories they are found in.
+    # The program root decides whether there is mbed_app.json, even if it isn't traversed.
+    input_files.extend(program_files.directories)
+    if program_paths.root not in program_files.directories:
+        input_files.append(program_paths.root)
+    return input_files
@@ -50,15 +50,18 @@ class BootloaderOverrides:
         data = BootloaderOverrides()
         for source in sources:
             for key, value in source.overrides.items():
-                if key in BOOTLOADER_OVERRIDE_KEYS_IN_SOURCE:
-                    key_without_prefix = key[len("target.") :]
-                    setattr(
-                        data,
-                        key_without_prefix,
-                        BootloaderOverride(name=key_without_prefix, value=value, set_by=source.human_name),
-                    )
+                if key in _BOOTLOADER_OVERRIDE_KEYS:
+                    data.apply_override(key, value, source)
         return data
 
+    def apply_override(self, key: str, value: Any, source: Source) -> None:
+        """Mutate self by setting a bootloader override, like "target.app_offset"."""
+        key_without_prefix = key[len("target.") :]
+        setattr(
+            self, key_without_prefix, BootloaderOverride(name=key_without_prefix, value=value, set_by=source.human_name)
+        )
+
 
 _BOOTLOADER_OVERRIDE_FIELDS = [f.name for f in fields(BootloaderOverrides)]
 BOOTLOADER_OVERRIDE_KEYS_IN_SOURCE = [f"target.{f}" for f in _BOOTLOADER_OVERRIDE_FIELDS]
+_BOOTLOADER_OVERRIDE_KEYS = frozenset(BOOTLOADER_OVERRIDE_KEYS_IN_SOURCE)
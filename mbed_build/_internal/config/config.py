@@ -4,7 +4,8 @@
 #
 """Build configuration representation."""
 from dataclasses import dataclass, field
-from typing import Any, Dict, Iterable, Optional
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
 
 from mbed_build._internal.config.source import Source
 from mbed_build._internal.config.cumulative_data import CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE
@@ -84,6 +85,7 @@ class Option:
 
 
 IGNORED_OVERRIDE_KEYS_IN_SOURCE = CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE + BOOTLOADER_OVERRIDE_KEYS_IN_SOURCE
+_IGNORED_OVERRIDE_KEYS = frozenset(IGNORED_OVERRIDE_KEYS_IN_SOURCE)
 
 
 @dataclass
@@ -93,26 +95,46 @@ class Config:
     Attributes:
         options: Options parsed from "config" and "target_overrides" sections of *.json files
         macros: Macros parsed from "macros" section of mbed_lib.json and mbed_app.json file
+        input_files: Files the configuration was assembled from: targets.json, every .mbedignore applied and
+            every mbed_lib.json found, whether enabled or not, and mbed_app.json, followed by every traversed
+            directory which can hold them and the program root. Configuration only needs to be assembled again
+            when one of them changes. Empty if the configuration wasn't assembled from files.
+        program_root: Root of the program the configuration was assembled for, None if it wasn't assembled
+            from files of a program.
     """
 
     options: Dict[str, Option] = field(default_factory=dict)
     macros: Dict[str, Macro] = field(default_factory=dict)
+    input_files: List[Path] = field(default_factory=list, compare=False)
+    program_root: Optional[Path] = field(default=None, compare=False)
 
     @classmethod
     def from_sources(cls, sources: Iterable[Source]) -> "Config":
         """Interrogate each source in turn to create final Config."""
         config = Config()
         for source in sources:
-            for key, value in source.config.items():
-                _create_config_option(config, key, value, source)
+            config.add_source_config(source)
             for key, value in source.overrides.items():
-                if key in IGNORED_OVERRIDE_KEYS_IN_SOURCE:
+                if key in _IGNORED_OVERRIDE_KEYS:
                     continue
-                _update_config_option(config, key, value, source)
-            for value in source.macros:
-                _create_macro(config, value, source)
+                config.apply_override(key, value, source)
+            config.add_source_macros(source)
         return config
 
+    def add_source_config(self, source: Source) -> None:
+        """Mutate self by creating Options defined in "config" section of the source."""
+        for key, value in source.config.items():
+            _create_config_option(self, key, value, source)
+
+    def apply_override(self, key: str, value: Any, source: Source) -> None:
+        """Mutate self by setting the value of an existing Option."""
+        _update_config_option(self, key, value, source)
+
+    def add_source_macros(self, source: Source) -> None:
+        """Mutate self by creating Macros defined in "macros" section of the source."""
+        for value in source.macros:
+            _create_macro(self, value, source)
+
 
 def _create_config_option(config: Config, key: str, value: Any, source: Source) -> None:
     """Mutates Config in place by creating a new Option."""
@@ -0,0 +1,257 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Parsed configuration files remembered during configuration assembly and between runs."""
+import contextlib
+import hashlib
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from mbed_build._internal.config.source import ConfigFile, decode_json_file, decode_json_files
+from mbed_build._internal.persistent_cache import load_cache, save_cache, settled_mtime_limit
+
+CACHE_NAME = "config_files"
+CACHE_VERSION = 1
+
+# Modification time, size, optional content digest and decoded contents.
+_DecodedFile = Tuple[int, int, Optional[bytes], Any]
+
+# Stands for contents which are not decoded yet, as None is valid JSON.
+_NOT_DECODED = object()
+
+
+@dataclass
+class _FileState:
+    """State of a file when it was looked up in the cache, deciding whether its decoded contents can be stored.
+
+    Attributes:
+        key: Absolute path of the file.
+        mtime_ns: Modification time of the file.
+        size: Size of the file.
+        digest: Digest of the file contents, if contents are verified.
+        data: Contents of the file, empty if they weren't read.
+    """
+
+    key: str
+    mtime_ns: int
+    size: int
+    digest: Optional[bytes]
+    data: bytes = b""
+
+
+@dataclass
+class LoadExecutors:
+    """Executors loading configuration files concurrently.
+
+    Attributes:
+        reader: Executor reading and parsing files, usually a thread pool, as reading is dominated by I/O latency.
+        decoder: Executor decoding JSON, usually a process pool. Files are decoded by the reader if not given.
+            Files are sent to it in chunks, see `decode_json_files`.
+    """
+
+    reader: Executor
+    decoder: Optional[Executor] = None
+
+
+@contextlib.contextmanager
+def load_executors(jobs: Optional[int] = None, decode_processes: int = 0) -> Iterator[Optional[LoadExecutors]]:
+    """Create executors loading configuration files, shutting them down on exit.
+
+    Args:
+        jobs: Number of threads reading files. Files are loaded sequentially if it is 1, and by a number of
+            threads based on the number of processors if not given.
+        decode_processes: Number of processes decoding JSON. Files are decoded by the reading threads if it is 0,
+            which is the fastest unless files are large, as passing them to other processes costs more than
+            decoding typical configuration files.
+    """
+    if jobs == 1 and not decode_processes:
+        yield None
+        return
+
+    with contextlib.ExitStack() as stack:
+        reader = stack.enter_context(ThreadPoolExecutor(jobs))
+        decoder = stack.enter_context(ProcessPoolExecutor(decode_processes)) if decode_processes else None
+        yield LoadExecutors(reader=reader, decoder=decoder)
+
+
+class ConfigFileCache:
+    """Parsed mbed_lib.json and mbed_app.json files, keyed by path.
+
+    Configuration is assembled in passes, each of which builds Sources from the same files with
+    a different set of target labels. The cache ensures each file is read and decoded only once.
+
+    Decoded file contents can also be stored between runs. A stored file is reused while its
+    modification time and size are unchanged and, if contents verification is enabled, while
+    the digest of its contents matches. Verification still reads each file, but skips decoding it.
+    Stored files are keyed by absolute path, and only files used since the cache was loaded are stored again.
+
+    Files can be loaded concurrently, see `get_mbed_libs`.
+
+    Attributes:
+        parsed_count: Number of files parsed since the cache was created.
+    """
+
+    def __init__(self, decoded_files: Optional[Dict[str, _DecodedFile]] = None, verify_contents: bool = False) -> None:
+        """Initialise the cache, optionally with previously stored data.
+
+        Args:
+            decoded_files: Decoded contents of files stored by a previous run, keyed by absolute file path.
+            verify_contents: Compare digest of contents of stored files, in addition to their timestamps.
+        """
+        self._mbed_libs: Dict[Path, ConfigFile] = {}
+        self._mbed_apps: Dict[Path, ConfigFile] = {}
+        self._decoded_files = {} if decoded_files is None else decoded_files
+        self._used_files: Set[str] = set()
+        self._verify_contents = verify_contents
+        self._modified = False
+        self._settled_mtime_limit = settled_mtime_limit()
+        self._lock = threading.Lock()
+        self.parsed_count = 0
+
+    @classmethod
+    def load(cls, cache_directory: Path, verify_contents: bool = False) -> "ConfigFileCache":
+        """Return cache with data stored in the cache directory, or an empty one if nothing usable is stored."""
+        data = load_cache(cache_directory, CACHE_NAME, CACHE_VERSION)
+        if not isinstance(data, dict):
+            data = None
+        return cls(decoded_files=data, verify_contents=verify_contents)
+
+    def save(self, cache_directory: Path) -> None:
+        """Store decoded contents of files used since the cache was loaded, if anything changed since then."""
+        decoded_files = {key: entry for key, entry in self._decoded_files.items() if key in self._used_files}
+        if len(decoded_files) != len(self._decoded_files):
+            self._decoded_files = decoded_files
+            self._modified = True
+        if self._modified:
+            save_cache(cache_directory, CACHE_NAME, CACHE_VERSION, self._decoded_files)
+            self._modified = False
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return parsed files and stored decoded contents, so a pickled cache can be shared with worker processes.
+
+        Files used by a copy of the cache are only stored if its `used_decoded_files` are added back to the
+        original cache, see `add_decoded_files`.
+        """
+        return {
+            "mbed_libs": self._mbed_libs,
+            "mbed_apps": self._mbed_apps,
+            "decoded_files": self._decoded_files,
+            "verify_contents": self._verify_contents,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore parsed files and stored decoded contents of a pickled cache."""
+        ConfigFileCache.__init__(self, state["decoded_files"], state["verify_contents"])
+        self._mbed_libs = state["mbed_libs"]
+        self._mbed_apps = state["mbed_apps"]
+
+    def used_decoded_files(self) -> Dict[str, _DecodedFile]:
+        """Return decoded contents of files used since the cache was loaded, which can be stored."""
+        with self._lock:
+            return {key: entry for key, entry in self._decoded_files.items() if key in self._used_files}
+
+    def add_decoded_files(self, decoded_files: Dict[str, _DecodedFile]) -> None:
+        """Store decoded contents of files used by a copy of the cache, like one shared with a worker process."""
+        with self._lock:
+            self._used_files.update(decoded_files)
+            for key, entry in decoded_files.items():
+                if self._decoded_files.get(key) != entry:
+                    self._decoded_files[key] = entry
+                    self._modified = True
+
+    def get_mbed_lib(self, mbed_lib_path: Path) -> ConfigFile:
+        """Return parsed mbed_lib.json file, parsing it only on first request."""
+        config_file = self._mbed_libs.get(mbed_lib_path)
+        if config_file is None:
+            config_file = self._parse_mbed_lib(mbed_lib_path)
+            self._mbed_libs[mbed_lib_path] = config_file
+            self.parsed_count += 1
+        return config_file
+
+    def get_mbed_libs(
+        self, mbed_lib_paths: Iterable[Path], executors: Optional[LoadExecutors] = None
+    ) -> List[ConfigFile]:
+        """Return parsed mbed_lib.json files, in the order of given paths.
+
+        Args:
+            mbed_lib_paths: Paths to mbed_lib.json files.
+            executors: Executors parsing files which weren't parsed yet. They are parsed sequentially if not given.
+        """
+        mbed_lib_paths = list(mbed_lib_paths)
+        unparsed_paths = list(dict.fromkeys(path for path in mbed_lib_paths if path not in self._mbed_libs))
+        if executors is None or len(unparsed_paths) < 2:
+            config_files = [self._parse_mbed_lib(path) for path in unparsed_paths]
+        elif executors.decoder is None:
+            config_files = list(executors.reader.map(self._parse_mbed_lib, unparsed_paths))
+        else:
+            config_files = self._parse_mbed_libs_with_decoder(unparsed_paths, executors.reader, executors.decoder)
+        self._mbed_libs.update(zip(unparsed_paths, config_files))
+        self.parsed_count += len(unparsed_paths)
+        return [self._mbed_libs[path] for path in mbed_lib_paths]
+
+    def get_mbed_app(self, mbed_app_path: Path) -> ConfigFile:
+        """Return parsed mbed_app.json file, parsing it only on first request."""
+        config_file = self._mbed_apps.get(mbed_app_path)
+        if config_file is None:
+            config_file = ConfigFile.from_mbed_app(mbed_app_path, self._decode(mbed_app_path))
+            self._mbed_apps[mbed_app_path] = config_file
+            self.parsed_count += 1
+        return config_file
+
+    def _parse_mbed_lib(self, mbed_lib_path: Path) -> ConfigFile:
+        return ConfigFile.from_mbed_lib(mbed_lib_path, self._decode(mbed_lib_path))
+
+    def _parse_mbed_libs_with_decoder(
+        self, mbed_lib_paths: List[Path], reader: Executor, decoder: Executor
+    ) -> List[ConfigFile]:
+        """Read files with the reader, and decode those which aren't stored in the cache with the decoder at once."""
+        lookups = list(reader.map(self._lookup, mbed_lib_paths))
+        contents = [file_contents for _, file_contents in lookups]
+        undecoded = [index for index, file_contents in enumerate(contents) if file_contents is _NOT_DECODED]
+        decoded = decode_json_files(
+            [mbed_lib_paths[index] for index in undecoded], [lookups[index][0].data for index in undecoded], decoder
+        )
+        for index, file_contents in zip(undecoded, decoded):
+            self._store(lookups[index][0], file_contents)
+            contents[index] = file_contents
+        return [ConfigFile.from_mbed_lib(path, file_contents) for path, file_contents in zip(mbed_lib_paths, contents)]
+
+    def _decode(self, path: Path) -> Any:
+        state, contents = self._lookup(path)
+        if contents is _NOT_DECODED:
+            contents = decode_json_file(path, state.data)
+            self._store(state, contents)
+        return contents
+
+    def _lookup(self, path: Path) -> Tuple[_FileState, Any]:
+        """Return state of the file and its stored contents, reading the file if they can't be reused."""
+        key = os.path.abspath(path)
+        stat_result = os.stat(key)
+        state = _FileState(key=key, mtime_ns=stat_result.st_mtime_ns, size=stat_result.st_size, digest=None)
+        if self._verify_contents:
+            state.data = path.read_bytes()
+            state.digest = hashlib.sha256(state.data).digest()
+
+        with self._lock:
+            self._used_files.add(key)
+            cached = self._decoded_files.get(key)
+        if cached is not None and cached[:3] == (state.mtime_ns, state.size, state.digest):
+            return state, cached[3]
+
+        if not self._verify_contents:
+            state.data = path.read_bytes()
+        return state, _NOT_DECODED
+
+    def _store(self, state: _FileState, contents: Any) -> None:
+        with self._lock:
+            if state.mtime_ns < self._settled_mtime_limit:
+                self._decoded_files[state.key] = (state.mtime_ns, state.size, state.digest, contents)
+                self._modified = True
+            elif state.key in self._decoded_files:
+                del self._decoded_files[state.key]
+                self._modified = True
@@ -4,21 +4,25 @@
 #
 """Ability to parse cumulative attributes from Sources."""
 import itertools
-import re
 from dataclasses import dataclass, field, fields
-from typing import Any, Iterable, Set, Tuple
+from typing import Any, Dict, Iterable, Tuple
 
+from mbed_build._internal.config.label_set import LabelSet
 from mbed_build._internal.config.source import Source
 
 
 @dataclass
 class CumulativeData:
-    """Representation of cumulative attributes assembled during Source parsing."""
+    """Representation of cumulative attributes assembled during Source parsing.
 
-    features: Set[str] = field(default_factory=set)
-    components: Set[str] = field(default_factory=set)
-    labels: Set[str] = field(default_factory=set)
-    device_has: Set[str] = field(default_factory=set)
+    Attributes are LabelSets, so modifying and comparing them are integer operations, while they can still be
+    used as sets of strings.
+    """
+
+    features: LabelSet = field(default_factory=LabelSet)
+    components: LabelSet = field(default_factory=LabelSet)
+    labels: LabelSet = field(default_factory=LabelSet)
+    device_has: LabelSet = field(default_factory=LabelSet)
 
     @classmethod
     def from_sources(cls, sources: Iterable[Source]) -> "CumulativeData":
@@ -26,37 +30,44 @@ class CumulativeData:
         data = CumulativeData()
         for source in sources:
             for key, value in source.overrides.items():
-                if key in CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE:
-                    _modify_field(data, key, value)
+                if key in _CUMULATIVE_OVERRIDE_KEYS:
+                    data.apply_override(key, value)
         return data
 
+    def apply_override(self, key: str, value: Any) -> None:
+        """Mutate self by applying a cumulative override, like "target.features_add"."""
+        _modify_field(self, key, value)
+
 
 def _modify_field(data: CumulativeData, key: str, value: Any) -> None:
     """Mutates CumulativeData in place by adding, removing or resetting the value of a field."""
     key, modifier = _extract_target_modifier_data(key)
     if modifier == "add":
-        new_value = getattr(data, key) | set(value)
+        new_value = getattr(data, key) | LabelSet(value)
     elif modifier == "remove":
-        new_value = getattr(data, key) - set(value)
+        new_value = getattr(data, key) - LabelSet(value)
     else:
-        new_value = set(value)
+        new_value = LabelSet(value)
     setattr(data, key, new_value)
 
 
 _CUMULATIVE_FIELDS = [f.name for f in fields(CumulativeData)]
-_PREFIXED_CUMULATIVE_FIELDS = [f"target.{f}" for f in _CUMULATIVE_FIELDS]
-CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE = _PREFIXED_CUMULATIVE_FIELDS + [
-    f"{attr}_{suffix}" for attr, suffix in itertools.product(_PREFIXED_CUMULATIVE_FIELDS, ["add", "remove"])
-]
+
+# Field name and modifier (add, remove or empty) of each cumulative override key, like "target.features_add"
+_TARGET_MODIFIER_KEYS: Dict[str, Tuple[str, str]] = {
+    **{f"target.{name}": (name, "") for name in _CUMULATIVE_FIELDS},
+    **{
+        f"target.{name}_{modifier}": (name, modifier)
+        for name, modifier in itertools.product(_CUMULATIVE_FIELDS, ["add", "remove"])
+    },
+}
+CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE = list(_TARGET_MODIFIER_KEYS)
+
+_CUMULATIVE_OVERRIDE_KEYS = frozenset(CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE)
 
 
 def _extract_target_modifier_data(key: str) -> Tuple[str, str]:
-    regex = fr"""
-            (?P<key>{'|'.join(_CUMULATIVE_FIELDS)}) # attribute name (one of ACCUMULATING_OVERRIDES)
-            _?                                      # separator
-            (?P<modifier>(add|remove)?)             # modifier (add, remove or empty)
-    """
-    match = re.search(regex, key, re.VERBOSE)
-    if not match:
+    try:
+        return _TARGET_MODIFIER_KEYS[key]
+    except KeyError:
         raise ValueError(f"Not a target modifier key {key}")
-    return match["key"], match["modifier"]
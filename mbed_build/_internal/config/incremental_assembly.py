@@ -0,0 +1,286 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Configuration assembly driven by changes of cumulative data between passes."""
+import functools
+import logging
+import operator
+import time
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from mbed_build._internal.config.config import Config
+from mbed_build._internal.config.config_file_cache import ConfigFileCache, LoadExecutors
+from mbed_build._internal.config.bootloader_overrides import BootloaderOverrides
+from mbed_build._internal.config.cumulative_data import CumulativeData
+from mbed_build._internal.config.label_set import LabelSet
+from mbed_build._internal.config.override_dispatcher import DispatchedSources, OverrideKind, override_kind
+from mbed_build._internal.config.source import ConfigFile, Source
+from mbed_build._internal.find_files import LabelIndex, ProgramFileIndex
+from mbed_build.exceptions import ConfigurationCycle, ConfigurationPassLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# Real targets settle in a few passes, this only stops assembly of a misconfigured program.
+DEFAULT_MAX_PASSES = 50
+
+# Bitmasks of all CumulativeData fields, which identify it in the history of passes.
+_Fingerprint = Tuple[int, ...]
+
+
+@dataclass
+class PassStatistics:
+    """Work done in a single assembly pass.
+
+    Attributes:
+        files_enabled: Number of mbed_lib.json files enabled in the pass.
+        files_disabled: Number of mbed_lib.json files disabled in the pass.
+        files_parsed: Number of configuration files parsed in the pass.
+        sources_built: Number of Sources built in the pass.
+        duration: Time spent on the pass, in seconds.
+    """
+
+    files_enabled: int = 0
+    files_disabled: int = 0
+    files_parsed: int = 0
+    sources_built: int = 0
+    duration: float = 0.0
+
+
+class IncrementalAssembly:
+    """Assembly of configuration in passes, each processing only changes caused by the previous pass.
+
+    Configuration files enabled by labels, features and components of cumulative data can change that data,
+    enabling or disabling other files. A pass recomputes cumulative data from the files enabled by the
+    previous one, and the assembly is done once the data stops changing.
+
+    Instead of rebuilding all Sources in each pass, the assembly tracks which labels were allowed in the
+    previous pass. Only mbed_lib.json files with changed labels in their paths are enabled or disabled, and
+    only Sources of enabled files with target overrides for changed target labels are built again. Cumulative
+    data is then recomputed from Sources which contain cumulative overrides, in their original order, as
+    "remove" and reset overrides make the result depend on it.
+
+    Attributes:
+        cumulative_data: Cumulative data computed by the last pass.
+        statistics: Work done in each pass so far, for profiling.
+        bootloader_overrides: Bootloader overrides of the assembled configuration.
+    """
+
+    def __init__(
+        self,
+        target_source: Source,
+        mbed_lib_files: Iterable[Path],
+        mbed_app_file: Optional[Path] = None,
+        program_files: Optional[ProgramFileIndex] = None,
+        config_files: Optional[ConfigFileCache] = None,
+        executors: Optional[LoadExecutors] = None,
+    ) -> None:
+        """Prepare the assembly.
+
+        Args:
+            target_source: Source built from the target.
+            mbed_lib_files: Paths to all mbed_lib.json files which can be enabled, in the order of traversal.
+            mbed_app_file: Optional path to mbed_app.json file.
+            program_files: Optional index of program files. Subtrees it skipped are traversed as soon as their
+                labels are allowed, and mbed_lib.json files found in them replace the given ones.
+            config_files: Cache of parsed configuration files, a new one is used if not given.
+            executors: Optional executors loading newly enabled files concurrently.
+        """
+        self._target_source = target_source
+        self._program_files = program_files
+        self._config_files = ConfigFileCache() if config_files is None else config_files
+        self._executors = executors
+        self._mbed_app = None if mbed_app_file is None else self._config_files.get_mbed_app(mbed_app_file)
+        self._mbed_app_source: Optional[Source] = None
+        self._enabled_sources: Dict[Path, Source] = {}
+        self._cumulative_sources: Dict[Path, Source] = {}
+        self._paths_by_override_label: Dict[str, Set[Path]] = {}
+        self._source_labels = LabelSet()
+        self._allowed_labels: Optional[LabelSet] = None
+        self._set_mbed_lib_files(mbed_lib_files)
+        self._toggled_paths: List[Tuple[List[Path], List[Path]]] = []
+        self._current_statistics = PassStatistics()
+        self.statistics: List[PassStatistics] = []
+        self.bootloader_overrides = BootloaderOverrides()
+        self.cumulative_data = CumulativeData.from_sources([target_source])
+
+    def run(self, max_passes: int = DEFAULT_MAX_PASSES) -> Config:
+        """Run passes until cumulative data settles and return the assembled Config.
+
+        Args:
+            max_passes: Maximum number of passes to run.
+
+        Raises:
+            ConfigurationCycle: cumulative data repeats a value it had before the previous pass, so it won't settle.
+            ConfigurationPassLimitExceeded: cumulative data didn't settle in the maximum number of passes.
+        """
+        history: Dict[_Fingerprint, int] = {_fingerprint(self.cumulative_data): 0}
+        states = [self.cumulative_data]
+        for pass_number in range(1, max_passes + 1):
+            previous_cumulative_data = self.cumulative_data
+            self.cumulative_data = self.run_pass()
+            if self.cumulative_data == previous_cumulative_data:
+                dispatched_sources = DispatchedSources.from_sources(self.sources())
+                self.bootloader_overrides = dispatched_sources.bootloader_overrides
+                return dispatched_sources.config
+
+            fingerprint = _fingerprint(self.cumulative_data)
+            if fingerprint in history:
+                first_pass_number = history[fingerprint]
+                raise ConfigurationCycle(self._describe_cycle(states[first_pass_number:], first_pass_number))
+            history[fingerprint] = pass_number
+            states.append(self.cumulative_data)
+
+        raise ConfigurationPassLimitExceeded(
+            f"Configuration didn't settle in {max_passes} passes. Last changed: "
+            f"{_describe_changes(states[-2:]) or 'nothing'}."
+        )
+
+    def run_pass(self) -> CumulativeData:
+        """Update Sources to the current cumulative data and return cumulative data computed from them."""
+        start = time.perf_counter()
+        parsed_count = self._config_files.parsed_count
+        self._current_statistics = PassStatistics()
+        cumulative_data = self._run_pass()
+        statistics = self._current_statistics
+        statistics.files_parsed = self._config_files.parsed_count - parsed_count
+        statistics.duration = time.perf_counter() - start
+        self.statistics.append(statistics)
+        logger.debug(f"Configuration assembly pass {len(self.statistics)}: {statistics}")
+        return cumulative_data
+
+    def _run_pass(self) -> CumulativeData:
+        allowed_label_values = allowed_label_values_of(self.cumulative_data)
+        if self._program_files is not None and self._program_files.expand(allowed_label_values):
+            self._set_mbed_lib_files(self._program_files.get("mbed_lib.json"))
+
+        allowed_labels = LabelSet(
+            f"{label_type}_{value}" for label_type, values in allowed_label_values.items() for value in values
+        )
+        if self._allowed_labels is None:
+            enabled_paths = self._label_index.filter(allowed_label_values)
+            disabled_paths = list(self._enabled_sources.keys() - set(enabled_paths))
+        else:
+            enabled_paths, disabled_paths = self._label_index.filter_changed(
+                allowed_label_values, allowed_labels ^ self._allowed_labels
+            )
+        self._allowed_labels = allowed_labels
+
+        disabled_paths = [path for path in disabled_paths if path in self._enabled_sources]
+        for path in disabled_paths:
+            self._disable(path)
+
+        source_labels = self.cumulative_data.labels
+        changed_source_labels = source_labels ^ self._source_labels
+        self._source_labels = source_labels
+        for label in changed_source_labels:
+            for path in list(self._paths_by_override_label.get(label, ())):
+                self._enable(path, self._config_files.get_mbed_lib(path))
+
+        newly_enabled_paths = [path for path in enabled_paths if path not in self._enabled_sources]
+        for path, config_file in zip(
+            newly_enabled_paths, self._config_files.get_mbed_libs(newly_enabled_paths, self._executors)
+        ):
+            self._enable(path, config_file)
+        self._toggled_paths.append((newly_enabled_paths, disabled_paths))
+        self._current_statistics.files_enabled = len(newly_enabled_paths)
+        self._current_statistics.files_disabled = len(disabled_paths)
+
+        if self._mbed_app is not None and (self._mbed_app_source is None or changed_source_labels):
+            self._mbed_app_source = self._mbed_app.to_source(source_labels)
+            self._current_statistics.sources_built += 1
+
+        cumulative_sources = [self._cumulative_sources[path] for path in self._ordered(self._cumulative_sources)]
+        return CumulativeData.from_sources([self._target_source] + cumulative_sources + self._mbed_app_sources())
+
+    def sources(self) -> List[Source]:
+        """Return all Sources of the last pass, in the order of precedence."""
+        mbed_lib_sources = [self._enabled_sources[path] for path in self._ordered(self._enabled_sources)]
+        return [self._target_source] + mbed_lib_sources + self._mbed_app_sources()
+
+    def _set_mbed_lib_files(self, mbed_lib_files: Iterable[Path]) -> None:
+        mbed_lib_files = list(mbed_lib_files)
+        self._label_index = LabelIndex(mbed_lib_files)
+        self._positions = {path: position for position, path in enumerate(mbed_lib_files)}
+        # Decisions about files which weren't indexed yet are unknown, so all files are filtered again
+        self._allowed_labels = None
+
+    def _enable(self, path: Path, config_file: ConfigFile) -> None:
+        source = config_file.to_source(self._source_labels)
+        self._current_statistics.sources_built += 1
+        self._enabled_sources[path] = source
+        if any(override_kind(key) is OverrideKind.CUMULATIVE for key in source.overrides):
+            self._cumulative_sources[path] = source
+        else:
+            self._cumulative_sources.pop(path, None)
+        for label in config_file.target_overrides:
+            if label != "*":
+                self._paths_by_override_label.setdefault(label, set()).add(path)
+
+    def _disable(self, path: Path) -> None:
+        del self._enabled_sources[path]
+        self._cumulative_sources.pop(path, None)
+        for label in self._config_files.get_mbed_lib(path).target_overrides:
+            if label != "*":
+                self._paths_by_override_label[label].discard(path)
+
+    def _describe_cycle(self, states: List[CumulativeData], first_pass_number: int) -> str:
+        # Files enabled in the pass following the first repeated state are enabled again after the cycle,
+        # so files toggled in later passes are the ones which keep changing
+        toggled_paths: Set[Path] = set()
+        for enabled_paths, disabled_paths in self._toggled_paths[first_pass_number + 1 :]:
+            toggled_paths.update(enabled_paths, disabled_paths)
+        changing_values = set().union(*_changed_values(states).values())
+
+        sources = [f"File: {path}" for path in self._ordered(toggled_paths)]
+        for source in [self._target_source] + self.sources()[1:]:
+            if source.human_name not in sources and _changes_cumulative_values(source, changing_values):
+                sources.append(source.human_name)
+        return (
+            f"Configuration doesn't settle, it repeats every {len(states)} passes. "
+            f"Changing: {_describe_changes(states)}. "
+            f"Sources involved: {'; '.join(sources) or 'none'}."
+        )
+
+    def _ordered(self, paths: Iterable[Path]) -> List[Path]:
+        return sorted(paths, key=self._positions.__getitem__)
+
+    def _mbed_app_sources(self) -> List[Source]:
+        return [] if self._mbed_app_source is None else [self._mbed_app_source]
+
+
+def allowed_label_values_of(cumulative_data: CumulativeData) -> Dict[str, Iterable[str]]:
+    """Return label values allowed in paths of configuration files, keyed by label type."""
+    return {
+        "TARGET": cumulative_data.labels,
+        "FEATURE": cumulative_data.features,
+        "COMPONENT": cumulative_data.components,
+    }
+
+
+def _fingerprint(cumulative_data: CumulativeData) -> _Fingerprint:
+    return tuple(getattr(cumulative_data, field.name).mask for field in fields(CumulativeData))
+
+
+def _changed_values(states: List[CumulativeData]) -> Dict[str, Set[str]]:
+    """Return values which aren't the same in all states, keyed by field name."""
+    changed_values = {}
+    for field in fields(CumulativeData):
+        values = [getattr(state, field.name) for state in states]
+        changed = functools.reduce(operator.or_, values) - functools.reduce(operator.and_, values)
+        if changed:
+            changed_values[field.name] = set(changed)
+    return changed_values
+
+
+def _describe_changes(states: List[CumulativeData]) -> str:
+    return "; ".join(f"{name} {', '.join(sorted(values))}" for name, values in _changed_values(states).items())
+
+
+def _changes_cumulative_values(source: Source, values: Set[str]) -> bool:
+    return any(
+        override_kind(key) is OverrideKind.CUMULATIVE and values.intersection(value)
+        for key, value in source.overrides.items()
+    )
@@ -0,0 +1,74 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Decoding of JSON documents with the fastest JSON library installed.
+
+orjson and ujson are used when installed, the standard library json module otherwise.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple, Type
+
+
+@dataclass(frozen=True)
+class JsonBackend:
+    """Library decoding JSON documents.
+
+    Attributes:
+        name: Name of the library module.
+        loads: Function decoding a JSON document given as bytes.
+        errors: Exceptions raised by `loads` when a document is malformed or not supported by the library.
+    """
+
+    name: str
+    loads: Callable[[bytes], Any]
+    errors: Tuple[Type[Exception], ...]
+
+
+def find_backends() -> Dict[str, JsonBackend]:
+    """Return installed JSON libraries keyed by name, in order of preference."""
+    backends = {}
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        backends["orjson"] = JsonBackend(name="orjson", loads=orjson.loads, errors=(orjson.JSONDecodeError,))
+
+    try:
+        import ujson
+    except ImportError:
+        pass
+    else:
+        backends["ujson"] = JsonBackend(name="ujson", loads=ujson.loads, errors=(ValueError,))
+
+    backends["json"] = JsonBackend(name="json", loads=json.loads, errors=(json.JSONDecodeError,))
+    return backends
+
+
+BACKENDS = find_backends()
+DEFAULT_BACKEND = next(iter(BACKENDS.values()))
+
+
+def loads(data: bytes, backend: JsonBackend = DEFAULT_BACKEND) -> Any:
+    """Decode JSON document.
+
+    Third party libraries reject some documents accepted by the standard library, like ones containing NaN
+    or integers exceeding 64 bits, and report errors in their own ways. Such documents are decoded again
+    with the standard library, so results and `json.JSONDecodeError` raised on malformed documents don't
+    depend on the installed libraries.
+
+    Args:
+        data: JSON document.
+        backend: Library decoding the document.
+
+    Raises:
+        json.JSONDecodeError: the document is malformed.
+    """
+    try:
+        return backend.loads(data)
+    except backend.errors:
+        if backend.loads is json.loads:
+            raise
+        return json.loads(data)
@@ -0,0 +1,132 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Sets of labels represented as bitmasks of interned symbols."""
+import sys
+from collections.abc import Set
+from typing import AbstractSet, Any, Dict, FrozenSet, Iterable, Iterator, List
+
+
+class SymbolTable:
+    """Interned symbols, each of which is assigned a bit of a bitmask."""
+
+    def __init__(self) -> None:
+        """Initialise an empty table."""
+        self._bits: Dict[str, int] = {}
+        self._symbols: List[str] = []
+
+    def bit(self, symbol: str) -> int:
+        """Return the bit assigned to the symbol, assigning a new one if the symbol wasn't seen yet."""
+        bit = self._bits.get(symbol)
+        if bit is None:
+            bit = 1 << len(self._symbols)
+            self._bits[sys.intern(symbol)] = bit
+            self._symbols.append(symbol)
+        return bit
+
+    def known_bit(self, symbol: str) -> int:
+        """Return the bit assigned to the symbol, or 0 if the symbol wasn't seen yet."""
+        return self._bits.get(symbol, 0)
+
+    def mask(self, symbols: Iterable[str]) -> int:
+        """Return bitmask of the symbols."""
+        mask = 0
+        for symbol in symbols:
+            mask |= self.bit(symbol)
+        return mask
+
+    def symbols(self, mask: int) -> Iterator[str]:
+        """Yield symbols of bits set in the bitmask, in the order they were interned."""
+        while mask:
+            lowest_bit = mask & -mask
+            yield self._symbols[lowest_bit.bit_length() - 1]
+            mask ^= lowest_bit
+
+
+# Symbols of all labels, features, components and device capabilities seen by the process.
+SYMBOLS = SymbolTable()
+
+
+class LabelSet(AbstractSet[str]):
+    """Immutable set of labels, stored as a bitmask of symbols interned in `SYMBOLS`.
+
+    Operations between two LabelSets, like union, difference, equality and subset tests, are single
+    integer operations. LabelSet behaves like a frozenset of strings otherwise, so it can be used
+    wherever a set of strings is expected.
+    """
+
+    __slots__ = ("mask",)
+
+    def __init__(self, labels: Iterable[str] = ()) -> None:
+        """Create a set of given labels."""
+        self.mask: int = labels.mask if isinstance(labels, LabelSet) else SYMBOLS.mask(labels)
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "LabelSet":
+        """Create a set from a bitmask of symbols interned in `SYMBOLS`."""
+        label_set = cls.__new__(cls)
+        label_set.mask = mask
+        return label_set
+
+    def __contains__(self, label: object) -> bool:
+        """Return True if the label is in the set."""
+        return isinstance(label, str) and bool(self.mask & SYMBOLS.known_bit(label))
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over labels, in the order they were interned."""
+        return SYMBOLS.symbols(self.mask)
+
+    def __len__(self) -> int:
+        """Return the number of labels in the set."""
+        return bin(self.mask).count("1")
+
+    def __eq__(self, other: object) -> bool:
+        """Compare with a LabelSet or any other set of strings."""
+        if isinstance(other, LabelSet):
+            return self.mask == other.mask
+        if isinstance(other, Set):
+            return len(self) == len(other) and all(label in other for label in self)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        """Return hash equal to hash of a frozenset of the same labels."""
+        return hash(self.to_frozenset())
+
+    def __le__(self, other: Any) -> bool:
+        """Return True if the set is a subset of the other one."""
+        if isinstance(other, LabelSet):
+            return self.mask & ~other.mask == 0
+        return super().__le__(other)
+
+    def __or__(self, other: Any) -> "LabelSet":
+        """Return union of the sets."""
+        return LabelSet.from_mask(self.mask | _mask_of(other))
+
+    def __and__(self, other: Any) -> "LabelSet":
+        """Return intersection of the sets."""
+        return LabelSet.from_mask(self.mask & _mask_of(other))
+
+    def __sub__(self, other: Any) -> "LabelSet":
+        """Return difference of the sets."""
+        return LabelSet.from_mask(self.mask & ~_mask_of(other))
+
+    def __xor__(self, other: Any) -> "LabelSet":
+        """Return symmetric difference of the sets."""
+        return LabelSet.from_mask(self.mask ^ _mask_of(other))
+
+    __ror__ = __or__
+    __rand__ = __and__
+    __rxor__ = __xor__
+
+    def __repr__(self) -> str:
+        """Return representation listing the labels."""
+        return f"LabelSet({sorted(self)!r})"
+
+    def to_frozenset(self) -> FrozenSet[str]:
+        """Return the labels as a frozenset of strings."""
+        return frozenset(self)
+
+
+def _mask_of(labels: Iterable[str]) -> int:
+    return labels.mask if isinstance(labels, LabelSet) else SYMBOLS.mask(labels)
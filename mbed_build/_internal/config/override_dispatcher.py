@@ -0,0 +1,64 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Ability to build Config, CumulativeData and BootloaderOverrides from Sources in a single walk."""
+import enum
+from dataclasses import dataclass, field
+from typing import Dict, Iterable
+
+from mbed_build._internal.config.bootloader_overrides import BOOTLOADER_OVERRIDE_KEYS_IN_SOURCE, BootloaderOverrides
+from mbed_build._internal.config.config import Config
+from mbed_build._internal.config.cumulative_data import CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE, CumulativeData
+from mbed_build._internal.config.source import Source
+
+
+class OverrideKind(enum.Enum):
+    """Kind of an override key, which determines the structure the override applies to."""
+
+    OPTION = "option"
+    CUMULATIVE = "cumulative"
+    BOOTLOADER = "bootloader"
+
+
+OVERRIDE_KINDS: Dict[str, OverrideKind] = {
+    **{key: OverrideKind.CUMULATIVE for key in CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE},
+    **{key: OverrideKind.BOOTLOADER for key in BOOTLOADER_OVERRIDE_KEYS_IN_SOURCE},
+}
+
+
+def override_kind(key: str) -> OverrideKind:
+    """Return the kind of given override key. Keys which aren't cumulative or bootloader keys override options."""
+    return OVERRIDE_KINDS.get(key, OverrideKind.OPTION)
+
+
+@dataclass
+class DispatchedSources:
+    """Data assembled from Sources by routing each override to the structure it applies to.
+
+    Attributes:
+        config: Options and macros, same as built by `Config.from_sources`.
+        cumulative_data: Same as built by `CumulativeData.from_sources`.
+        bootloader_overrides: Same as built by `BootloaderOverrides.from_sources`.
+    """
+
+    config: Config = field(default_factory=Config)
+    cumulative_data: CumulativeData = field(default_factory=CumulativeData)
+    bootloader_overrides: BootloaderOverrides = field(default_factory=BootloaderOverrides)
+
+    @classmethod
+    def from_sources(cls, sources: Iterable[Source]) -> "DispatchedSources":
+        """Walk the Sources once, classifying each override key with a single dictionary lookup."""
+        data = cls()
+        for source in sources:
+            data.config.add_source_config(source)
+            for key, value in source.overrides.items():
+                kind = OVERRIDE_KINDS.get(key, OverrideKind.OPTION)
+                if kind is OverrideKind.OPTION:
+                    data.config.apply_override(key, value, source)
+                elif kind is OverrideKind.CUMULATIVE:
+                    data.cumulative_data.apply_override(key, value)
+                else:
+                    data.bootloader_overrides.apply_override(key, value, source)
+            data.config.add_source_macros(source)
+        return data
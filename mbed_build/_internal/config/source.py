@@ -6,14 +6,21 @@
 import json
 import logging
 
+from concurrent.futures import Executor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, Any
+from typing import Any, Iterable, List, Optional, Sequence
 
-from mbed_targets import get_target_by_board_type
+from mbed_targets import Target
+
+from mbed_build._internal.config import json_backend
+from mbed_build._internal.target_cache import get_target
 
 logger = logging.getLogger(__name__)
 
+# Prefix of names of sources built from files, followed by the path of the file.
+FILE_SOURCE_NAME_PREFIX = "File: "
+
 
 @dataclass
 class Source:
@@ -40,12 +47,7 @@ class Source:
             mbed_lib_path: Path to mbed_lib.json file
             target_labels: Labels for which "target_overrides" should apply
         """
-        file_contents = _decode_json_file(mbed_lib_path)
-        namespace = file_contents["name"]
-
-        return cls.from_file_contents(
-            file_name=str(mbed_lib_path), file_contents=file_contents, namespace=namespace, target_labels=target_labels
-        )
+        return ConfigFile.from_mbed_lib(mbed_lib_path).to_source(target_labels)
 
     @classmethod
     def from_mbed_app(cls, mbed_app_path: Path, target_labels: Iterable[str]) -> "Source":
@@ -55,31 +57,31 @@ class Source:
             mbed_app_path: Path to mbed_app.json file
             target_labels: Labels for which "target_overrides" should apply
         """
-        file_contents = _decode_json_file(mbed_app_path)
-        return cls.from_file_contents(
-            file_name=str(mbed_app_path), file_contents=file_contents, namespace="app", target_labels=target_labels
-        )
+        return ConfigFile.from_mbed_app(mbed_app_path).to_source(target_labels)
 
     @classmethod
     def from_file_contents(
         cls, file_name: str, file_contents: dict, namespace: str, target_labels: Iterable[str]
     ) -> "Source":
         """Build Source from file contents."""
-        config = file_contents.get("config", {})
-        config = _namespace_data(config, namespace)
-
-        overrides = file_contents.get("target_overrides", {})
-        target_specific_overrides = _filter_target_overrides(overrides, target_labels)
-        namespaced_overrides = _namespace_data(target_specific_overrides, namespace)
+        return ConfigFile.from_file_contents(file_name, file_contents, namespace).to_source(target_labels)
 
-        macros = file_contents.get("macros", [])
+    @classmethod
+    def from_target(
+        cls, mbed_target: str, mbed_program_directory: Path, cache_directory: Optional[Path] = None
+    ) -> "Source":
+        """Build Source from retrieved mbed_targets.Target data.
 
-        return cls(human_name=f"File: {file_name}", config=config, overrides=namespaced_overrides, macros=macros)
+        Args:
+            mbed_target: Name of the target.
+            mbed_program_directory: Location of the program.
+            cache_directory: Optional location of resolved targets cached between runs, see `get_target`.
+        """
+        return cls.from_resolved_target(mbed_target, get_target(mbed_target, mbed_program_directory, cache_directory))
 
     @classmethod
-    def from_target(cls, mbed_target: str, mbed_program_directory: Path) -> "Source":
-        """Build Source from retrieved mbed_targets.Target data."""
-        target = get_target_by_board_type(mbed_target, mbed_program_directory)
+    def from_resolved_target(cls, mbed_target: str, target: Target) -> "Source":
+        """Build Source from mbed_targets.Target data of the named target."""
         namespace = "target"
         config = _namespace_data(target.config, namespace)
 
@@ -98,6 +100,77 @@ class Source:
         )
 
 
+@dataclass
+class ConfigFile:
+    """Contents of mbed_lib.json or mbed_app.json file, before target overrides are applied.
+
+    Parsing a file doesn't depend on target labels, so a ConfigFile can be reused to build Sources
+    for different sets of labels, without reading and decoding the file again.
+
+    Attributes:
+        file_name: Path to the file.
+        namespace: Namespace of configuration keys defined by the file.
+        config: Namespaced contents of "config" section.
+        target_overrides: Contents of "target_overrides" section, keyed by target label.
+        macros: Contents of "macros" section.
+    """
+
+    file_name: str
+    namespace: str
+    config: dict
+    target_overrides: dict
+    macros: Iterable[str]
+
+    @classmethod
+    def from_mbed_lib(cls, mbed_lib_path: Path, file_contents: Optional[dict] = None) -> "ConfigFile":
+        """Parse mbed_lib.json file.
+
+        Args:
+            mbed_lib_path: Path to mbed_lib.json file
+            file_contents: Decoded contents of the file, read from the file if not given
+        """
+        if file_contents is None:
+            file_contents = decode_json_file(mbed_lib_path)
+        return cls.from_file_contents(str(mbed_lib_path), file_contents, namespace=file_contents["name"])
+
+    @classmethod
+    def from_mbed_app(cls, mbed_app_path: Path, file_contents: Optional[dict] = None) -> "ConfigFile":
+        """Parse mbed_app.json file.
+
+        Args:
+            mbed_app_path: Path to mbed_app.json file
+            file_contents: Decoded contents of the file, read from the file if not given
+        """
+        if file_contents is None:
+            file_contents = decode_json_file(mbed_app_path)
+        return cls.from_file_contents(str(mbed_app_path), file_contents, namespace="app")
+
+    @classmethod
+    def from_file_contents(cls, file_name: str, file_contents: dict, namespace: str) -> "ConfigFile":
+        """Build ConfigFile from decoded file contents."""
+        return cls(
+            file_name=file_name,
+            namespace=namespace,
+            config=_namespace_data(file_contents.get("config", {}), namespace),
+            target_overrides=file_contents.get("target_overrides", {}),
+            macros=file_contents.get("macros", []),
+        )
+
+    def to_source(self, target_labels: Iterable[str]) -> Source:
+        """Build Source with target overrides applicable to given labels.
+
+        Args:
+            target_labels: Labels for which "target_overrides" should apply
+        """
+        target_specific_overrides = _filter_target_overrides(self.target_overrides, target_labels)
+        return Source(
+            human_name=f"{FILE_SOURCE_NAME_PREFIX}{self.file_name}",
+            config=self.config,
+            overrides=_namespace_data(target_specific_overrides, self.namespace),
+            macros=self.macros,
+        )
+
+
 def _filter_target_overrides(data: dict, allowed_labels: Iterable[str]) -> dict:
     """Flatten and filter target overrides.
 
@@ -131,9 +204,40 @@ def _namespace_data(data: dict, namespace: str) -> dict:
     return namespaced
 
 
-def _decode_json_file(path: Path) -> Any:
+def decode_json_file(path: Path, data: Optional[bytes] = None) -> Any:
+    """Decode JSON file, logging its path if decoding fails.
+
+    Args:
+        path: Path to JSON file
+        data: Contents of the file, read from the file if not given
+    """
+    if data is None:
+        data = path.read_bytes()
     try:
-        return json.loads(path.read_text())
+        return json_backend.loads(data)
     except json.JSONDecodeError:
         logger.error(f"Failed to decode JSON data in the file located at '{path}'")
         raise
+
+
+def decode_json_files(
+    paths: Sequence[Path], datas: Sequence[bytes], decoder: Executor, chunk_size: int = 32
+) -> List[Any]:
+    """Decode contents of JSON files with the executor, in chunks, logging the path of a file failing to decode.
+
+    Each task sent to the executor decodes a chunk of files, as sending each file separately to a process pool
+    costs much more than decoding it.
+
+    Args:
+        paths: Paths to JSON files
+        datas: Contents of the files
+        decoder: Executor decoding the contents, usually a process pool
+        chunk_size: Number of files decoded by each task
+    """
+    try:
+        return list(decoder.map(json_backend.loads, datas, chunksize=chunk_size))
+    except json.JSONDecodeError:
+        # Decoded again to find out which file is invalid
+        for path, data in zip(paths, datas):
+            decode_json_file(path, data)
+        raise
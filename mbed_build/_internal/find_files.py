@@ -3,24 +3,110 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 """Find files in MbedOS program directory."""
-from pathlib import Path
 import fnmatch
-from typing import Callable, Iterable, Optional, List, Tuple
+import itertools
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, List, Pattern, Set, Tuple
+
+from mbed_build._internal.config.label_set import LabelSet
+from mbed_build._internal.traversal_cache import TraversalCache, read_mbedignore_lines, scan_directory
+
+# Names of files the configuration pipeline looks for in the program tree.
+PROGRAM_FILE_NAMES = ("mbed_lib.json", "mbed_app.json", ".mbedignore")
+
+# Name of the file CMake writes to the top of every build tree.
+CMAKE_CACHE_FILE_NAME = "CMakeCache.txt"
 
 
 def find_files(filename: str, directory: Path) -> List[Path]:
     """Proxy to `_find_files`, which applies legacy filtering rules."""
+    return _find_files(filename, directory, [_legacy_ignore_filter()])
+
+
+@dataclass
+class ProgramFileIndex:
+    """Files of interest found in a program tree, grouped by file name.
+
+    The index is built in a single traversal, so each directory of the program is listed only once,
+    regardless of how many different file names are looked up afterwards.
+
+    The traversal can be limited to subtrees allowed by label values (see `LabelFilter`). Directories
+    with labels which are not allowed are skipped, but remembered, so that they are traversed by `expand`
+    once their labels become allowed.
+
+    Attributes:
+        directory: Location where the traversal started.
+        files: Paths to found files, keyed by file name. Besides matching files found in the tree,
+            every .mbedignore file applied during traversal is recorded under ".mbedignore",
+            if that name was requested. Paths are in the order of a depth first traversal.
+        directories: Paths to directories listed during traversal which can hold files of interest, in the order
+            of a depth first traversal. Directories whose contents are all filtered out are left out. The set of
+            found files can only change when one of them, or one of the found files, changes.
+    """
+
+    directory: Path
+    files: Dict[str, List[Path]] = field(default_factory=dict)
+    directories: List[Path] = field(default_factory=list)
+    _walker: Optional["_TreeWalker"] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_directory(
+        cls,
+        directory: Path,
+        file_names: Iterable[str] = PROGRAM_FILE_NAMES,
+        traversal_cache: Optional[TraversalCache] = None,
+        allowed_label_values: Optional[Dict[str, Iterable[str]]] = None,
+    ) -> "ProgramFileIndex":
+        """Build the index by traversing the directory, applying legacy filtering rules.
+
+        Args:
+            directory: Location where traversal starts.
+            file_names: Names of files to index.
+            traversal_cache: Optional cache of directory listings from previous traversals.
+            allowed_label_values: Optional values allowed for each label type. If given, subtrees
+                labelled with values which are not allowed are skipped.
+        """
+        walker = _TreeWalker(file_names, traversal_cache, allowed_label_values)
+        walker.walk(directory, [_legacy_ignore_filter()])
+        return cls(directory=directory, files=walker.found(), directories=walker.listed_directories(), _walker=walker)
+
+    def expand(self, allowed_label_values: Dict[str, Iterable[str]]) -> bool:
+        """Traverse skipped subtrees whose labels are allowed by given label values.
+
+        Returns:
+            True if any new files were added to the index.
+        """
+        if self._walker is None:
+            return False
+
+        found_new_files = self._walker.resume(allowed_label_values)
+        self.directories = self._walker.listed_directories()
+        if not found_new_files:
+            return False
+
+        self.files = self._walker.found()
+        return True
+
+    def get(self, file_name: str) -> List[Path]:
+        """Return paths to all indexed files with the given name."""
+        return self.files.get(file_name, [])
+
+
+def _legacy_ignore_filter() -> "MbedignoreFilter":
     # Temporary workaround, which replicates hardcoded ignore rules from old tools.
     # Legacy list of ignored directories is longer, however "TESTS" and
     # "TEST_APPS" were the only ones that actually exist in the MbedOS source.
     # Ideally, this should be solved by putting an `.mbedignore` file in the root of MbedOS repo,
     # similarly to what the code below pretends is happening.
-    legacy_ignore = MbedignoreFilter(("*/TESTS", "*/TEST_APPS"))
-    return _find_files(filename, directory, [legacy_ignore])
+    return MbedignoreFilter(("*/TESTS", "*/TEST_APPS"))
 
 
 def _find_files(filename: str, directory: Path, filters: Optional[List[Callable]] = None) -> List[Path]:
-    """Recursively find files by name under a given directory.
+    """Find files by name under a given directory.
 
     This function automatically applies rules from .mbedignore files found during traversal.
 
@@ -32,40 +118,223 @@ def _find_files(filename: str, directory: Path, filters: Optional[List[Callable]
         directory: Location where search starts.
         filters: Optional list of exclude filters to apply.
     """
-    if filters is None:
-        filters = []
+    return list(iter_files(filename, directory, filters))
+
+
+def iter_files(filename: str, directory: Path, filters: Optional[List[Callable]] = None) -> Iterator[Path]:
+    """Yield files by name under a given directory, as soon as they are found.
+
+    Filtering rules are the same as in `_find_files`, and files are yielded in the same order. As the tree is
+    traversed lazily, found files can be processed before the traversal finishes.
+
+    Args:
+        filename: Name of the file to look for.
+        directory: Location where search starts.
+        filters: Optional list of exclude filters to apply.
+    """
+    walker = _TreeWalker([filename], collect=False)
+    for _, path in walker.iter_walk(directory, filters or []):
+        yield path
+
+
+# Position of a path in a depth first traversal, as indexes of entries leading to it from the start directory.
+_TraversalOrder = Tuple[int, ...]
+
 
-    result: List[Path] = []
+class _TreeWalker:
+    """Traversal of a directory tree, collecting files by name.
 
-    # Directories and files to process
-    children = list(directory.iterdir())
+    The tree is walked iteratively with `os.scandir`, so there is no limit on its depth and the file type
+    information cached in each `os.DirEntry` is reused instead of calling `stat` on every child. When a
+    traversal cache is given, only directories which changed since they were cached are listed again.
 
-    # If .mbedignore is one of the children, we need to add it to filter list,
-    # as it might contain rules for currently processed directory, as well as its descendants.
-    mbedignore = Path(directory, ".mbedignore")
-    if mbedignore in children:
-        filters = filters + [MbedignoreFilter.from_file(mbedignore)]
+    If allowed label values are given, subtrees labelled with other values are not traversed, but kept
+    aside to be traversed by `resume`. Found files are ordered as if the whole tree was walked at once.
 
-    # Remove files and directories that don't match current set of filters
-    filtered_children = filter_files(children, filters)
+    Hidden directories, like .git, and CMake build trees below the start directory are never traversed, as old
+    tools ignored them too. Their contents change on every build or commit, and they hold no configuration.
 
-    for child in filtered_children:
-        if child.is_dir():
-            # If processed child is a directory, recurse with current set of filters
-            result += _find_files(filename, child, filters)
+    A walker which doesn't collect found files only yields them from `iter_walk`, so memory used by a
+    streaming traversal is bounded by the directories waiting to be visited, not by the number of matches.
+    """
 
-        if child.is_file() and child.name == filename:
-            # We've got a match
-            result.append(child)
+    def __init__(
+        self,
+        filenames: Iterable[str],
+        traversal_cache: Optional[TraversalCache] = None,
+        allowed_label_values: Optional[Dict[str, Iterable[str]]] = None,
+        collect: bool = True,
+    ):
+        """Initialise the walker attributes.
 
-    return result
+        Args:
+            filenames: Names of the files to look for.
+            traversal_cache: Optional cache of directory listings from previous traversals.
+            allowed_label_values: Optional values allowed for each label type, enabling label based pruning.
+            collect: Keep found files and listed directories, so they can be returned by `found` and
+                `listed_directories`, and counted by `resume`.
+        """
+        self._wanted = set(filenames)
+        self._collect = collect
+        self._collect_mbedignore = ".mbedignore" in self._wanted
+        self._traversal_cache = traversal_cache
+        self._allowed_labels = _allowed_labels(allowed_label_values)
+        self._found: Dict[str, List[Tuple[_TraversalOrder, Path]]] = {}
+        self._pruned: List[Tuple[_TraversalOrder, Path, List[Callable]]] = []
+        self._listed: List[Tuple[_TraversalOrder, Path]] = []
+
+    def walk(self, directory: Path, filters: List[Callable], order: _TraversalOrder = ()) -> None:
+        """Traverse the directory, collecting all files found on the way."""
+        for _ in self.iter_walk(directory, filters, order):
+            pass
+
+    def iter_walk(
+        self, directory: Path, filters: List[Callable], order: _TraversalOrder = ()
+    ) -> Iterator[Tuple[_TraversalOrder, Path]]:
+        """Traverse the directory lazily, applying the filters and rules from .mbedignore files found on the way.
+
+        It is important to realise that applied filters are "greedy". The moment a directory is filtered out,
+        its children won't be traversed.
+
+        Yields:
+            Position in the traversal and path of each found file, as soon as it is found. Found files
+            are also collected by the walker, if it was created to collect them.
+        """
+        # Entries still to be processed, in the order they would be visited by a depth first traversal.
+        # Each entry holds its position, path, whether it is a directory and the filters which apply to its children.
+        stack: List[Tuple[_TraversalOrder, Path, bool, List[Callable]]] = [
+            (order, directory, True, _merge_mbedignore_filters(filters))
+        ]
+        start_order = order
+        while stack:
+            order, path, is_dir, current_filters = stack.pop()
+            if not is_dir:
+                # Only files matching one of the names are ever put on the stack
+                if self._collect:
+                    self._found.setdefault(path.name, []).append((order, path))
+                yield order, path
+                continue
+
+            if self._traversal_cache is None:
+                entries = scan_directory(path)
+            else:
+                entries = self._traversal_cache.list_directory(path)
+            if order != start_order and any(name == CMAKE_CACHE_FILE_NAME for name, _, _ in entries):
+                # In-tree build directory, whose contents change on every build
+                continue
+
+            # If .mbedignore is one of the children, we need to add it to filter list,
+            # as it might contain rules for currently processed directory, as well as its descendants.
+            if any(name == ".mbedignore" for name, _, _ in entries):
+                mbedignore = Path(path, ".mbedignore")
+                if self._traversal_cache is None:
+                    pattern_lines = read_mbedignore_lines(mbedignore)
+                else:
+                    pattern_lines = self._traversal_cache.read_mbedignore(mbedignore)
+                mbedignore_filter = MbedignoreFilter.from_lines(pattern_lines, path)
+                current_filters = _merge_mbedignore_filters(current_filters + [mbedignore_filter])
+                if self._collect_mbedignore:
+                    # Ordered before anything found in the directory
+                    if self._collect:
+                        self._found.setdefault(mbedignore.name, []).append((order + (-1,), mbedignore))
+                    yield order + (-1,), mbedignore
+
+            if self._collect and self._can_hold_wanted_files(path, current_filters):
+                self._listed.append((order, path))
+
+            children = []
+            for index, (name, entry_is_dir, entry_is_file) in enumerate(entries):
+                if entry_is_dir and name.startswith("."):
+                    continue
+
+                child = Path(path, name)
+                # Remove files and directories that don't match current set of filters
+                if not all(f(child) for f in current_filters):
+                    continue
+
+                if entry_is_dir:
+                    if self._is_pruned(name):
+                        # Labelled subtree which is not allowed, it might be traversed later on
+                        self._pruned.append((order + (index,), child, current_filters))
+                    else:
+                        # If processed child is a directory, descend into it with current set of filters
+                        children.append((order + (index,), child, True, current_filters))
+
+                if entry_is_file and name in self._wanted and name != ".mbedignore":
+                    # We've got a match
+                    children.append((order + (index,), child, False, current_filters))
+
+            stack.extend(reversed(children))
+
+    def resume(self, allowed_label_values: Dict[str, Iterable[str]]) -> bool:
+        """Traverse subtrees skipped so far, whose labels are allowed by given label values.
+
+        Returns:
+            True if any new file was found.
+        """
+        self._allowed_labels = _allowed_labels(allowed_label_values)
+        found_count = self._found_count()
+        pruned, self._pruned = self._pruned, []
+        for order, path, filters in pruned:
+            if self._is_pruned(path.name):
+                self._pruned.append((order, path, filters))
+            else:
+                self.walk(path, filters, order)
+        return self._found_count() != found_count
+
+    def found(self) -> Dict[str, List[Path]]:
+        """Return found paths keyed by file name, in the order of a depth first traversal."""
+        return {
+            name: [path for _, path in sorted(paths, key=lambda found: found[0])] for name, paths in self._found.items()
+        }
+
+    def listed_directories(self) -> List[Path]:
+        """Return paths of directories listed so far, in the order of a depth first traversal."""
+        return [path for _, path in sorted(self._listed, key=lambda listed: listed[0])]
+
+    def _can_hold_wanted_files(self, directory: Path, filters: List[Callable]) -> bool:
+        """Return True if any of the wanted files would be kept by the filters, if it was in the directory."""
+        return any(all(f(Path(directory, name)) for f in filters) for name in self._wanted)
+
+    def _found_count(self) -> int:
+        return sum(len(paths) for paths in self._found.values())
+
+    def _is_pruned(self, name: str) -> bool:
+        if self._allowed_labels is None:
+            return False
+        return any(label_type in name and name not in allowed for label_type, allowed in self._allowed_labels.items())
+
+
+def _allowed_labels(allowed_label_values: Optional[Dict[str, Iterable[str]]]) -> Optional[Dict[str, Set[str]]]:
+    """Convert allowed label values to labels, as they appear in paths, keyed by label type."""
+    if allowed_label_values is None:
+        return None
+    return {
+        label_type: set(f"{label_type}_{value}" for value in values)
+        for label_type, values in allowed_label_values.items()
+    }
 
 
 def filter_files(files: Iterable[Path], filters: Iterable[Callable]) -> Iterable[Path]:
-    """Filter given paths to files using filter callables."""
+    """Filter given paths to files using filter callables.
+
+    All MbedignoreFilters are merged into one before filtering, so stacked .mbedignore rules cost a single match.
+    """
+    filters = _merge_mbedignore_filters(filters)
     return [file for file in files if all(f(file) for f in filters)]
 
 
+def _merge_mbedignore_filters(filters: Iterable[Callable]) -> List[Callable]:
+    """Return given filters with all MbedignoreFilters merged into a single one."""
+    filters = list(filters)
+    mbedignore_filters = [f for f in filters if isinstance(f, MbedignoreFilter)]
+    if len(mbedignore_filters) < 2:
+        return filters
+
+    other_filters = [f for f in filters if not isinstance(f, MbedignoreFilter)]
+    return [MbedignoreFilter.merge(mbedignore_filters)] + other_filters
+
+
 class LabelFilter:
     """Filter out given paths using path labelling rules.
 
@@ -97,26 +366,115 @@ class LabelFilter:
         return labels.issubset(self._allowed_labels)
 
 
+class LabelIndex:
+    """Labels of given paths, extracted once to answer repeated label filtering queries.
+
+    Filtering rules are the same as in `LabelFilter`. Labels found in each path are stored as a LabelSet, so
+    deciding whether a path contains only allowed labels is a single integer operation, independent of the depth
+    of the path.
+    """
+
+    def __init__(self, paths: Iterable[Path], label_types: Iterable[str] = ("TARGET", "FEATURE", "COMPONENT")):
+        """Extract labels of given paths.
+
+        Args:
+            paths: Paths to index.
+            label_types: Types of labels to extract.
+        """
+        self._label_types = tuple(label_types)
+        self._paths: List[Path] = []
+        self._path_labels: List[Tuple[Tuple[str, ...], ...]] = []
+        self._path_label_masks: List[int] = []
+        for path in paths:
+            self._paths.append(path)
+            path_labels = self._extract_labels(path)
+            self._path_labels.append(path_labels)
+            self._path_label_masks.append(LabelSet(itertools.chain.from_iterable(path_labels)).mask)
+        self._indices_by_label: Optional[Dict[str, List[int]]] = None
+
+    def filter(self, allowed_label_values: Dict[str, Iterable[str]]) -> List[Path]:
+        """Return indexed paths containing only allowed labels, in the order they were indexed.
+
+        Args:
+            allowed_label_values: Values which are allowed for each label type. No value is allowed for
+                label types missing from the mapping.
+        """
+        disallowed_mask = ~self._allowed_mask(allowed_label_values)
+        return [path for path, mask in zip(self._paths, self._path_label_masks) if not mask & disallowed_mask]
+
+    def filter_changed(
+        self, allowed_label_values: Dict[str, Iterable[str]], changed_labels: Iterable[str]
+    ) -> Tuple[List[Path], List[Path]]:
+        """Return indexed paths containing any of changed labels, split by whether they contain only allowed labels.
+
+        Filtering decisions of other paths are the same as before the labels changed, so the cost of filtering
+        only depends on the number of paths affected by the change.
+
+        Args:
+            allowed_label_values: Values which are allowed for each label type.
+            changed_labels: Labels, like "FEATURE_BLE", which were allowed before and aren't now or vice versa.
+
+        Returns:
+            Allowed and disallowed paths containing changed labels, in the order they were indexed.
+        """
+        if self._indices_by_label is None:
+            self._indices_by_label = {}
+            for index, path_labels in enumerate(self._path_labels):
+                for label in set(itertools.chain.from_iterable(path_labels)):
+                    self._indices_by_label.setdefault(label, []).append(index)
+
+        affected_indices = sorted(
+            set(itertools.chain.from_iterable(self._indices_by_label.get(label, ()) for label in changed_labels))
+        )
+        disallowed_mask = ~self._allowed_mask(allowed_label_values)
+        allowed_paths = []
+        disallowed_paths = []
+        for index in affected_indices:
+            if not self._path_label_masks[index] & disallowed_mask:
+                allowed_paths.append(self._paths[index])
+            else:
+                disallowed_paths.append(self._paths[index])
+        return allowed_paths, disallowed_paths
+
+    def _allowed_mask(self, allowed_label_values: Dict[str, Iterable[str]]) -> int:
+        return LabelSet(
+            f"{label_type}_{value}"
+            for label_type in self._label_types
+            for value in allowed_label_values.get(label_type, ())
+        ).mask
+
+    def _extract_labels(self, path: Path) -> Tuple[Tuple[str, ...], ...]:
+        return tuple(
+            tuple(sys.intern(part) for part in path.parts if label_type in part) for label_type in self._label_types
+        )
+
+
 class MbedignoreFilter:
     """Filter out given paths based on rules found in .mbedignore files.
 
     Patterns in .mbedignore use unix shell-style wildcards (fnmatch). It means
     that functionality, although similar is different to that found in
     .gitignore and friends.
+
+    Patterns are compiled once into a single regular expression. Patterns read from an .mbedignore
+    file are matched against paths relative to the directory containing the file, which means the
+    path of that directory is matched literally, even if it contains wildcard characters.
     """
 
-    def __init__(self, patterns: Tuple[str, ...]):
+    def __init__(self, patterns: Tuple[str, ...], ignore_root: Optional[Path] = None):
         """Initialise the filter attributes.
 
         Args:
             patterns: List of patterns from .mbedignore to filter against.
+            ignore_root: Directory the patterns are relative to. Patterns are matched against whole paths if not given.
         """
-        self._patterns = patterns
+        # Patterns are kept rooted in the ignore root for reference, the regex matches the root literally
+        self._patterns = patterns if ignore_root is None else tuple(str(Path(ignore_root, p)) for p in patterns)
+        self._regex = re.compile(_translate_mbedignore_patterns(patterns, ignore_root))
 
     def __call__(self, path: Path) -> bool:
         """Return True if given path doesn't match .mbedignore patterns - should not be filtered out."""
-        stringified = str(path)
-        return not any(fnmatch.fnmatch(stringified, pattern) for pattern in self._patterns)
+        return self._regex.match(os.path.normcase(path)) is None
 
     @classmethod
     def from_file(cls, mbedignore_path: Path) -> "MbedignoreFilter":
@@ -124,8 +482,56 @@ class MbedignoreFilter:
 
         Constructed patterns are rooted in the directory of .mbedignore file.
         """
-        lines = mbedignore_path.read_text().splitlines()
-        pattern_lines = (line for line in lines if line.strip() and not line.startswith("#"))
-        ignore_root = mbedignore_path.parent
-        patterns = tuple(str(ignore_root.joinpath(pattern)) for pattern in pattern_lines)
-        return cls(patterns)
+        return cls.from_lines(read_mbedignore_lines(mbedignore_path), mbedignore_path.parent)
+
+    @classmethod
+    def from_lines(cls, pattern_lines: Iterable[str], ignore_root: Path) -> "MbedignoreFilter":
+        """Return new instance with patterns rooted in the given directory."""
+        patterns = tuple(str(Path(pattern)) for pattern in pattern_lines)
+        return cls(patterns, ignore_root)
+
+    @classmethod
+    def merge(cls, filters: Iterable["MbedignoreFilter"]) -> "MbedignoreFilter":
+        """Return a single filter, which filters out paths filtered out by any of the given filters.
+
+        Each filter keeps matching against its own ignore root, but all of them are checked with a single
+        regular expression match.
+        """
+        filters = list(filters)
+        if len(filters) == 1:
+            return filters[0]
+
+        return cls._from_regex(
+            tuple(pattern for f in filters for pattern in f._patterns),
+            re.compile("|".join(f._regex.pattern for f in filters) or _NEVER_MATCHING_REGEX),
+        )
+
+    @classmethod
+    def _from_regex(cls, patterns: Tuple[str, ...], regex: Pattern[str]) -> "MbedignoreFilter":
+        """Return new instance matching paths with an already compiled regular expression."""
+        mbedignore_filter = cls.__new__(cls)
+        mbedignore_filter._patterns = patterns
+        mbedignore_filter._regex = regex
+        return mbedignore_filter
+
+
+# Regular expression which doesn't match anything, including an empty string.
+_NEVER_MATCHING_REGEX = "(?!)"
+
+
+def _translate_mbedignore_patterns(patterns: Iterable[str], ignore_root: Optional[Path]) -> str:
+    """Translate fnmatch patterns to a regular expression matching paths which match any of them."""
+    rooted_patterns = []
+    relative_patterns = []
+    for pattern in patterns:
+        translated = fnmatch.translate(os.path.normcase(pattern))
+        if ignore_root is None or Path(pattern).is_absolute():
+            rooted_patterns.append(translated)
+        else:
+            relative_patterns.append(translated)
+
+    alternatives = rooted_patterns
+    if ignore_root is not None and relative_patterns:
+        root_prefix = re.escape(os.path.join(os.path.normcase(ignore_root), ""))
+        alternatives.append(f"{root_prefix}(?:{'|'.join(relative_patterns)})")
+    return "|".join(alternatives) or _NEVER_MATCHING_REGEX
@@ -7,57 +7,117 @@ import pathlib
 
 import click
 
-from typing import Any
+from typing import Any, Optional, Tuple
 
-from mbed_build._internal.cmake_file import generate_mbed_config_cmake_file
+from mbed_build._internal.cmake_file import ConfigOutput, generate_toolchain_mbed_config_cmake_files
+from mbed_build._internal.mbed_tools.options import (
+    config_output_option,
+    jobs_option,
+    no_cache_option,
+    output_directory_option,
+    program_path_option,
+    rebuild_cache_option,
+    reproducible_option,
+    result_cache_option,
+    result_cache_size_option,
+)
+from mbed_build._internal.persistent_cache import clear_caches
+from mbed_build._internal.result_cache import ResultCache
 from mbed_build._internal.write_files import write_file
 
 
 @click.command(
     help="Generate an Mbed OS config CMake file and write it to a .mbedbuild folder in the program directory."
 )
-@click.option(
-    "-o",
-    "--output-directory",
-    type=click.Path(),
-    default=".",
-    help=(
+@output_directory_option(
+    (
         "Destination for the generated .mbedbuild/mbed_config.cmake file containing configuration parameters to build "
-        "Mbed OS. The default is the current working directory."
-    ),
+        "Mbed OS. If several toolchains are given, a .mbedbuild/<TOOLCHAIN>/mbed_config.cmake file is generated for "
+        "each of them. The default is the current working directory."
+    )
 )
 @click.option(
     "-t",
     "--toolchain",
     type=click.Choice(["ARM", "GCC_ARM"]),
+    multiple=True,
     required=True,
-    help="The toolchain you are using to build your app.",
+    help="The toolchain you are using to build your app. Can be given multiple times.",
 )
 @click.option("-m", "--mbed-target", required=True, help="A build target for an Mbed-enabled device, eg. K64F")
-@click.option(
-    "-p",
-    "--program-path",
-    type=click.Path(),
-    default=".",
-    help="Path to local Mbed program. By default is the current working directory.",
-)
-def configure(output_directory: Any, toolchain: str, mbed_target: str, program_path: str) -> None:
+@program_path_option
+@no_cache_option
+@rebuild_cache_option
+@jobs_option
+@config_output_option
+@reproducible_option
+@result_cache_option
+@result_cache_size_option
+def configure(
+    output_directory: Any,
+    toolchain: Tuple[str, ...],
+    mbed_target: str,
+    program_path: str,
+    no_cache: bool,
+    rebuild_cache: bool,
+    jobs: int,
+    config_output: str,
+    reproducible: bool,
+    result_cache_directory: Optional[str],
+    result_cache_size: int,
+) -> None:
     """Exports a mbed_config.cmake file to a .mbedbuild directory in the output path.
 
     The parameters set in the CMake file will be dependent on the combination of
     toolchain and Mbed target provided and these can then control which parts of
     Mbed OS are included in the build.
 
+    Files the configuration was assembled from are listed in a mbed_config.d depfile next to the CMake file,
+    and added to the CMAKE_CONFIGURE_DEPENDS directory property by it, so that configuration is only
+    regenerated when one of them changes.
+
+    Configuration is assembled once for all given toolchains. If more than one is given, the file for each
+    toolchain is written to a subdirectory of .mbedbuild named after it.
+
     This command will create the .mbedbuild directory at the output path if it doesn't
-    exist.
+    exist. Results of the program tree traversal are cached in this directory, so that following
+    runs only need to list directories which changed.
 
     Args:
         output_directory: the path where .mbedbuild/mbed_config.cmake will be written
-        toolchain: the toolchain you are using (eg. GCC_ARM, ARM)
+        toolchain: the toolchains you are using (eg. GCC_ARM, ARM)
         mbed_target: the target you are building for (eg. K64F)
         program_path: the path to the local Mbed program
+        no_cache: don't use data cached between runs
+        rebuild_cache: discard data cached by previous runs
+        jobs: the number of threads loading configuration files, 0 to choose it automatically
+        config_output: the way configuration is passed to the compiler, see `ConfigOutput`
+        reproducible: omit the build timestamp from generated files
+        result_cache_directory: the location of the cache of generated files, not used if None
+        result_cache_size: the maximum size of the result cache, in megabytes
     """
-    cmake_file_contents = generate_mbed_config_cmake_file(mbed_target.upper(), program_path, toolchain)
     output_directory = pathlib.Path(output_directory, ".mbedbuild")
-    write_file(output_directory, "mbed_config.cmake", cmake_file_contents)
+    result_cache = (
+        None
+        if result_cache_directory is None
+        else ResultCache(pathlib.Path(result_cache_directory), result_cache_size * 1024 * 1024)
+    )
+    cache_directory = None if no_cache else output_directory
+    if cache_directory is not None and rebuild_cache:
+        clear_caches(cache_directory)
+    toolchains = list(dict.fromkeys(toolchain))
+    cmake_files = generate_toolchain_mbed_config_cmake_files(
+        mbed_target.upper(),
+        program_path,
+        toolchains,
+        cache_directory,
+        jobs or None,
+        ConfigOutput(config_output),
+        reproducible,
+        result_cache,
+    )
+    for toolchain_name, files in cmake_files.items():
+        toolchain_output_directory = output_directory if len(cmake_files) == 1 else output_directory / toolchain_name
+        for file_name, file_contents in files.items():
+            write_file(toolchain_output_directory, file_name, file_contents)
     click.echo(f"mbed_config.cmake has been generated and written to '{str(output_directory.resolve())}'")
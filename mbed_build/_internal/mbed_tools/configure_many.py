@@ -0,0 +1,134 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Export mbed_config.cmake files for many targets command."""
+import pathlib
+
+import click
+
+from typing import Any, Optional, Tuple
+
+from mbed_build._internal.cmake_file import ConfigOutput, generate_mbed_config_cmake_files
+from mbed_build._internal.mbed_tools.options import (
+    config_output_option,
+    jobs_option,
+    no_cache_option,
+    output_directory_option,
+    program_path_option,
+    rebuild_cache_option,
+    reproducible_option,
+    result_cache_option,
+    result_cache_size_option,
+)
+from mbed_build._internal.persistent_cache import clear_caches
+from mbed_build._internal.result_cache import ResultCache
+from mbed_build._internal.write_files import write_file
+
+
+@click.command(
+    name="configure-many",
+    help=(
+        "Generate Mbed OS config CMake files for several targets and toolchains, traversing the program and "
+        "parsing its configuration files only once."
+    ),
+)
+@output_directory_option(
+    (
+        "Destination for the generated .mbedbuild/<TARGET>/<TOOLCHAIN>/mbed_config.cmake files. "
+        "The default is the current working directory."
+    )
+)
+@click.option(
+    "-t",
+    "--toolchain",
+    "toolchains",
+    type=click.Choice(["ARM", "GCC_ARM"]),
+    multiple=True,
+    required=True,
+    help="A toolchain you are using to build your app. Can be given multiple times.",
+)
+@click.option(
+    "-m",
+    "--mbed-target",
+    "mbed_targets",
+    multiple=True,
+    required=True,
+    help="A build target for an Mbed-enabled device, eg. K64F. Can be given multiple times.",
+)
+@program_path_option
+@no_cache_option
+@rebuild_cache_option
+@jobs_option
+@click.option(
+    "--processes",
+    type=click.IntRange(min=0),
+    default=1,
+    help=(
+        "Number of processes assembling configuration of different targets. "
+        "Use 0 to choose it based on the number of processors. The default is 1."
+    ),
+)
+@config_output_option
+@reproducible_option
+@result_cache_option
+@result_cache_size_option
+def configure_many(
+    output_directory: Any,
+    toolchains: Tuple[str, ...],
+    mbed_targets: Tuple[str, ...],
+    program_path: str,
+    no_cache: bool,
+    rebuild_cache: bool,
+    jobs: int,
+    processes: int,
+    config_output: str,
+    reproducible: bool,
+    result_cache_directory: Optional[str],
+    result_cache_size: int,
+) -> None:
+    """Exports mbed_config.cmake files for each combination of targets and toolchains.
+
+    Each file is written to a .mbedbuild/<TARGET>/<TOOLCHAIN> directory in the output path.
+    Data cached between runs is stored in the .mbedbuild directory, as by the configure command.
+
+    Args:
+        output_directory: the path where .mbedbuild directory will be created
+        toolchains: the toolchains you are using (eg. GCC_ARM, ARM)
+        mbed_targets: the targets you are building for (eg. K64F)
+        program_path: the path to the local Mbed program
+        no_cache: don't use data cached between runs
+        rebuild_cache: discard data cached by previous runs
+        jobs: the number of threads loading configuration files, 0 to choose it automatically
+        processes: the number of processes assembling configuration, 0 to choose it automatically
+        config_output: the way configuration is passed to the compiler, see `ConfigOutput`
+        reproducible: omit the build timestamp from generated files
+        result_cache_directory: the location of the cache of generated files, not used if None
+        result_cache_size: the maximum size of the result cache, in megabytes
+    """
+    output_directory = pathlib.Path(output_directory, ".mbedbuild")
+    result_cache = (
+        None
+        if result_cache_directory is None
+        else ResultCache(pathlib.Path(result_cache_directory), result_cache_size * 1024 * 1024)
+    )
+    cache_directory = None if no_cache else output_directory
+    if cache_directory is not None and rebuild_cache:
+        clear_caches(cache_directory)
+    cmake_files = generate_mbed_config_cmake_files(
+        [mbed_target.upper() for mbed_target in mbed_targets],
+        program_path,
+        toolchains,
+        cache_directory,
+        jobs or None,
+        processes or None,
+        ConfigOutput(config_output),
+        reproducible,
+        result_cache,
+    )
+    for (mbed_target, toolchain), files in cmake_files.items():
+        for file_name, file_contents in files.items():
+            write_file(output_directory / mbed_target / toolchain, file_name, file_contents)
+    click.echo(
+        f"{len(cmake_files)} mbed_config.cmake files have been generated and written to '{output_directory.resolve()}'"
+    )
@@ -0,0 +1,98 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Options shared by commands generating configuration."""
+from typing import Any, Callable
+
+import click
+
+from mbed_build._internal.cmake_file import ConfigOutput
+from mbed_build._internal.result_cache import DEFAULT_MAX_SIZE
+
+
+def output_directory_option(help_text: str) -> Callable[[Any], Any]:
+    """Return the -o option with given help, as each command lays out generated files differently."""
+    option: Callable[[Any], Any] = click.option(
+        "-o", "--output-directory", type=click.Path(), default=".", help=help_text
+    )
+    return option
+
+
+program_path_option = click.option(
+    "-p",
+    "--program-path",
+    type=click.Path(),
+    default=".",
+    help="Path to local Mbed program. By default is the current working directory.",
+)
+
+no_cache_option = click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Do not read or store data cached in the .mbedbuild directory between runs.",
+)
+
+rebuild_cache_option = click.option(
+    "--rebuild-cache",
+    is_flag=True,
+    default=False,
+    help="Discard data cached in the .mbedbuild directory by previous runs and cache it again from scratch.",
+)
+
+jobs_option = click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(min=0),
+    default=1,
+    help=(
+        "Number of threads loading configuration files, which speeds up loading from network file systems. "
+        "Use 0 to choose it based on the number of processors. The default is 1."
+    ),
+)
+
+config_output_option = click.option(
+    "--config-output",
+    type=click.Choice([config_output.value for config_output in ConfigOutput]),
+    default=ConfigOutput.DEFINITIONS.value,
+    help=(
+        "How configuration options and macros are passed to the compiler: as definitions added in "
+        "mbed_config.cmake, in an mbed_config.h header force-included by mbed_config.cmake, or in "
+        "headers of each namespace included by mbed_config.h (split-headers). The default is definitions."
+    ),
+)
+
+reproducible_option = click.option(
+    "--reproducible",
+    is_flag=True,
+    default=False,
+    help=(
+        "Omit the build timestamp, so generated files only change when the configuration changes and builds "
+        "aren't rerun after every configuration."
+    ),
+)
+
+result_cache_option = click.option(
+    "--result-cache",
+    "result_cache_directory",
+    type=click.Path(file_okay=False),
+    envvar="MBED_BUILD_RESULT_CACHE",
+    help=(
+        "Directory of a cache of generated files, keyed by a digest of everything they are generated from. "
+        "Files found in it are reused without assembling configuration. It can be shared by several machines "
+        "and concurrent runs. Only used with --reproducible. Can also be set by the MBED_BUILD_RESULT_CACHE "
+        "environment variable."
+    ),
+)
+
+result_cache_size_option = click.option(
+    "--result-cache-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_SIZE // (1024 * 1024),
+    envvar="MBED_BUILD_RESULT_CACHE_SIZE",
+    help=(
+        "Maximum size of the result cache in megabytes, least recently used files are evicted beyond it. "
+        f"The default is {DEFAULT_MAX_SIZE // (1024 * 1024)}."
+    ),
+)
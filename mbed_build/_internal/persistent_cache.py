@@ -0,0 +1,76 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Storage of data reused between runs, kept in files of a cache directory."""
+import logging
+import marshal
+import pathlib
+import time
+from typing import Any, Optional
+
+from mbed_build._internal.write_files import replace_file
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_SUFFIX = ".cache"
+
+_MAGIC = "mbed-build-cache"
+
+# Files modified this close to a run are not cached. Filesystem timestamps are coarse,
+# so a file could be changed again without its modification time changing.
+_RACY_MTIME_WINDOW_NS = 2_000_000_000
+
+
+def load_cache(cache_directory: pathlib.Path, name: str, version: int) -> Optional[Any]:
+    """Load data stored under given name in the cache directory.
+
+    Reading a cache is always safe: a missing, corrupt or incompatible cache file is treated as empty.
+
+    Args:
+        cache_directory: Directory containing cache files.
+        name: Name of the cache.
+        version: Version of the data layout expected by the caller. Data stored with a different version is ignored.
+
+    Returns:
+        Stored data or None if there is nothing usable in the cache.
+    """
+    cache_file = _cache_file_path(cache_directory, name)
+    try:
+        magic, stored_version, data = marshal.loads(cache_file.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError) as error:
+        logger.debug(f"Ignoring unreadable cache file '{cache_file}': {error}")
+        return None
+
+    if magic != _MAGIC or stored_version != version:
+        logger.debug(f"Ignoring cache file '{cache_file}' with incompatible version")
+        return None
+    return data
+
+
+def save_cache(cache_directory: pathlib.Path, name: str, version: int, data: Any) -> None:
+    """Store data under given name in the cache directory.
+
+    The cache file is replaced atomically, so concurrent readers never see partially written data. It gets the
+    permissions of any new file, so a cache directory shared by several users stays readable by all of them.
+    Data must only contain types supported by the `marshal` module.
+    """
+    cache_directory.mkdir(parents=True, exist_ok=True)
+    replace_file(_cache_file_path(cache_directory, name), marshal.dumps((_MAGIC, version, data)))
+
+
+def settled_mtime_limit() -> int:
+    """Return modification time, in nanoseconds, before which files can be safely validated by their timestamps."""
+    return int(time.time() * 1_000_000_000) - _RACY_MTIME_WINDOW_NS
+
+
+def clear_caches(cache_directory: pathlib.Path) -> None:
+    """Remove all cache files from the cache directory, forcing the next run to start from scratch."""
+    for cache_file in cache_directory.glob(f"*{CACHE_FILE_SUFFIX}"):
+        cache_file.unlink()
+
+
+def _cache_file_path(cache_directory: pathlib.Path, name: str) -> pathlib.Path:
+    return cache_directory / f"{name}{CACHE_FILE_SUFFIX}"
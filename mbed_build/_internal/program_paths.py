@@ -0,0 +1,57 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Locations of files defining an Mbed program."""
+import os
+import pathlib
+from dataclasses import dataclass
+from typing import Optional
+
+from mbed_project import MbedProgram
+
+
+@dataclass(frozen=True)
+class ProgramPaths:
+    """Locations of files defining an Mbed program, which don't depend on the directory it was found from.
+
+    Attributes:
+        root: Program root directory, containing the .mbed file.
+        app_config_file: Path to mbed_app.json in the program root, None if the program doesn't have one.
+        targets_json_file: Path to targets.json of the program's Mbed OS.
+    """
+
+    root: pathlib.Path
+    app_config_file: Optional[pathlib.Path]
+    targets_json_file: pathlib.Path
+
+    @classmethod
+    def from_directory(cls, directory: pathlib.Path) -> "ProgramPaths":
+        """Find the program containing the directory, which can be the program root or any of its subdirectories.
+
+        Raises:
+            ProgramNotFound: the directory isn't part of an Mbed program.
+            MbedOSNotFound: the program's Mbed OS is missing.
+        """
+        program = MbedProgram.from_existing(directory)
+        return cls(
+            root=program.files.mbed_file.parent,
+            app_config_file=program.files.app_config_file,
+            targets_json_file=pathlib.Path(program.mbed_os.targets_json_file),
+        )
+
+
+def relative_to_program_root(path: pathlib.Path, program_root: pathlib.Path) -> str:
+    """Return POSIX form of the path relative to the program root, or of the absolute path if it is outside of it.
+
+    Paths in this form don't depend on the location of the program, or on the working directory.
+    """
+    absolute_path = os.path.abspath(path)
+    absolute_root = os.path.abspath(program_root)
+    try:
+        is_in_root = os.path.commonpath([absolute_path, absolute_root]) == absolute_root
+    except ValueError:  # on different drives
+        is_in_root = False
+    if not is_in_root:
+        return pathlib.Path(absolute_path).as_posix()
+    return pathlib.Path(os.path.relpath(absolute_path, absolute_root)).as_posix()
@@ -0,0 +1,175 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Generated files stored under a digest of everything they were generated from, and reused by later runs.
+
+A result cache can be shared by concurrent runs, including runs on different machines if the cache directory
+is on shared storage. Only reproducible results can be cached, as the key doesn't cover the time of a run.
+"""
+import contextlib
+import hashlib
+import logging
+import os
+import pathlib
+import sys
+from typing import Any, Iterator, Optional
+
+import mbed_targets
+
+from mbed_build._version import __version__
+from mbed_build._internal.find_files import PROGRAM_FILE_NAMES, ProgramFileIndex
+from mbed_build._internal.persistent_cache import CACHE_FILE_SUFFIX, load_cache, save_cache
+from mbed_build._internal.program_paths import ProgramPaths, relative_to_program_root
+from mbed_build._internal.traversal_cache import TraversalCache
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+LOCK_FILE_NAME = "lock"
+
+
+class ResultCache:
+    """Results stored in a directory, keyed by `result_key`, and evicted least recently used first.
+
+    Each result is stored in its own file, which is replaced atomically, so results can be read without
+    locking. Storing and evicting results is serialised by a lock file, so concurrent writers don't evict
+    results of each other or exceed the size limit. A result's modification time is updated whenever it is
+    read, which makes it the most recently used.
+    """
+
+    def __init__(self, directory: pathlib.Path, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        """Initialise the cache.
+
+        Args:
+            directory: Location of stored results, created when the first result is stored.
+            max_size: Maximum size of stored results in bytes.
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return result stored under the key, or None if there is no such result."""
+        entry_directory = self._entry_directory(key)
+        data = load_cache(entry_directory, key, CACHE_VERSION)
+        if data is not None:
+            try:
+                os.utime(entry_directory / f"{key}{CACHE_FILE_SUFFIX}")
+            except OSError as error:
+                logger.debug(f"Could not mark result '{key}' as used: {error}")
+        return data
+
+    def put(self, key: str, data: Any) -> None:
+        """Store the result under the key, evicting least recently used results to keep the size limit.
+
+        Data must only contain types supported by the `marshal` module.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with _locked(self.directory / LOCK_FILE_NAME):
+            save_cache(self._entry_directory(key), key, CACHE_VERSION, data)
+            self._evict()
+
+    def _entry_directory(self, key: str) -> pathlib.Path:
+        # Results are spread across subdirectories, as some file systems slow down with many files in a directory
+        return self.directory / key[:2]
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in self.directory.glob(f"*/*{CACHE_FILE_SUFFIX}"):
+            try:
+                stat_result = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat_result.st_mtime_ns, stat_result.st_size, entry))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry in sorted(entries):
+            if size <= self.max_size:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                entry.unlink()
+            size -= entry_size
+
+
+def hash_program_inputs(
+    program_path: pathlib.Path, program_paths: ProgramPaths, cache_directory: Optional[pathlib.Path] = None
+) -> bytes:
+    """Return digest of paths and contents of all files configuration of the program can be assembled from.
+
+    The whole program tree is traversed, so the digest covers configuration files of every target: targets.json,
+    and all .mbedignore, mbed_lib.json and mbed_app.json files. Files are only hashed, not parsed. Paths of all
+    traversed directories are covered as well, as generated files list them as inputs.
+
+    Paths are hashed relative to the program root, so copies of a program in different locations share results.
+    Results stored under the digest must not depend on the location of the program for that reason. Paths outside
+    of the program root are hashed as they are.
+
+    Args:
+        program_path: Location of the traversed directory, which is the program root or one of its subdirectories.
+        program_paths: Locations of files defining the program.
+        cache_directory: Optional location of directory listings cached between runs, see `TraversalCache`.
+    """
+    traversal_cache = None if cache_directory is None else TraversalCache.load(cache_directory)
+    program_files = ProgramFileIndex.from_directory(program_path, traversal_cache=traversal_cache)
+    if traversal_cache is not None and cache_directory is not None:
+        traversal_cache.save(cache_directory)
+
+    input_files = [program_paths.targets_json_file]
+    for file_name in PROGRAM_FILE_NAMES:
+        input_files.extend(program_files.get(file_name))
+
+    digest = hashlib.sha256()
+    for input_file in input_files:
+        digest.update(relative_to_program_root(input_file, program_paths.root).encode() + b"\0")
+        try:
+            digest.update(hashlib.sha256(input_file.read_bytes()).digest())
+        except FileNotFoundError:
+            # Generating files fails without it, which is reported by the generation itself
+            digest.update(b"missing")
+    for directory in program_files.directories:
+        digest.update(relative_to_program_root(directory, program_paths.root).encode() + b"\0")
+    return digest.digest()
+
+
+def result_key(inputs_digest: bytes, *parameters: Any) -> str:
+    """Return key of a result generated from inputs with given digest, using given parameters.
+
+    Args:
+        inputs_digest: Digest of input files, see `hash_program_inputs`.
+        parameters: Values of parameters the result depends on, like target and toolchain names. They must
+            have a stable representation.
+    """
+    # Resolution of targets depends on mbed_targets, and rendering on this package
+    data = repr((__version__, mbed_targets.__version__, inputs_digest, parameters))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+@contextlib.contextmanager
+def _locked(lock_path: pathlib.Path) -> Iterator[None]:
+    """Hold an exclusive lock of the file, waiting until other processes release it."""
+    with open(lock_path, "a+b") as lock_file:
+        if sys.platform == "win32":
+            import msvcrt
+
+            lock_file.seek(0)
+            while True:
+                try:
+                    # Retries for about 10 seconds before failing
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    logger.debug(f"Still waiting for lock '{lock_path}'")
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,99 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Targets resolved from targets.json, remembered within a process and between runs.
+
+Resolving a target merges its whole inheritance chain from targets.json, which is large. A target is resolved
+once per process, and once per contents of targets.json when a cache directory is given.
+"""
+import dataclasses
+import hashlib
+import logging
+import pathlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import mbed_targets
+from mbed_targets import Target
+
+from mbed_build._internal.persistent_cache import load_cache, save_cache
+from mbed_build._internal.program_paths import ProgramPaths
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = "targets"
+CACHE_VERSION = 1
+
+# Targets resolved by this process, keyed by targets.json path, its modification time and size, and target name.
+_resolved_targets: Dict[Tuple[str, int, int, str], Target] = {}
+
+
+def get_target(name: str, program_path: pathlib.Path, cache_directory: Optional[pathlib.Path] = None) -> Target:
+    """Return the Target of given name, as defined in targets.json of the program's Mbed OS.
+
+    Args:
+        name: Name of the target.
+        program_path: Path to the Mbed program.
+        cache_directory: Optional location of data cached between runs. Targets are only remembered by the
+            process if not given.
+
+    Raises:
+        TargetError: an error has occurred while resolving the target.
+    """
+    return get_targets([name], program_path, cache_directory)[name]
+
+
+def get_targets(
+    names: Iterable[str], program_path: pathlib.Path, cache_directory: Optional[pathlib.Path] = None
+) -> Dict[str, Target]:
+    """Return Targets of given names, keyed by name, reading and writing the cache directory only once.
+
+    See `get_target`.
+    """
+    names = list(names)
+    targets_json_file = ProgramPaths.from_directory(program_path).targets_json_file
+    try:
+        stat_result = targets_json_file.stat()
+    except FileNotFoundError:
+        # Let mbed_targets report the missing file
+        return {name: Target.by_name(name, str(targets_json_file)) for name in names}
+
+    key = (str(targets_json_file.resolve()), stat_result.st_mtime_ns, stat_result.st_size)
+    unresolved_names = [name for name in dict.fromkeys(names) if key + (name,) not in _resolved_targets]
+    if unresolved_names:
+        if cache_directory is None:
+            resolved_targets = {name: Target.by_name(name, str(targets_json_file)) for name in unresolved_names}
+        else:
+            resolved_targets = _get_stored_targets(unresolved_names, targets_json_file, cache_directory)
+        for name, target in resolved_targets.items():
+            _resolved_targets[key + (name,)] = target
+    return {name: _resolved_targets[key + (name,)] for name in names}
+
+
+def _get_stored_targets(
+    names: List[str], targets_json_file: pathlib.Path, cache_directory: pathlib.Path
+) -> Dict[str, Target]:
+    # Resolution also depends on the mbed_targets version, so it identifies stored targets as well
+    digest = hashlib.sha256(targets_json_file.read_bytes()).digest()
+    data = load_cache(cache_directory, CACHE_NAME, CACHE_VERSION)
+    if not isinstance(data, dict) or data.get("key") != (digest, mbed_targets.__version__):
+        data = {"key": (digest, mbed_targets.__version__), "targets": {}}
+
+    targets = {}
+    modified = False
+    for name in names:
+        attributes = data["targets"].get(name)
+        if attributes is not None:
+            try:
+                targets[name] = Target(**attributes)
+                continue
+            except TypeError as error:
+                logger.debug(f"Ignoring stored target '{name}': {error}")
+
+        targets[name] = Target.by_name(name, str(targets_json_file))
+        data["targets"][name] = dataclasses.asdict(targets[name])
+        modified = True
+
+    if modified:
+        save_cache(cache_directory, CACHE_NAME, CACHE_VERSION, data)
+    return targets
@@ -0,0 +1,126 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+"""Directory listings remembered between traversals of a program tree."""
+import os
+import pathlib
+from typing import Dict, List, Set, Tuple
+
+from mbed_build._internal.persistent_cache import load_cache, save_cache, settled_mtime_limit
+
+# Name, whether it is a directory and whether it is a file.
+DirectoryEntry = Tuple[str, bool, bool]
+
+CACHE_NAME = "traversal"
+CACHE_VERSION = 1
+
+
+def scan_directory(directory: pathlib.Path) -> List[DirectoryEntry]:
+    """List directory entries, reusing the file type information returned by `os.scandir`."""
+    with os.scandir(directory) as iterator:
+        return [(entry.name, entry.is_dir(), entry.is_file()) for entry in iterator]
+
+
+def read_mbedignore_lines(mbedignore_path: pathlib.Path) -> List[str]:
+    """Return lines of .mbedignore file which contain patterns."""
+    lines = mbedignore_path.read_text().splitlines()
+    return [line for line in lines if line.strip() and not line.startswith("#")]
+
+
+class TraversalCache:
+    """Directory listings and .mbedignore patterns remembered between traversals.
+
+    A directory listing is only reused while the modification time of the directory is unchanged,
+    which is the case as long as no entry was added, removed or renamed in it. As file contents don't
+    affect the directory modification time, .mbedignore patterns are validated against the
+    modification time and size of the .mbedignore file itself.
+
+    With the cache, traversing an unchanged tree costs a single `stat` call per directory.
+
+    Entries are keyed by absolute path, so they don't depend on the working directory of a run. Only entries
+    used since the cache was loaded are stored, so entries of removed or renamed paths don't accumulate.
+    """
+
+    def __init__(
+        self,
+        directories: Dict[str, Tuple[int, List[DirectoryEntry]]],
+        mbedignores: Dict[str, Tuple[int, int, List[str]]],
+    ) -> None:
+        """Initialise the cache with previously stored data.
+
+        Args:
+            directories: Modification time and entries, keyed by absolute directory path.
+            mbedignores: Modification time, size and pattern lines, keyed by absolute .mbedignore file path.
+        """
+        self._directories = directories
+        self._mbedignores = mbedignores
+        self._used_directories: Set[str] = set()
+        self._used_mbedignores: Set[str] = set()
+        self._modified = False
+        self._settled_mtime_limit = settled_mtime_limit()
+
+    @classmethod
+    def empty(cls) -> "TraversalCache":
+        """Return a cache without any data."""
+        return cls(directories={}, mbedignores={})
+
+    @classmethod
+    def load(cls, cache_directory: pathlib.Path) -> "TraversalCache":
+        """Return cache stored in the cache directory, or an empty one if nothing usable is stored."""
+        data = load_cache(cache_directory, CACHE_NAME, CACHE_VERSION)
+        if data is None:
+            return cls.empty()
+        directories, mbedignores = data
+        return cls(directories=directories, mbedignores=mbedignores)
+
+    def save(self, cache_directory: pathlib.Path) -> None:
+        """Store entries used since the cache was loaded in the cache directory, if anything changed."""
+        directories = {key: entry for key, entry in self._directories.items() if key in self._used_directories}
+        mbedignores = {key: entry for key, entry in self._mbedignores.items() if key in self._used_mbedignores}
+        if len(directories) != len(self._directories) or len(mbedignores) != len(self._mbedignores):
+            self._directories = directories
+            self._mbedignores = mbedignores
+            self._modified = True
+        if self._modified:
+            save_cache(cache_directory, CACHE_NAME, CACHE_VERSION, (self._directories, self._mbedignores))
+            self._modified = False
+
+    def list_directory(self, directory: pathlib.Path) -> List[DirectoryEntry]:
+        """Return directory entries, listing the directory only if it changed since it was cached."""
+        key = os.path.abspath(directory)
+        self._used_directories.add(key)
+        mtime_ns = os.stat(key).st_mtime_ns
+        cached = self._directories.get(key)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        entries = scan_directory(directory)
+        if self._is_settled(mtime_ns):
+            self._directories[key] = (mtime_ns, entries)
+            self._modified = True
+        elif cached is not None:
+            del self._directories[key]
+            self._modified = True
+        return entries
+
+    def read_mbedignore(self, mbedignore_path: pathlib.Path) -> List[str]:
+        """Return pattern lines of .mbedignore file, reading the file only if it changed since it was cached."""
+        key = os.path.abspath(mbedignore_path)
+        self._used_mbedignores.add(key)
+        stat_result = os.stat(key)
+        cached = self._mbedignores.get(key)
+        if cached is not None and cached[:2] == (stat_result.st_mtime_ns, stat_result.st_size):
+            return cached[2]
+
+        lines = read_mbedignore_lines(mbedignore_path)
+        if self._is_settled(stat_result.st_mtime_ns):
+            self._mbedignores[key] = (stat_result.st_mtime_ns, stat_result.st_size, lines)
+            self._modified = True
+        elif cached is not None:
+            del self._mbedignores[key]
+            self._modified = True
+        return lines
+
+    def _is_settled(self, mtime_ns: int) -> bool:
+        return mtime_ns < self._settled_mtime_limit
@@ -3,18 +3,26 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 """Writes out files to specified locations."""
+import os
 import pathlib
+import secrets
+
 from mbed_build.exceptions import InvalidExportOutputDirectory
 
 
-def write_file(output_directory: pathlib.Path, file_name: str, file_contents: str) -> None:
+def write_file(output_directory: pathlib.Path, file_name: str, file_contents: str) -> bool:
     """Writes out a file to a directory.
 
-    If the intermediate directories to the output directory don't exist,
-    this function will create them.
+    If the intermediate directories to the output directory, or to the file if its name
+    is a relative path, don't exist, this function will create them.
 
     This function will overwrite any existing file of the same name in the
-    output directory.
+    output directory, unless it already has the same contents. Unchanged files keep
+    their modification time, so build tools don't rebuild what depends on them.
+    Files are replaced atomically, so concurrent builds never read a partially written file.
+
+    Returns:
+        True if the file was written.
 
     Raises:
         InvalidExportOutputDirectory: it's not possible to export to the output directory provided
@@ -22,6 +30,39 @@ def write_file(output_directory: pathlib.Path, file_name: str, file_contents: st
     if output_directory.is_file():
         raise InvalidExportOutputDirectory("Output directory cannot be a path to a file.")
 
-    output_directory.mkdir(parents=True, exist_ok=True)
     output_file = output_directory.joinpath(file_name)
-    output_file.write_text(file_contents)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    data = file_contents.encode("utf-8")
+    try:
+        if output_file.stat().st_size == len(data) and output_file.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+
+    replace_file(output_file, data)
+    return True
+
+
+def replace_file(path: pathlib.Path, data: bytes) -> None:
+    """Replace the file with one containing given data, atomically, so readers never see a partially written file.
+
+    The data is written to a temporary file next to the replaced one first. Unlike files created by
+    `tempfile.mkstemp`, which are only accessible by their owner, it gets the permissions of any new file,
+    as allowed by the umask.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        temporary_path = path.with_name(f".{path.name}.{secrets.token_hex(4)}")
+        try:
+            file_descriptor = os.open(temporary_path, flags, 0o666)
+            break
+        except FileExistsError:
+            continue
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as temporary_file:
+            temporary_file.write(data)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
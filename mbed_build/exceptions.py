@@ -12,3 +12,11 @@ class MbedBuildError(ToolsError):
 
 class InvalidExportOutputDirectory(MbedBuildError):
     """It is not possible to export to the provided output directory."""
+
+
+class ConfigurationCycle(MbedBuildError):
+    """Configuration files keep enabling and disabling each other, so the configuration never settles."""
+
+
+class ConfigurationPassLimitExceeded(MbedBuildError):
+    """Configuration didn't settle within the allowed number of assembly passes."""
@@ -4,6 +4,8 @@
 #
 """Integration with https://github.com/ARMmbed/mbed-tools."""
 from mbed_build._internal.mbed_tools.configure import configure
+from mbed_build._internal.mbed_tools.configure_many import configure_many
 
 
 configure = configure
+configure_many = configure_many
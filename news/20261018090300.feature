@@ -0,0 +1 @@
+Cache the program tree traversal in the .mbedbuild directory, so that configure only lists directories which changed since the previous run. Use --no-cache to disable it and --rebuild-cache to start from scratch.
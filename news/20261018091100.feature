@@ -0,0 +1 @@
+Add --jobs option to configure, loading configuration files with a pool of threads.
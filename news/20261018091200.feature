@@ -0,0 +1 @@
+Decode configuration files with orjson or ujson when installed.
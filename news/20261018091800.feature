@@ -0,0 +1 @@
+Targets resolved from targets.json are reused within a run and cached between runs, keyed by the contents of targets.json.
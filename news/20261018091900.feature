@@ -0,0 +1 @@
+Add configure-many command, which generates mbed_config.cmake files for many targets and toolchains, traversing the program and parsing its configuration files once.
@@ -0,0 +1 @@
+configure accepts several toolchains, rendering a file for each of them from a single assembled configuration.
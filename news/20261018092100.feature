@@ -0,0 +1 @@
+Add --config-output header mode to configure commands, which defines configuration options and macros in a force-included mbed_config.h rather than on the compiler command line.
@@ -0,0 +1 @@
+Add split-headers config output, defining options of each namespace in their own header.
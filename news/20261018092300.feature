@@ -0,0 +1 @@
+Add --reproducible option omitting the build timestamp, and only replace generated files atomically when their contents change.
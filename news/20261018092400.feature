@@ -0,0 +1 @@
+Record files the configuration was assembled from in an mbed_config.d depfile and the CMAKE_CONFIGURE_DEPENDS property.
@@ -0,0 +1 @@
+Add a result cache of generated files, reused by configure and configure-many runs with identical inputs.
@@ -0,0 +1 @@
+Results in the result cache are shared by copies of a program in different locations.
@@ -8,12 +8,15 @@ from tempfile import TemporaryDirectory
 from unittest import TestCase, mock
 
 from mbed_build._internal.config.assemble_build_config import (
+    ProgramConfigFiles,
     _assemble_config_from_sources_and_lib_files,
     assemble_config,
 )
 from mbed_build._internal.config.config import Config
-from mbed_build._internal.find_files import find_files
-from mbed_build._internal.config.source import Source
+from mbed_build._internal.config.incremental_assembly import DEFAULT_MAX_PASSES
+from mbed_build._internal.find_files import ProgramFileIndex, find_files
+from mbed_build._internal import program_paths
+from mbed_build._internal.config.source import ConfigFile, Source
 from tests._internal.config.factories import SourceFactory
 
 
@@ -27,28 +30,113 @@ def create_files(directory, files):
     return created_files
 
 
-@mock.patch("mbed_build._internal.config.assemble_build_config.MbedProgram", autospec=True)
+@mock.patch("mbed_build._internal.config.assemble_build_config.ProgramPaths", autospec=True)
+@mock.patch("mbed_build._internal.config.assemble_build_config.ConfigFileCache", autospec=True)
+@mock.patch("mbed_build._internal.config.assemble_build_config.CumulativeData", autospec=True)
 @mock.patch("mbed_build._internal.config.assemble_build_config.Source", autospec=True)
-@mock.patch("mbed_build._internal.config.assemble_build_config.find_files", autospec=True)
+@mock.patch("mbed_build._internal.config.assemble_build_config.ProgramFileIndex", autospec=True)
 @mock.patch(
     "mbed_build._internal.config.assemble_build_config._assemble_config_from_sources_and_lib_files", autospec=True
 )
 class TestAssembleConfig(TestCase):
     def test_calls_collaborator_with_source_and_file_paths(
-        self, _assemble_config_from_sources_and_lib_files, find_files, Source, MbedProgram,
+        self,
+        _assemble_config_from_sources_and_lib_files,
+        ProgramFileIndex,
+        Source,
+        CumulativeData,
+        ConfigFileCache,
+        ProgramPaths,
     ):
         mbed_target = "K64F"
         mbed_program_directory = Path("foo")
-        program = mock.Mock()
-        MbedProgram.from_existing.return_value = program
+        program_files = ProgramFileIndex.from_directory.return_value
 
         subject = assemble_config(mbed_target, mbed_program_directory)
 
         self.assertEqual(subject, _assemble_config_from_sources_and_lib_files.return_value)
         _assemble_config_from_sources_and_lib_files.assert_called_once_with(
-            Source.from_target.return_value, find_files.return_value, program.files.app_config_file
+            Source.from_target.return_value,
+            program_files.get.return_value,
+            ProgramPaths.from_directory.return_value.app_config_file,
+            program_files,
+            ConfigFileCache.return_value,
+            mock.ANY,
+            DEFAULT_MAX_PASSES,
         )
-        find_files.assert_called_once_with("mbed_lib.json", mbed_program_directory)
+        target_data = CumulativeData.from_sources.return_value
+        ProgramFileIndex.from_directory.assert_called_once_with(
+            mbed_program_directory,
+            traversal_cache=None,
+            allowed_label_values={
+                "TARGET": target_data.labels,
+                "FEATURE": target_data.features,
+                "COMPONENT": target_data.components,
+            },
+        )
+        program_files.get.assert_any_call("mbed_lib.json")
+        ProgramPaths.from_directory.assert_called_once_with(mbed_program_directory)
+        ConfigFileCache.assert_called_once_with()
+        Source.from_target.assert_called_once_with(mbed_target, mbed_program_directory, None)
+
+    @mock.patch("mbed_build._internal.config.assemble_build_config.TraversalCache", autospec=True)
+    def test_uses_caches_stored_in_cache_directory(
+        self,
+        TraversalCache,
+        _assemble_config_from_sources_and_lib_files,
+        ProgramFileIndex,
+        Source,
+        CumulativeData,
+        ConfigFileCache,
+        ProgramPaths,
+    ):
+        cache_directory = Path("foo", ".mbedbuild")
+
+        assemble_config("K64F", Path("foo"), cache_directory)
+
+        TraversalCache.load.assert_called_once_with(cache_directory)
+        TraversalCache.load.return_value.save.assert_called_once_with(cache_directory)
+        ConfigFileCache.load.assert_called_once_with(cache_directory)
+        ConfigFileCache.load.return_value.save.assert_called_once_with(cache_directory)
+        self.assertEqual(_assemble_config_from_sources_and_lib_files.call_args[0][4], ConfigFileCache.load.return_value)
+
+    def test_records_input_files(
+        self,
+        _assemble_config_from_sources_and_lib_files,
+        ProgramFileIndex,
+        Source,
+        CumulativeData,
+        ConfigFileCache,
+        ProgramPaths,
+    ):
+        _assemble_config_from_sources_and_lib_files.return_value = Config()
+        ProgramPaths.from_directory.return_value = program_paths.ProgramPaths(
+            root=Path("foo"),
+            app_config_file=Path("foo", "mbed_app.json"),
+            targets_json_file=Path("foo", "mbed-os", "targets", "targets.json"),
+        )
+        program_files = ProgramFileIndex.from_directory.return_value
+        program_files.get.side_effect = lambda file_name: {
+            ".mbedignore": [Path("foo", ".mbedignore")],
+            "mbed_lib.json": [Path("foo", "TARGET_A", "mbed_lib.json"), Path("foo", "TARGET_B", "mbed_lib.json")],
+        }[file_name]
+        program_files.directories = [Path("foo"), Path("foo", "TARGET_A")]
+
+        subject = assemble_config("K64F", Path("foo"))
+
+        self.assertEqual(
+            subject.input_files,
+            [
+                Path("foo", "mbed-os", "targets", "targets.json"),
+                Path("foo", ".mbedignore"),
+                Path("foo", "TARGET_A", "mbed_lib.json"),
+                Path("foo", "TARGET_B", "mbed_lib.json"),
+                Path("foo", "mbed_app.json"),
+                Path("foo"),
+                Path("foo", "TARGET_A"),
+            ],
+        )
+        ProgramPaths.from_directory.assert_called_once_with(Path("foo"))
 
 
 class TestAssembleConfigFromSourcesAndLibFiles(TestCase):
@@ -106,3 +194,172 @@ class TestAssembleConfigFromSourcesAndLibFiles(TestCase):
             expected_config = Config.from_sources([target_source] + mbed_lib_sources + [mbed_app_source])
 
             self.assertEqual(subject, expected_config)
+
+            program_files = ProgramFileIndex.from_directory(
+                Path(directory), allowed_label_values={"TARGET": ["A"], "FEATURE": [], "COMPONENT": []}
+            )
+            self.assertEqual(len(program_files.get("mbed_lib.json")), 1)
+
+            subject = _assemble_config_from_sources_and_lib_files(
+                target_source, program_files.get("mbed_lib.json"), created_mbed_app_file, program_files
+            )
+
+            self.assertEqual(subject, expected_config)
+
+    @mock.patch("mbed_build._internal.config.config_file_cache.ConfigFile", wraps=ConfigFile)
+    def test_parses_each_file_once(self, ConfigFile):
+        target_source = SourceFactory(overrides={"target.labels": ["A"]})
+        mbed_lib_files = [
+            {
+                "path": Path("mbed_lib.json"),
+                "json_contents": {"name": "a", "target_overrides": {"A": {"target.features_add": ["RED"]}}},
+            },
+            {"path": Path("FEATURE_RED", "mbed_lib.json"), "json_contents": {"name": "red"}},
+        ]
+        mbed_app_file = {"path": Path("mbed_app.json"), "json_contents": {}}
+
+        with TemporaryDirectory() as directory:
+            created_mbed_lib_files = create_files(directory, mbed_lib_files)
+            created_mbed_app_file = create_files(directory, [mbed_app_file])[0]
+
+            _assemble_config_from_sources_and_lib_files(target_source, created_mbed_lib_files, created_mbed_app_file)
+
+        self.assertEqual([call[0][0] for call in ConfigFile.from_mbed_lib.call_args_list], created_mbed_lib_files)
+        ConfigFile.from_mbed_app.assert_called_once_with(created_mbed_app_file, {})
+
+
+@mock.patch("mbed_build._internal.config.assemble_build_config.ProgramPaths", autospec=True)
+class TestProgramConfigFiles(TestCase):
+    def test_assembles_config_of_many_targets_from_files_parsed_once(self, ProgramPaths):
+        mbed_lib_files = [
+            {
+                "path": Path("mbed_lib.json"),
+                "json_contents": {
+                    "name": "a",
+                    "config": {"number": 1},
+                    "target_overrides": {"B": {"target.features_add": ["RED"]}},
+                },
+            },
+            {"path": Path("TARGET_A", "mbed_lib.json"), "json_contents": {"name": "only-a", "macros": ["A_MACRO"]}},
+            {"path": Path("FEATURE_RED", "mbed_lib.json"), "json_contents": {"name": "red", "config": {"bool": True}}},
+        ]
+        mbed_app_file = {"path": Path("mbed_app.json"), "json_contents": {"target_overrides": {"B": {"a.number": 2}}}}
+
+        with TemporaryDirectory() as directory:
+            create_files(directory, mbed_lib_files)
+            create_files(directory, [mbed_app_file])
+            ProgramPaths.from_directory.side_effect = program_paths_in
+
+            program_config_files = ProgramConfigFiles.from_directory(Path(directory))
+
+            self.assertEqual(len(program_config_files.mbed_lib_files), 3)
+            self.assertEqual(program_config_files.config_files.parsed_count, 0)
+            for target_source in [
+                SourceFactory(overrides={"target.labels": ["A"]}),
+                SourceFactory(overrides={"target.labels": ["B"]}),
+            ]:
+                with self.subTest(target_source.overrides):
+                    self.assertEqual(
+                        program_config_files.assemble_config(target_source),
+                        assemble_config_with_program_index(target_source, Path(directory)),
+                    )
+            self.assertEqual(program_config_files.config_files.parsed_count, 4)
+
+    @mock.patch("mbed_build._internal.config.assemble_build_config.ConfigFileCache", autospec=True)
+    @mock.patch("mbed_build._internal.config.assemble_build_config.TraversalCache", autospec=True)
+    def test_uses_caches_stored_in_cache_directory(self, TraversalCache, ConfigFileCache, ProgramPaths):
+        with TemporaryDirectory() as directory:
+            cache_directory = Path(directory, ".mbedbuild")
+
+            subject = ProgramConfigFiles.from_directory(Path(directory), cache_directory)
+
+        TraversalCache.load.assert_called_once_with(cache_directory)
+        TraversalCache.load.return_value.save.assert_called_once_with(cache_directory)
+        ConfigFileCache.load.assert_called_once_with(cache_directory)
+        self.assertEqual(subject.config_files, ConfigFileCache.load.return_value)
+
+    def test_only_parses_files_enabled_by_assembled_target(self, ProgramPaths):
+        mbed_lib_files = [
+            {"path": Path("TARGET_A", "mbed_lib.json"), "json_contents": {"name": "only-a"}},
+            {"path": Path("TARGET_B", "mbed_lib.json"), "json_contents": {"config": {"missing-name": 1}}},
+        ]
+        with TemporaryDirectory() as directory:
+            create_files(directory, mbed_lib_files)
+            ProgramPaths.from_directory.side_effect = program_paths_in
+
+            program_config_files = ProgramConfigFiles.from_directory(Path(directory))
+            subject = program_config_files.assemble_config(SourceFactory(overrides={"target.labels": ["A"]}))
+
+            self.assertEqual(program_config_files.config_files.parsed_count, 1)
+            with self.assertRaises(KeyError):
+                program_config_files.assemble_config(SourceFactory(overrides={"target.labels": ["B"]}))
+
+        self.assertEqual(
+            subject.input_files[1:3],
+            [Path(directory, "TARGET_A", "mbed_lib.json"), Path(directory, "TARGET_B", "mbed_lib.json")],
+        )
+
+    def test_records_input_files_of_every_target(self, ProgramPaths):
+        mbed_lib_files = [
+            {"path": Path("TARGET_A", "mbed_lib.json"), "json_contents": {"name": "only-a"}},
+            {"path": Path("TARGET_B", "mbed_lib.json"), "json_contents": {"name": "only-b"}},
+        ]
+        with TemporaryDirectory() as directory:
+            created_mbed_lib_files = create_files(directory, mbed_lib_files)
+            mbedignore = Path(directory, ".mbedignore")
+            mbedignore.write_text("ignored/*")
+            Path(directory, ".mbedbuild").mkdir()
+            Path(directory, ".git", "objects").mkdir(parents=True)
+            Path(directory, "cmake_build", "CMakeFiles").mkdir(parents=True)
+            Path(directory, "cmake_build", "CMakeCache.txt").write_text("")
+            Path(directory, "ignored", "subdirectory").mkdir(parents=True)
+            ProgramPaths.from_directory.side_effect = program_paths_in
+
+            program_config_files = ProgramConfigFiles.from_directory(Path(directory))
+            subject = program_config_files.assemble_config(SourceFactory(overrides={"target.labels": ["A"]}))
+
+        self.assertEqual(
+            subject.input_files[:4], [Path(directory, "targets.json"), mbedignore] + created_mbed_lib_files
+        )
+        self.assertEqual(subject.input_files[4], Path(directory))
+        self.assertCountEqual(subject.input_files[5:], [Path(directory, "TARGET_A"), Path(directory, "TARGET_B")])
+        ProgramPaths.from_directory.assert_called_once_with(Path(directory))
+
+    def test_records_program_root_when_traversing_subdirectory(self, ProgramPaths):
+        with TemporaryDirectory() as directory:
+            Path(directory, "app").mkdir()
+            ProgramPaths.from_directory.side_effect = lambda _: program_paths_in(directory)
+
+            program_config_files = ProgramConfigFiles.from_directory(Path(directory, "app"))
+
+        self.assertEqual(
+            program_config_files.input_files,
+            [Path(directory, "targets.json"), Path(directory, "app"), Path(directory)],
+        )
+
+    def test_takes_mbed_app_json_from_program_root(self, ProgramPaths):
+        with TemporaryDirectory() as directory:
+            create_files(directory, [{"path": Path("mbed_app.json"), "json_contents": {"macros": ["ROOT_APP"]}}])
+            create_files(directory, [{"path": Path("app", "mbed_app.json"), "json_contents": {"macros": ["NESTED"]}}])
+            ProgramPaths.from_directory.side_effect = lambda _: program_paths_in(directory)
+
+            program_config_files = ProgramConfigFiles.from_directory(Path(directory, "app"))
+
+        self.assertEqual(program_config_files.mbed_app_file, Path(directory, "mbed_app.json"))
+        ProgramPaths.from_directory.assert_called_once_with(Path(directory, "app"))
+
+
+def program_paths_in(directory):
+    app_config_file = Path(directory, "mbed_app.json")
+    return program_paths.ProgramPaths(
+        root=Path(directory),
+        app_config_file=app_config_file if app_config_file.exists() else None,
+        targets_json_file=Path(directory, "targets.json"),
+    )
+
+
+def assemble_config_with_program_index(target_source, directory):
+    program_files = ProgramFileIndex.from_directory(directory)
+    return _assemble_config_from_sources_and_lib_files(
+        target_source, program_files.get("mbed_lib.json"), program_paths_in(directory).app_config_file,
+    )
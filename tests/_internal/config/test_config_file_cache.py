@@ -0,0 +1,238 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import json
+import os
+import pathlib
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+from mbed_build._internal.config.config_file_cache import ConfigFileCache, LoadExecutors, load_executors
+from mbed_build._internal.config.source import ConfigFile, decode_json_file
+
+
+def make_settled(path):
+    settled_time = 1_500_000_000
+    os.utime(path, (settled_time, settled_time))
+
+
+def write_json(path, contents):
+    path.write_text(json.dumps(contents))
+    make_settled(path)
+
+
+@mock.patch("mbed_build._internal.config.config_file_cache.ConfigFile", wraps=ConfigFile)
+class TestConfigFileCache(TestCase):
+    def test_parses_mbed_lib_once(self, ConfigFile):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "mbed_lib.json")
+            write_json(path, {"name": "foo", "config": {"bar": 1}})
+            cache = ConfigFileCache()
+
+            first = cache.get_mbed_lib(path)
+            second = cache.get_mbed_lib(path)
+
+        self.assertIs(first, second)
+        self.assertEqual(first.config, {"foo.bar": 1})
+        ConfigFile.from_mbed_lib.assert_called_once_with(path, {"name": "foo", "config": {"bar": 1}})
+
+    def test_parses_mbed_app_once(self, ConfigFile):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "mbed_app.json")
+            write_json(path, {"config": {"bar": 1}})
+            cache = ConfigFileCache()
+
+            first = cache.get_mbed_app(path)
+            second = cache.get_mbed_app(path)
+
+        self.assertIs(first, second)
+        self.assertEqual(first.config, {"app.bar": 1})
+        ConfigFile.from_mbed_app.assert_called_once_with(path, {"config": {"bar": 1}})
+
+    def test_parses_mbed_libs_concurrently_keeping_their_order(self, ConfigFile):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for index in range(10):
+                path = pathlib.Path(directory, f"lib{index}", "mbed_lib.json")
+                path.parent.mkdir()
+                write_json(path, {"name": f"lib{index}"})
+                paths.append(path)
+            cache = ConfigFileCache()
+            first_parsed = cache.get_mbed_lib(paths[3])
+
+            with load_executors(jobs=4) as executors:
+                subject = cache.get_mbed_libs(reversed(paths), executors)
+
+        self.assertEqual([config_file.namespace for config_file in subject], [f"lib{i}" for i in reversed(range(10))])
+        self.assertIs(subject[6], first_parsed)
+        self.assertEqual(ConfigFile.from_mbed_lib.call_count, 10)
+
+    def test_decodes_files_with_decoder(self, ConfigFile):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = [pathlib.Path(directory, "mbed_lib.json"), pathlib.Path(directory, "other_mbed_lib.json")]
+            for path in paths:
+                write_json(path, {"name": path.stem})
+            decoder = mock.Mock(wraps=ThreadPoolExecutor(1))
+
+            with ThreadPoolExecutor(2) as reader:
+                subject = ConfigFileCache().get_mbed_libs(paths, LoadExecutors(reader=reader, decoder=decoder))
+
+        self.assertEqual([config_file.namespace for config_file in subject], ["mbed_lib", "other_mbed_lib"])
+        decoder.map.assert_called_once()
+        decoder.submit.assert_not_called()
+
+    def test_pickled_cache_keeps_parsed_files(self, ConfigFile):
+        with tempfile.TemporaryDirectory() as directory:
+            mbed_lib_path = pathlib.Path(directory, "mbed_lib.json")
+            mbed_app_path = pathlib.Path(directory, "mbed_app.json")
+            write_json(mbed_lib_path, {"name": "foo"})
+            write_json(mbed_app_path, {})
+            cache = ConfigFileCache()
+            mbed_lib = cache.get_mbed_lib(mbed_lib_path)
+            mbed_app = cache.get_mbed_app(mbed_app_path)
+
+            unpickled = pickle.loads(pickle.dumps(cache))
+
+            self.assertEqual(unpickled.get_mbed_lib(mbed_lib_path), mbed_lib)
+            self.assertEqual(unpickled.get_mbed_app(mbed_app_path), mbed_app)
+            self.assertEqual(unpickled.parsed_count, 0)
+
+
+class TestLoadExecutors(TestCase):
+    def test_loads_sequentially_with_single_job(self):
+        with load_executors(jobs=1) as executors:
+            self.assertIsNone(executors)
+
+    def test_creates_process_pool_decoder(self):
+        with load_executors(jobs=1, decode_processes=2) as executors:
+            self.assertIsNotNone(executors.decoder)
+            self.assertEqual(executors.decoder.submit(sum, [1, 2]).result(), 3)
+
+
+@mock.patch("mbed_build._internal.config.config_file_cache.decode_json_file", wraps=decode_json_file)
+class TestPersistentConfigFileCache(TestCase):
+    def test_reuses_decoded_contents_of_unchanged_file(self, decode_json_file):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "mbed_lib.json")
+            write_json(path, {"name": "foo", "config": {"bar": 1}})
+            cache_directory = pathlib.Path(directory, ".mbedbuild")
+            cache = ConfigFileCache.load(cache_directory)
+            cache.get_mbed_lib(path)
+            cache.save(cache_directory)
+            decode_json_file.reset_mock()
+
+            subject = ConfigFileCache.load(cache_directory).get_mbed_lib(path)
+
+        decode_json_file.assert_not_called()
+        self.assertEqual(subject.config, {"foo.bar": 1})
+
+    def test_decodes_changed_file_again(self, decode_json_file):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "mbed_lib.json")
+            write_json(path, {"name": "foo", "config": {"bar": 1}})
+            cache_directory = pathlib.Path(directory, ".mbedbuild")
+            cache = ConfigFileCache.load(cache_directory)
+            cache.get_mbed_lib(path)
+            cache.save(cache_directory)
+            path.write_text(json.dumps({"name": "foo", "config": {"bar": 123}}))
+            os.utime(path, (1_600_000_000, 1_600_000_000))
+
+            subject = ConfigFileCache.load(cache_directory).get_mbed_lib(path)
+
+        self.assertEqual(subject.config, {"foo.bar": 123})
+
+    def test_verifies_contents_when_timestamp_and_size_are_unchanged(self, decode_json_file):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "mbed_lib.json")
+            write_json(path, {"name": "foo", "config": {"bar": 1}})
+            cache_directory = pathlib.Path(directory, ".mbedbuild")
+            cache = ConfigFileCache.load(cache_directory, verify_contents=True)
+            cache.get_mbed_lib(path)
+            cache.save(cache_directory)
+            write_json(path, {"name": "foo", "config": {"bar": 2}})
+
+            unverified = ConfigFileCache.load(cache_directory).get_mbed_lib(path)
+            verified = ConfigFileCache.load(cache_directory, verify_contents=True).get_mbed_lib(path)
+
+        self.assertEqual(unverified.config, {"foo.bar": 2}, "Entries stored with a digest need verification")
+        self.assertEqual(verified.config, {"foo.bar": 2})
+
+    def test_does_not_store_recently_modified_file(self, decode_json_file):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "mbed_app.json")
+            path.write_text(json.dumps({"config": {"bar": 1}}))
+            cache_directory = pathlib.Path(directory, ".mbedbuild")
+            cache = ConfigFileCache.load(cache_directory)
+            cache.get_mbed_app(path)
+            cache.save(cache_directory)
+
+            self.assertFalse(cache_directory.exists())
+
+    def test_ignores_corrupt_cache(self, decode_json_file):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "mbed_app.json")
+            write_json(path, {"config": {"bar": 1}})
+            cache_directory = pathlib.Path(directory, ".mbedbuild")
+            cache_directory.mkdir()
+            pathlib.Path(cache_directory, "config_files.cache").write_bytes(b"\x00garbage")
+
+            subject = ConfigFileCache.load(cache_directory).get_mbed_app(path)
+
+        self.assertEqual(subject.config, {"app.bar": 1})
+
+    def test_reuses_decoded_contents_of_file_given_by_relative_path(self, decode_json_file):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory, "mbed_lib.json")
+            write_json(path, {"name": "foo", "config": {"bar": 1}})
+            cache_directory = pathlib.Path(directory, ".mbedbuild")
+            cache = ConfigFileCache.load(cache_directory)
+            cache.get_mbed_lib(path)
+            cache.save(cache_directory)
+            decode_json_file.reset_mock()
+
+            with mock.patch("mbed_build._internal.config.config_file_cache.os.getcwd", return_value=directory):
+                subject = ConfigFileCache.load(cache_directory).get_mbed_lib(pathlib.Path("mbed_lib.json"))
+
+        decode_json_file.assert_not_called()
+        self.assertEqual(subject.config, {"foo.bar": 1})
+
+    def test_stores_only_files_used_since_loaded(self, decode_json_file):
+        with tempfile.TemporaryDirectory() as directory:
+            kept, removed = pathlib.Path(directory, "kept.json"), pathlib.Path(directory, "removed.json")
+            write_json(kept, {"name": "kept"})
+            write_json(removed, {"name": "removed"})
+            cache_directory = pathlib.Path(directory, ".mbedbuild")
+            cache = ConfigFileCache.load(cache_directory)
+            cache.get_mbed_libs([kept, removed])
+            cache.save(cache_directory)
+
+            cache = ConfigFileCache.load(cache_directory)
+            cache.get_mbed_lib(kept)
+            cache.save(cache_directory)
+            decode_json_file.reset_mock()
+            ConfigFileCache.load(cache_directory).get_mbed_libs([kept, removed])
+
+        self.assertEqual(decode_json_file.call_args_list, [mock.call(removed, b'{"name": "removed"}')])
+
+    def test_stores_files_used_by_pickled_copy_once_added_back(self, decode_json_file):
+        with tempfile.TemporaryDirectory() as directory:
+            kept, used_by_copy = pathlib.Path(directory, "kept.json"), pathlib.Path(directory, "used_by_copy.json")
+            write_json(kept, {"name": "kept"})
+            write_json(used_by_copy, {"name": "used_by_copy"})
+            cache_directory = pathlib.Path(directory, ".mbedbuild")
+            cache = ConfigFileCache.load(cache_directory)
+            cache.get_mbed_lib(kept)
+            cache.save(cache_directory)
+
+            cache = ConfigFileCache.load(cache_directory)
+            copy = pickle.loads(pickle.dumps(cache))
+            copy.get_mbed_libs([kept, used_by_copy])
+            cache.add_decoded_files(copy.used_decoded_files())
+            cache.save(cache_directory)
+            decode_json_file.reset_mock()
+            ConfigFileCache.load(cache_directory).get_mbed_libs([kept, used_by_copy])
+
+        decode_json_file.assert_not_called()
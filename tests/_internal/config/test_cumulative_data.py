@@ -5,7 +5,11 @@
 from dataclasses import fields
 from unittest import TestCase
 
-from mbed_build._internal.config.cumulative_data import CumulativeData
+from mbed_build._internal.config.cumulative_data import (
+    CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE,
+    CumulativeData,
+    _extract_target_modifier_data,
+)
 from tests._internal.config.factories import SourceFactory
 
 
@@ -20,3 +24,20 @@ class TestCumulativeDataFromSources(TestCase):
                 config_cumulative_data = CumulativeData.from_sources([source_a, source_b, source_c])
 
                 self.assertEqual(getattr(config_cumulative_data, field.name), {"FOO", "BAZ"})
+
+
+class TestExtractTargetModifierData(TestCase):
+    def test_maps_each_cumulative_override_key_to_field_and_modifier(self):
+        for key in CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE:
+            with self.subTest(key):
+                name, modifier = _extract_target_modifier_data(key)
+
+                self.assertEqual(key, f"target.{name}_{modifier}" if modifier else f"target.{name}")
+
+        self.assertEqual(_extract_target_modifier_data("target.device_has_remove"), ("device_has", "remove"))
+
+    def test_raises_for_other_keys(self):
+        for key in ["target.features_extend", "features_add", "target.macros_add"]:
+            with self.subTest(key):
+                with self.assertRaises(ValueError):
+                    _extract_target_modifier_data(key)
@@ -0,0 +1,218 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import json
+import random
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, mock
+
+from mbed_build._internal.config.config import Config
+from mbed_build._internal.config.cumulative_data import CumulativeData
+from mbed_build._internal.config.incremental_assembly import IncrementalAssembly
+from mbed_build._internal.config.source import ConfigFile, Source
+from mbed_build._internal.find_files import LabelFilter, filter_files, find_files
+from mbed_build.exceptions import ConfigurationCycle, ConfigurationPassLimitExceeded
+from tests._internal.config.factories import SourceFactory
+
+
+def write_files(directory, files):
+    paths = []
+    for path, contents in files:
+        path = Path(directory, path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(contents))
+        paths.append(path)
+    return paths
+
+
+def assemble_from_scratch_in_each_pass(target_source, program_directory, mbed_app_file, max_passes):
+    """Reference algorithm, finding and rebuilding all Sources in each pass. Returns None if it doesn't settle.
+
+    Files are found and filtered with the original `find_files` and `LabelFilter`, independently of the indexes
+    used by `IncrementalAssembly`.
+    """
+    mbed_lib_files = find_files("mbed_lib.json", program_directory)
+    current_cumulative_data = CumulativeData.from_sources([target_source])
+    for _ in range(max_passes):
+        filters = (
+            LabelFilter("TARGET", current_cumulative_data.labels),
+            LabelFilter("FEATURE", current_cumulative_data.features),
+            LabelFilter("COMPONENT", current_cumulative_data.components),
+        )
+        filtered_files = filter_files(mbed_lib_files, filters)
+        all_sources = [target_source] + [
+            Source.from_mbed_lib(file, current_cumulative_data.labels) for file in filtered_files
+        ]
+        if mbed_app_file:
+            all_sources.append(Source.from_mbed_app(mbed_app_file, current_cumulative_data.labels))
+        previous_cumulative_data = current_cumulative_data
+        current_cumulative_data = CumulativeData.from_sources(all_sources)
+        if previous_cumulative_data == current_cumulative_data:
+            return Config.from_sources(all_sources)
+    return None
+
+
+def random_program(generator):
+    labels = ["A", "B", "C"]
+    names = ["RED", "GREEN", "BLUE"]
+    files = []
+    for index in range(12):
+        parts = [
+            generator.choice(["", f"TARGET_{generator.choice(labels)}"]),
+            generator.choice(["", f"FEATURE_{generator.choice(names)}"]),
+            generator.choice(["", f"COMPONENT_{generator.choice(names)}"]),
+        ]
+        path = Path(*[part for part in parts if part], f"lib{index}", "mbed_lib.json")
+        target_overrides = {}
+        for label in generator.sample(["*"] + labels, 2):
+            overrides = {"number": generator.randint(0, 100)}
+            key = generator.choice(
+                ["target.features_add", "target.features_remove", "target.components_add", "target.labels_add"]
+            )
+            overrides[key] = [generator.choice(labels if key == "target.labels_add" else names)]
+            target_overrides[label] = overrides
+        files.append((path, {"name": f"lib{index}", "config": {"number": 0}, "target_overrides": target_overrides}))
+    return files
+
+
+class TestIncrementalAssembly(TestCase):
+    def test_assembles_same_config_as_rebuilding_all_sources_in_each_pass(self):
+        target_source = SourceFactory(overrides={"target.labels": ["A"], "target.features": ["RED"]})
+        settled_programs = 0
+        for seed in range(40):
+            with self.subTest(seed=seed), TemporaryDirectory() as directory:
+                write_files(directory, random_program(random.Random(seed)))
+                mbed_app_file = write_files(
+                    directory, [("mbed_app.json", {"config": {"number": 0}, "target_overrides": {"B": {"number": 1}}})]
+                )[0]
+                # Found in the same order by the reference algorithm
+                mbed_lib_files = find_files("mbed_lib.json", Path(directory))
+
+                expected = assemble_from_scratch_in_each_pass(target_source, Path(directory), mbed_app_file, 20)
+                if expected is None:
+                    continue
+                settled_programs += 1
+
+                subject = IncrementalAssembly(target_source, mbed_lib_files, mbed_app_file).run()
+
+                self.assertEqual(subject, expected)
+
+        self.assertGreater(settled_programs, 20)
+
+    def test_disables_files_when_their_labels_are_removed(self):
+        target_source = SourceFactory(overrides={"target.labels": ["A"], "target.features": ["RED"]})
+        files = [
+            (
+                Path("FEATURE_RED", "mbed_lib.json"),
+                {"name": "red", "target_overrides": {"*": {"target.features_add": ["BLUE"]}}},
+            ),
+            (
+                Path("FEATURE_BLUE", "mbed_lib.json"),
+                {"name": "blue", "target_overrides": {"*": {"target.features_remove": ["RED"]}}},
+            ),
+        ]
+        with TemporaryDirectory() as directory:
+            mbed_lib_files = write_files(directory, files)
+            subject = IncrementalAssembly(target_source, mbed_lib_files)
+
+            subject.cumulative_data = subject.run_pass()
+            self.assertEqual(len(subject.sources()), 2)
+            subject.cumulative_data = subject.run_pass()
+            self.assertEqual(len(subject.sources()), 3)
+            subject.cumulative_data = subject.run_pass()
+
+            self.assertEqual([source.human_name for source in subject.sources()[1:]], [f"File: {mbed_lib_files[1]}"])
+
+    @mock.patch.object(ConfigFile, "to_source", autospec=True, side_effect=ConfigFile.to_source)
+    def test_only_rebuilds_sources_affected_by_changes(self, to_source):
+        target_source = SourceFactory(overrides={"target.labels": ["A"]})
+        files = [(Path(f"lib{index}", "mbed_lib.json"), {"name": f"lib{index}"}) for index in range(10)]
+        files += [
+            (
+                Path("lib_a", "mbed_lib.json"),
+                {"name": "lib_a", "target_overrides": {"A": {"target.labels_add": ["B"]}}},
+            ),
+            (
+                Path("lib_b", "mbed_lib.json"),
+                {"name": "lib_b", "target_overrides": {"B": {"target.features_add": ["RED"]}}},
+            ),
+            (Path("FEATURE_RED", "mbed_lib.json"), {"name": "red"}),
+        ]
+        with TemporaryDirectory() as directory:
+            mbed_lib_files = write_files(directory, files)
+
+            IncrementalAssembly(target_source, mbed_lib_files).run()
+
+        sourced_names = [call[0][0].namespace for call in to_source.call_args_list]
+        self.assertEqual(sourced_names.count("lib0"), 1)
+        self.assertEqual(sourced_names.count("lib_b"), 2, "Built again once label B is added")
+        self.assertEqual(sourced_names.count("red"), 1)
+
+    def test_reports_sources_causing_cycle(self):
+        target_source = SourceFactory(overrides={"target.labels": ["A"], "target.features": ["RED"]})
+        files = [
+            (Path("lib", "mbed_lib.json"), {"name": "lib"}),
+            (
+                Path("FEATURE_RED", "mbed_lib.json"),
+                {"name": "red", "target_overrides": {"*": {"target.features_add": ["BLUE"]}}},
+            ),
+            (
+                Path("FEATURE_BLUE", "mbed_lib.json"),
+                {"name": "blue", "target_overrides": {"*": {"target.features_remove": ["RED"]}}},
+            ),
+        ]
+        with TemporaryDirectory() as directory:
+            mbed_lib_files = write_files(directory, files)
+
+            with self.assertRaises(ConfigurationCycle) as context:
+                IncrementalAssembly(target_source, mbed_lib_files).run()
+
+        message = str(context.exception)
+        self.assertIn("features BLUE, RED", message)
+        self.assertIn(str(mbed_lib_files[1]), message)
+        self.assertIn(str(mbed_lib_files[2]), message)
+        self.assertNotIn(str(mbed_lib_files[0]), message)
+
+    def test_raises_when_pass_limit_is_exceeded(self):
+        target_source = SourceFactory(overrides={"target.features": ["F0"]})
+        files = [
+            (
+                Path(f"FEATURE_F{index}", "mbed_lib.json"),
+                {"name": f"f{index}", "target_overrides": {"*": {"target.features_add": [f"F{index + 1}"]}}},
+            )
+            for index in range(5)
+        ]
+        with TemporaryDirectory() as directory:
+            mbed_lib_files = write_files(directory, files)
+
+            with self.assertRaises(ConfigurationPassLimitExceeded):
+                IncrementalAssembly(target_source, mbed_lib_files).run(max_passes=3)
+            config = IncrementalAssembly(target_source, mbed_lib_files).run(max_passes=10)
+
+        self.assertEqual(len(config.options), 0)
+
+    def test_records_statistics_of_each_pass(self):
+        target_source = SourceFactory(overrides={"target.features": ["RED"]})
+        files = [
+            (Path("lib", "mbed_lib.json"), {"name": "lib"}),
+            (
+                Path("FEATURE_RED", "mbed_lib.json"),
+                {"name": "red", "target_overrides": {"*": {"target.features_add": ["BLUE"]}}},
+            ),
+            (Path("FEATURE_BLUE", "mbed_lib.json"), {"name": "blue"}),
+        ]
+        with TemporaryDirectory() as directory:
+            mbed_lib_files = write_files(directory, files)
+            subject = IncrementalAssembly(target_source, mbed_lib_files)
+
+            with self.assertLogs("mbed_build._internal.config.incremental_assembly", level="DEBUG") as logs:
+                subject.run()
+
+        self.assertEqual(
+            [(s.files_enabled, s.files_disabled, s.files_parsed, s.sources_built) for s in subject.statistics],
+            [(2, 0, 2, 2), (1, 0, 1, 1)],
+        )
+        self.assertTrue(all(s.duration > 0 for s in subject.statistics))
+        self.assertEqual(len(logs.output), 2)
@@ -0,0 +1,45 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import json
+from unittest import TestCase, mock
+
+from mbed_build._internal.config.json_backend import BACKENDS, DEFAULT_BACKEND, JsonBackend, find_backends, loads
+
+
+class TestFindBackends(TestCase):
+    def test_prefers_third_party_libraries(self):
+        with mock.patch.dict("sys.modules", {"orjson": None, "ujson": None}):
+            self.assertEqual(list(find_backends()), ["json"])
+
+        self.assertEqual(list(BACKENDS)[-1], "json")
+        self.assertIs(DEFAULT_BACKEND, next(iter(BACKENDS.values())))
+
+
+class TestLoads(TestCase):
+    def test_decodes_documents_alike_with_all_backends(self):
+        documents = [
+            b'{"name": "foo", "config": {"number": 1, "float": 0.5, "list": [true, false, null]}}',
+            '{"help": "Zażółć gęślą jaźń"}'.encode("utf-8"),
+            b'{"huge": 123456789012345678901234567890, "not-a-number": NaN}',
+        ]
+        for backend in BACKENDS.values():
+            for document in documents:
+                with self.subTest(backend=backend.name, document=document):
+                    subject = loads(document, backend)
+
+                    self.assertEqual(json.dumps(subject), json.dumps(json.loads(document)))
+
+    def test_raises_standard_library_error_on_malformed_document(self):
+        for backend in BACKENDS.values():
+            with self.subTest(backend=backend.name):
+                with self.assertRaises(json.JSONDecodeError) as context:
+                    loads(b'{"name": "foo",\n "config": }', backend)
+
+                self.assertEqual(context.exception.lineno, 2)
+
+    def test_decodes_documents_rejected_by_backend_with_standard_library(self):
+        backend = JsonBackend(name="strict", loads=mock.Mock(side_effect=ValueError), errors=(ValueError,))
+
+        self.assertEqual(loads(b"[1]", backend), [1])
@@ -0,0 +1,54 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+from unittest import TestCase
+
+from mbed_build._internal.config.label_set import LabelSet, SymbolTable
+
+
+class TestSymbolTable(TestCase):
+    def test_assigns_bit_to_each_symbol(self):
+        table = SymbolTable()
+
+        self.assertEqual(table.bit("FOO"), 1)
+        self.assertEqual(table.bit("BAR"), 2)
+        self.assertEqual(table.bit("FOO"), 1)
+        self.assertEqual(table.known_bit("BAZ"), 0)
+        self.assertEqual(table.mask(["BAR", "FOO"]), 3)
+        self.assertEqual(list(table.symbols(3)), ["FOO", "BAR"])
+
+
+class TestLabelSet(TestCase):
+    def test_behaves_like_set_of_strings(self):
+        labels = LabelSet(["FOO", "BAR"])
+
+        self.assertEqual(labels, {"FOO", "BAR"})
+        self.assertEqual({"FOO", "BAR"}, labels)
+        self.assertNotEqual(labels, {"FOO"})
+        self.assertEqual(len(labels), 2)
+        self.assertIn("FOO", labels)
+        self.assertNotIn("NEVER_SEEN_LABEL", labels)
+        self.assertEqual(hash(labels), hash(frozenset({"FOO", "BAR"})))
+        self.assertEqual(labels.to_frozenset(), frozenset({"FOO", "BAR"}))
+        self.assertEqual(sorted(labels), ["BAR", "FOO"])
+
+    def test_operations(self):
+        labels = LabelSet(["FOO", "BAR"])
+
+        self.assertEqual(labels | LabelSet(["BAZ"]), {"FOO", "BAR", "BAZ"})
+        self.assertEqual(labels | ["BAZ"], {"FOO", "BAR", "BAZ"})
+        self.assertEqual(labels & {"FOO", "BAZ"}, {"FOO"})
+        self.assertEqual(labels - LabelSet(["FOO"]), {"BAR"})
+        self.assertEqual({"FOO", "QUX"} - labels, {"QUX"})
+        self.assertEqual(labels ^ {"FOO", "BAZ"}, {"BAR", "BAZ"})
+        self.assertIsInstance(labels | {"BAZ"}, LabelSet)
+        self.assertIsInstance({"BAZ"} | labels, LabelSet)
+
+    def test_subset(self):
+        labels = LabelSet(["FOO"])
+
+        self.assertTrue(labels <= LabelSet(["FOO", "BAR"]))
+        self.assertTrue(labels <= {"FOO", "BAR"})
+        self.assertFalse(LabelSet(["FOO", "BAR"]) <= labels)
+        self.assertTrue(LabelSet() <= labels)
@@ -0,0 +1,47 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+from unittest import TestCase
+
+from mbed_build._internal.config.bootloader_overrides import BOOTLOADER_OVERRIDE_KEYS_IN_SOURCE, BootloaderOverrides
+from mbed_build._internal.config.config import Config
+from mbed_build._internal.config.cumulative_data import CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE, CumulativeData
+from mbed_build._internal.config.override_dispatcher import DispatchedSources, OverrideKind, override_kind
+from tests._internal.config.factories import SourceFactory
+
+
+class TestOverrideKind(TestCase):
+    def test_classifies_override_keys(self):
+        for key in CUMULATIVE_OVERRIDE_KEYS_IN_SOURCE:
+            self.assertIs(override_kind(key), OverrideKind.CUMULATIVE)
+        for key in BOOTLOADER_OVERRIDE_KEYS_IN_SOURCE:
+            self.assertIs(override_kind(key), OverrideKind.BOOTLOADER)
+        self.assertIs(override_kind("target.stdio-baud-rate"), OverrideKind.OPTION)
+        self.assertIs(override_kind("lib.features_add"), OverrideKind.OPTION)
+
+
+class TestDispatchedSources(TestCase):
+    def test_builds_same_data_as_each_structure(self):
+        sources = [
+            SourceFactory(
+                config={"target.number": 1, "target.app_offset": 0},
+                overrides={"target.features": ["FOO"], "target.mbed_app_start": "0x1000"},
+                macros=["TARGET_MACRO"],
+            ),
+            SourceFactory(
+                config={"lib.bool": False},
+                overrides={"target.number": 2, "target.features_add": ["BAR"], "target.mbed_app_size": "0x800"},
+                macros=["LIB_MACRO=1"],
+            ),
+            SourceFactory(overrides={"lib.bool": True, "target.features_remove": ["FOO"], "target.app_offset": 16}),
+        ]
+
+        subject = DispatchedSources.from_sources(sources)
+
+        self.assertEqual(subject.config, Config.from_sources(sources))
+        self.assertEqual(subject.cumulative_data, CumulativeData.from_sources(sources))
+        self.assertEqual(subject.bootloader_overrides, BootloaderOverrides.from_sources(sources))
+        self.assertEqual(subject.config.options["target.app_offset"].value, 0)
+        self.assertEqual(subject.bootloader_overrides.app_offset.value, 16)
+        self.assertEqual(subject.cumulative_data.features, {"BAR"})
@@ -5,9 +5,17 @@
 import json
 import pathlib
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from unittest import TestCase, mock
 
-from mbed_build._internal.config.source import Source, _namespace_data, _filter_target_overrides, _decode_json_file
+from mbed_build._internal.config.source import (
+    ConfigFile,
+    Source,
+    decode_json_file,
+    decode_json_files,
+    _filter_target_overrides,
+    _namespace_data,
+)
 
 
 class TestSource(TestCase):
@@ -74,8 +82,8 @@ class TestSource(TestCase):
             ),
         )
 
-    @mock.patch("mbed_build._internal.config.source.get_target_by_board_type")
-    def test_from_target(self, get_target_by_board_type):
+    @mock.patch("mbed_build._internal.config.source.get_target")
+    def test_from_target(self, get_target):
         # Warning: Target is a dataclass and dataclasses provide no type safety when mocking
         target = mock.Mock(
             features={"feature_1"},
@@ -83,12 +91,13 @@ class TestSource(TestCase):
             labels={"label_1"},
             config={"foo": "bar", "target.bool": True},
         )
-        get_target_by_board_type.return_value = target
+        get_target.return_value = target
         mbed_target = "K66F"
         mbed_program_directory = pathlib.Path("foo")
 
         subject = Source.from_target(mbed_target, mbed_program_directory)
 
+        get_target.assert_called_once_with(mbed_target, mbed_program_directory, None)
         self.assertEqual(
             subject,
             Source(
@@ -104,6 +113,38 @@ class TestSource(TestCase):
         )
 
 
+class TestConfigFile(TestCase):
+    def test_builds_sources_for_different_labels(self):
+        subject = ConfigFile.from_file_contents(
+            "mbed_lib.json",
+            {
+                "config": {"number": 1},
+                "target_overrides": {"*": {"number": 2}, "A": {"target.features_add": ["FOO"]}},
+                "macros": ["MACRO"],
+            },
+            namespace="lib",
+        )
+
+        self.assertEqual(
+            subject.to_source(["A"]),
+            Source(
+                human_name="File: mbed_lib.json",
+                config={"lib.number": 1},
+                overrides={"lib.number": 2, "target.features_add": ["FOO"]},
+                macros=["MACRO"],
+            ),
+        )
+        self.assertEqual(
+            subject.to_source(["B"]),
+            Source(
+                human_name="File: mbed_lib.json",
+                config={"lib.number": 1},
+                overrides={"lib.number": 2},
+                macros=["MACRO"],
+            ),
+        )
+
+
 class TestFilterTargetOverrides(TestCase):
     def test_returns_overrides_only_for_given_labels(self):
         subject = _filter_target_overrides(
@@ -132,6 +173,28 @@ class TestDecodeJSONFile(TestCase):
 
             with self.assertRaises(json.JSONDecodeError):
                 with self.assertLogs(level="ERROR") as logger:
-                    _decode_json_file(tmp_file)
+                    decode_json_file(tmp_file)
 
                     self.assertIn(str(tmp_file), logger.output)
+
+
+class TestDecodeJSONFiles(TestCase):
+    def test_decodes_files_in_order(self):
+        paths = [pathlib.Path(f"mbed_lib_{index}.json") for index in range(5)]
+        datas = [json.dumps({"name": path.stem}).encode() for path in paths]
+
+        with ThreadPoolExecutor(2) as decoder:
+            subject = decode_json_files(paths, datas, decoder, chunk_size=2)
+
+        self.assertEqual(subject, [{"name": path.stem} for path in paths])
+
+    def test_logs_path_of_invalid_file_and_raises(self):
+        paths = [pathlib.Path("valid.json"), pathlib.Path("invalid.json")]
+
+        with ThreadPoolExecutor(2) as decoder:
+            with self.assertRaises(json.JSONDecodeError):
+                with self.assertLogs(level="ERROR") as logger:
+                    decode_json_files(paths, [b"{}", b"This is not valid JSON<>>"], decoder)
+
+        self.assertEqual(len(logger.output), 1)
+        self.assertIn("invalid.json", logger.output[0])
@@ -7,15 +7,16 @@ from unittest import TestCase, mock
 
 from click.testing import CliRunner
 
+from mbed_build._internal.cmake_file import ConfigOutput
 from mbed_build._internal.mbed_tools.configure import configure
 
 
 class TestConfigure(TestCase):
-    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_mbed_config_cmake_file")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_toolchain_mbed_config_cmake_files")
     @mock.patch("mbed_build._internal.mbed_tools.configure.write_file")
     def test_configure(self, mock_write_file, mock_generate_cmakelists_file):
         mock_file_contents = "Hello world"
-        mock_generate_cmakelists_file.return_value = mock_file_contents
+        mock_generate_cmakelists_file.return_value = {"GCC_ARM": {"mbed_config.cmake": mock_file_contents}}
         output_dir = "some-directory"
         program_path = "blinky"
         mbed_target = "K64F"
@@ -26,16 +27,25 @@ class TestConfigure(TestCase):
 
         self.assertEqual(result.exit_code, 0)
         self.assertIn(output_dir, result.output)
-        mock_generate_cmakelists_file.assert_called_once_with(mbed_target, program_path, toolchain)
+        mock_generate_cmakelists_file.assert_called_once_with(
+            mbed_target,
+            program_path,
+            [toolchain],
+            pathlib.Path(output_dir, ".mbedbuild"),
+            1,
+            ConfigOutput.DEFINITIONS,
+            False,
+            None,
+        )
         mock_write_file.assert_called_once_with(
-            pathlib.Path(output_dir, ".mbedbuild"), "mbed_config.cmake", mock_generate_cmakelists_file.return_value
+            pathlib.Path(output_dir, ".mbedbuild"), "mbed_config.cmake", mock_file_contents
         )
 
-    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_mbed_config_cmake_file")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_toolchain_mbed_config_cmake_files")
     @mock.patch("mbed_build._internal.mbed_tools.configure.write_file")
     def test_configure_default_program_path(self, mock_write_file, mock_generate_cmakelists_file):
         mock_file_contents = "Hello world"
-        mock_generate_cmakelists_file.return_value = mock_file_contents
+        mock_generate_cmakelists_file.return_value = {"GCC_ARM": {"mbed_config.cmake": mock_file_contents}}
         output_dir = "some-directory"
         mbed_target = "K64F"
         toolchain = "GCC_ARM"
@@ -45,7 +55,133 @@ class TestConfigure(TestCase):
 
         self.assertEqual(result.exit_code, 0)
         self.assertIn(output_dir, result.output)
-        mock_generate_cmakelists_file.assert_called_once_with(mbed_target, ".", toolchain)
+        mock_generate_cmakelists_file.assert_called_once_with(
+            mbed_target,
+            ".",
+            [toolchain],
+            pathlib.Path(output_dir, ".mbedbuild"),
+            1,
+            ConfigOutput.DEFINITIONS,
+            False,
+            None,
+        )
         mock_write_file.assert_called_once_with(
-            pathlib.Path(output_dir, ".mbedbuild"), "mbed_config.cmake", mock_generate_cmakelists_file.return_value
+            pathlib.Path(output_dir, ".mbedbuild"), "mbed_config.cmake", mock_file_contents
+        )
+
+    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_toolchain_mbed_config_cmake_files")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.write_file")
+    def test_configure_without_cache(self, mock_write_file, mock_generate_cmakelists_file):
+        runner = CliRunner()
+        result = runner.invoke(configure, ["-t", "GCC_ARM", "-m", "K64F", "--no-cache"])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_generate_cmakelists_file.assert_called_once_with(
+            "K64F", ".", ["GCC_ARM"], None, 1, ConfigOutput.DEFINITIONS, False, None
+        )
+
+    @mock.patch("mbed_build._internal.mbed_tools.configure.clear_caches")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_toolchain_mbed_config_cmake_files")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.write_file")
+    def test_configure_rebuilding_cache(self, mock_write_file, mock_generate_cmakelists_file, mock_clear_caches):
+        runner = CliRunner()
+        result = runner.invoke(configure, ["-o", "some-directory", "-t", "GCC_ARM", "-m", "K64F", "--rebuild-cache"])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_clear_caches.assert_called_once_with(pathlib.Path("some-directory", ".mbedbuild"))
+
+    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_toolchain_mbed_config_cmake_files")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.write_file")
+    def test_configure_with_jobs(self, mock_write_file, mock_generate_cmakelists_file):
+        runner = CliRunner()
+        result = runner.invoke(configure, ["-t", "GCC_ARM", "-m", "K64F", "--no-cache", "-j", "4"])
+        automatic_result = runner.invoke(configure, ["-t", "GCC_ARM", "-m", "K64F", "--no-cache", "-j", "0"])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(automatic_result.exit_code, 0)
+        self.assertEqual(
+            mock_generate_cmakelists_file.call_args_list,
+            [
+                mock.call("K64F", ".", ["GCC_ARM"], None, 4, ConfigOutput.DEFINITIONS, False, None),
+                mock.call("K64F", ".", ["GCC_ARM"], None, None, ConfigOutput.DEFINITIONS, False, None),
+            ],
+        )
+
+    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_toolchain_mbed_config_cmake_files")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.write_file")
+    def test_configure_for_several_toolchains(self, mock_write_file, mock_generate_cmakelists_files):
+        mock_generate_cmakelists_files.return_value = {
+            "GCC_ARM": {"mbed_config.cmake": "GCC_ARM file"},
+            "ARM": {"mbed_config.cmake": "ARM file"},
+        }
+        output_directory = pathlib.Path("some-directory", ".mbedbuild")
+
+        runner = CliRunner()
+        result = runner.invoke(
+            configure, ["-o", "some-directory", "-t", "GCC_ARM", "-t", "ARM", "-t", "GCC_ARM", "-m", "K64F"]
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        mock_generate_cmakelists_files.assert_called_once_with(
+            "K64F", ".", ["GCC_ARM", "ARM"], output_directory, 1, ConfigOutput.DEFINITIONS, False, None
         )
+        self.assertEqual(
+            mock_write_file.call_args_list,
+            [
+                mock.call(output_directory / "GCC_ARM", "mbed_config.cmake", "GCC_ARM file"),
+                mock.call(output_directory / "ARM", "mbed_config.cmake", "ARM file"),
+            ],
+        )
+
+    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_toolchain_mbed_config_cmake_files")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.write_file")
+    def test_configure_with_config_header(self, mock_write_file, mock_generate_cmakelists_files):
+        mock_generate_cmakelists_files.return_value = {
+            "GCC_ARM": {"mbed_config.cmake": "CMake file", "mbed_config.h": "Header"}
+        }
+        output_directory = pathlib.Path(".mbedbuild")
+
+        runner = CliRunner()
+        result = runner.invoke(configure, ["-t", "GCC_ARM", "-m", "K64F", "--config-output", "header"])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_generate_cmakelists_files.assert_called_once_with(
+            "K64F", ".", ["GCC_ARM"], output_directory, 1, ConfigOutput.HEADER, False, None
+        )
+        self.assertEqual(
+            mock_write_file.call_args_list,
+            [
+                mock.call(output_directory, "mbed_config.cmake", "CMake file"),
+                mock.call(output_directory, "mbed_config.h", "Header"),
+            ],
+        )
+
+    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_toolchain_mbed_config_cmake_files")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.write_file")
+    def test_configure_reproducible(self, mock_write_file, mock_generate_cmakelists_files):
+        mock_generate_cmakelists_files.return_value = {"GCC_ARM": {"mbed_config.cmake": "CMake file"}}
+
+        runner = CliRunner()
+        result = runner.invoke(configure, ["-t", "GCC_ARM", "-m", "K64F", "--reproducible"])
+
+        self.assertEqual(result.exit_code, 0)
+        mock_generate_cmakelists_files.assert_called_once_with(
+            "K64F", ".", ["GCC_ARM"], pathlib.Path(".mbedbuild"), 1, ConfigOutput.DEFINITIONS, True, None
+        )
+
+    @mock.patch("mbed_build._internal.mbed_tools.configure.generate_toolchain_mbed_config_cmake_files")
+    @mock.patch("mbed_build._internal.mbed_tools.configure.write_file")
+    def test_configure_with_result_cache(self, mock_write_file, mock_generate_cmakelists_files):
+        mock_generate_cmakelists_files.return_value = {"GCC_ARM": {"mbed_config.cmake": "CMake file"}}
+
+        runner = CliRunner()
+        result = runner.invoke(
+            configure,
+            ["-t", "GCC_ARM", "-m", "K64F", "--reproducible", "--result-cache-size", "2"],
+            env={"MBED_BUILD_RESULT_CACHE": "shared-cache"},
+        )
+
+        self.assertEqual(result.exit_code, 0)
+        result_cache = mock_generate_cmakelists_files.call_args[0][7]
+        self.assertEqual(result_cache.directory, pathlib.Path("shared-cache"))
+        self.assertEqual(result_cache.max_size, 2 * 1024 * 1024)
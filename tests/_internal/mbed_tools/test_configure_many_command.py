@@ -0,0 +1,63 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import pathlib
+from unittest import TestCase, mock
+
+from click.testing import CliRunner
+
+from mbed_build._internal.cmake_file import ConfigOutput
+from mbed_build._internal.mbed_tools.configure_many import configure_many
+
+
+@mock.patch("mbed_build._internal.mbed_tools.configure_many.generate_mbed_config_cmake_files")
+@mock.patch("mbed_build._internal.mbed_tools.configure_many.write_file")
+class TestConfigureMany(TestCase):
+    def test_writes_file_for_each_target_and_toolchain(self, write_file, generate_mbed_config_cmake_files):
+        generate_mbed_config_cmake_files.return_value = {
+            ("K64F", "GCC_ARM"): {"mbed_config.cmake": "K64F GCC_ARM"},
+            ("K64F", "ARM"): {"mbed_config.cmake": "K64F ARM"},
+            ("K66F", "GCC_ARM"): {"mbed_config.cmake": "K66F GCC_ARM"},
+            ("K66F", "ARM"): {"mbed_config.cmake": "K66F ARM"},
+        }
+        output_directory = pathlib.Path("some-directory", ".mbedbuild")
+
+        result = CliRunner().invoke(
+            configure_many,
+            ["-o", "some-directory", "-t", "GCC_ARM", "-t", "ARM", "-m", "K64F", "-m", "k66f", "-p", "blinky"],
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("4 mbed_config.cmake files", result.output)
+        generate_mbed_config_cmake_files.assert_called_once_with(
+            ["K64F", "K66F"],
+            "blinky",
+            ("GCC_ARM", "ARM"),
+            output_directory,
+            1,
+            1,
+            ConfigOutput.DEFINITIONS,
+            False,
+            None,
+        )
+        write_file.assert_has_calls(
+            [
+                mock.call(output_directory / "K64F" / "GCC_ARM", "mbed_config.cmake", "K64F GCC_ARM"),
+                mock.call(output_directory / "K64F" / "ARM", "mbed_config.cmake", "K64F ARM"),
+                mock.call(output_directory / "K66F" / "GCC_ARM", "mbed_config.cmake", "K66F GCC_ARM"),
+                mock.call(output_directory / "K66F" / "ARM", "mbed_config.cmake", "K66F ARM"),
+            ]
+        )
+
+    def test_chooses_number_of_processes_automatically(self, write_file, generate_mbed_config_cmake_files):
+        generate_mbed_config_cmake_files.return_value = {}
+
+        result = CliRunner().invoke(
+            configure_many, ["-t", "ARM", "-m", "K64F", "--processes", "0", "--jobs", "4", "--no-cache"]
+        )
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        generate_mbed_config_cmake_files.assert_called_once_with(
+            ["K64F"], ".", ("ARM",), None, 4, None, ConfigOutput.DEFINITIONS, False, None
+        )
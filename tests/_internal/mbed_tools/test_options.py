@@ -0,0 +1,32 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+from unittest import TestCase
+
+from mbed_build._internal.mbed_tools.configure import configure
+from mbed_build._internal.mbed_tools.configure_many import configure_many
+
+
+class TestSharedOptions(TestCase):
+    def test_commands_define_shared_options_alike(self):
+        shared_options = [
+            "program_path",
+            "no_cache",
+            "rebuild_cache",
+            "jobs",
+            "config_output",
+            "reproducible",
+            "result_cache_directory",
+            "result_cache_size",
+        ]
+        for name in shared_options:
+            with self.subTest(name):
+                option, many_option = [
+                    next(param for param in command.params if param.name == name)
+                    for command in [configure, configure_many]
+                ]
+                self.assertEqual(option.opts, many_option.opts)
+                self.assertEqual(option.help, many_option.help)
+                self.assertEqual(option.default, many_option.default)
+                self.assertEqual(option.envvar, many_option.envvar)
@@ -3,18 +3,29 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 import pathlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 from unittest import TestCase, mock
 
-from tests._internal.config.factories import ConfigFactory
-from mbed_build._internal.cmake_file import generate_mbed_config_cmake_file, _render_mbed_config_cmake_template
+from tests._internal.config.factories import ConfigFactory, MacroFactory, OptionFactory
+from mbed_build._internal.cmake_file import (
+    ConfigOutput,
+    generate_mbed_config_cmake_file,
+    generate_mbed_config_cmake_files,
+    generate_toolchain_mbed_config_cmake_files,
+    _absolute_posix_path,
+    _render_config_files,
+    _render_mbed_config_cmake_template,
+)
+from mbed_build._internal.result_cache import ResultCache
 
 
 class TestGenerateCMakeListsFile(TestCase):
     @mock.patch("mbed_build._internal.cmake_file.datetime")
     @mock.patch("mbed_build._internal.cmake_file.assemble_config")
-    @mock.patch("mbed_build._internal.cmake_file.get_target_by_name")
-    def test_correct_arguments_passed(self, get_target_by_name, assemble_config, datetime):
+    @mock.patch("mbed_build._internal.cmake_file.get_target")
+    def test_correct_arguments_passed(self, get_target, assemble_config, datetime):
         target = mock.Mock()
         target.labels = ["foo"]
         target.features = ["bar"]
@@ -27,21 +38,232 @@ class TestGenerateCMakeListsFile(TestCase):
         datetime.datetime.now.return_value.timestamp.return_value = 2
         config = ConfigFactory()
         assemble_config.return_value = config
-        get_target_by_name.return_value = target
+        get_target.return_value = target
         mbed_target = "K64F"
         program_path = "blinky"
         toolchain_name = "GCC"
 
         result = generate_mbed_config_cmake_file(mbed_target, program_path, toolchain_name)
 
-        get_target_by_name.assert_called_once_with(mbed_target, program_path)
-        assemble_config.assert_called_once_with(mbed_target, pathlib.Path(program_path))
+        get_target.assert_called_once_with(mbed_target, pathlib.Path(program_path), None)
+        assemble_config.assert_called_once_with(mbed_target, pathlib.Path(program_path), None, 1)
         self.assertEqual(
             result, _render_mbed_config_cmake_template(target, config, toolchain_name, mbed_target,),
         )
 
 
+class TestGenerateCMakeFilesForToolchains(TestCase):
+    @mock.patch("mbed_build._internal.cmake_file._render_mbed_config_cmake_template")
+    @mock.patch("mbed_build._internal.cmake_file.assemble_config")
+    @mock.patch("mbed_build._internal.cmake_file.get_target")
+    def test_assembles_config_once_for_all_toolchains(self, get_target, assemble_config, render):
+        assemble_config.return_value = ConfigFactory()
+        render.side_effect = lambda target, config, toolchain_name, target_name, **_: f"{target_name} {toolchain_name}"
+
+        result = generate_toolchain_mbed_config_cmake_files("K64F", "blinky", ["ARM", "GCC_ARM"])
+
+        self.assertEqual(
+            result, {"ARM": {"mbed_config.cmake": "K64F ARM"}, "GCC_ARM": {"mbed_config.cmake": "K64F GCC_ARM"}}
+        )
+        assemble_config.assert_called_once_with("K64F", pathlib.Path("blinky"), None, 1)
+        render.assert_called_with(
+            get_target.return_value, assemble_config.return_value, "GCC_ARM", "K64F", reproducible=False
+        )
+
+    @mock.patch("mbed_build._internal.cmake_file.ProgramPaths", autospec=True)
+    @mock.patch("mbed_build._internal.cmake_file.hash_program_inputs", autospec=True)
+    @mock.patch("mbed_build._internal.cmake_file._render_mbed_config_cmake_template")
+    @mock.patch("mbed_build._internal.cmake_file.assemble_config")
+    @mock.patch("mbed_build._internal.cmake_file.get_target")
+    def test_reuses_reproducible_results_from_result_cache(
+        self, get_target, assemble_config, render, hash_program_inputs, ProgramPaths
+    ):
+        assemble_config.return_value = ConfigFactory()
+        render.side_effect = lambda target, config, toolchain_name, target_name, **_: f"{target_name} {toolchain_name}"
+        hash_program_inputs.return_value = b"inputs"
+        ProgramPaths.from_directory.return_value.root = pathlib.Path("blinky")
+        with tempfile.TemporaryDirectory() as directory:
+            result_cache = ResultCache(pathlib.Path(directory))
+
+            for reproducible in [False, True, True]:
+                result = generate_toolchain_mbed_config_cmake_files(
+                    "K64F", "blinky", ["ARM"], None, 1, ConfigOutput.DEFINITIONS, reproducible, result_cache
+                )
+                self.assertEqual(result, {"ARM": {"mbed_config.cmake": "K64F ARM"}})
+
+        self.assertEqual(assemble_config.call_count, 2)
+        hash_program_inputs.assert_called_with(pathlib.Path("blinky"), ProgramPaths.from_directory.return_value, None)
+
+    @mock.patch("mbed_build._internal.cmake_file.ProgramPaths", autospec=True)
+    @mock.patch("mbed_build._internal.cmake_file.hash_program_inputs", autospec=True)
+    @mock.patch("mbed_build._internal.cmake_file.assemble_config")
+    @mock.patch("mbed_build._internal.cmake_file.get_target")
+    def test_relocates_input_files_of_cached_results(
+        self, get_target, assemble_config, hash_program_inputs, ProgramPaths
+    ):
+        get_target.return_value = mock.Mock(
+            labels=[], features=[], components=[], macros=[], device_has=[], core="core", supported_form_factors=[]
+        )
+        hash_program_inputs.return_value = b"inputs"
+        with tempfile.TemporaryDirectory() as directory:
+            result_cache = ResultCache(pathlib.Path(directory))
+            results = {}
+            for program_root in [pathlib.Path("/first/program"), pathlib.Path("/second/program")]:
+                assemble_config.return_value = ConfigFactory(
+                    input_files=[program_root, program_root / "mbed_app.json", pathlib.Path("/first/program2")]
+                )
+                ProgramPaths.from_directory.return_value.root = program_root
+                results[program_root] = generate_toolchain_mbed_config_cmake_files(
+                    "K64F", str(program_root), ["ARM"], reproducible=True, result_cache=result_cache
+                )["ARM"]
+
+        self.assertEqual(assemble_config.call_count, 1)
+        second_program = pathlib.Path("/second/program")
+        self.assertEqual(
+            results[second_program]["mbed_config.d"],
+            f"mbed_config.cmake: \\\n  {_absolute_posix_path(second_program)} \\\n"
+            f"  {_absolute_posix_path(second_program / 'mbed_app.json')} \\\n"
+            f"  {_absolute_posix_path(pathlib.Path('/first/program2'))}\n",
+        )
+        self.assertIn(f'    "{_absolute_posix_path(second_program)}"\n', results[second_program]["mbed_config.cmake"])
+        self.assertIn(
+            f'    "{_absolute_posix_path(pathlib.Path("/first/program2"))}"\n',
+            results[second_program]["mbed_config.cmake"],
+        )
+
+
+@mock.patch("mbed_build._internal.cmake_file._render_mbed_config_cmake_template")
+@mock.patch("mbed_build._internal.cmake_file.Source", autospec=True)
+@mock.patch("mbed_build._internal.cmake_file.get_targets", autospec=True)
+@mock.patch("mbed_build._internal.cmake_file.ProgramConfigFiles", autospec=True)
+class TestGenerateCMakeFilesForManyTargets(TestCase):
+    def test_assembles_config_once_per_target(self, ProgramConfigFiles, get_targets, Source, render):
+        ProgramConfigFiles.from_directory.return_value.assemble_config.return_value = ConfigFactory()
+        get_targets.return_value = {"K64F": mock.sentinel.K64F, "K66F": mock.sentinel.K66F}
+        render.side_effect = lambda target, config, toolchain_name, target_name, **_: f"{target_name} {toolchain_name}"
+        program_config_files = ProgramConfigFiles.from_directory.return_value
+
+        result = generate_mbed_config_cmake_files(["K64F", "K66F", "K64F"], "blinky", ["ARM", "GCC_ARM"])
+
+        self.assertEqual(
+            result,
+            {
+                ("K64F", "ARM"): {"mbed_config.cmake": "K64F ARM"},
+                ("K64F", "GCC_ARM"): {"mbed_config.cmake": "K64F GCC_ARM"},
+                ("K66F", "ARM"): {"mbed_config.cmake": "K66F ARM"},
+                ("K66F", "GCC_ARM"): {"mbed_config.cmake": "K66F GCC_ARM"},
+            },
+        )
+        ProgramConfigFiles.from_directory.assert_called_once_with(pathlib.Path("blinky"), None)
+        get_targets.assert_called_once_with(["K64F", "K66F"], pathlib.Path("blinky"), None)
+        Source.from_resolved_target.assert_has_calls(
+            [mock.call("K64F", mock.sentinel.K64F), mock.call("K66F", mock.sentinel.K66F)]
+        )
+        self.assertEqual(program_config_files.assemble_config.call_count, 2)
+        render.assert_any_call(
+            mock.sentinel.K66F, program_config_files.assemble_config.return_value, "GCC_ARM", "K66F", reproducible=False
+        )
+
+    @mock.patch("mbed_build._internal.cmake_file.ProcessPoolExecutor", ThreadPoolExecutor)
+    def test_spreads_targets_across_worker_processes(self, ProgramConfigFiles, get_targets, Source, render):
+        ProgramConfigFiles.from_directory.return_value.assemble_config.return_value = ConfigFactory()
+        get_targets.return_value = {"K64F": mock.sentinel.K64F, "K66F": mock.sentinel.K66F}
+        render.side_effect = lambda target, config, toolchain_name, target_name, **_: f"{target_name} {toolchain_name}"
+
+        result = generate_mbed_config_cmake_files(["K64F", "K66F"], "blinky", ["ARM"], processes=2)
+
+        self.assertEqual(
+            result,
+            {("K64F", "ARM"): {"mbed_config.cmake": "K64F ARM"}, ("K66F", "ARM"): {"mbed_config.cmake": "K66F ARM"}},
+        )
+        self.assertEqual(ProgramConfigFiles.from_directory.return_value.assemble_config.call_count, 2)
+
+    @mock.patch("mbed_build._internal.cmake_file.ProgramPaths", autospec=True)
+    @mock.patch("mbed_build._internal.cmake_file.hash_program_inputs", autospec=True)
+    def test_only_assembles_config_of_targets_missing_from_result_cache(
+        self, hash_program_inputs, ProgramPaths, ProgramConfigFiles, get_targets, Source, render
+    ):
+        ProgramConfigFiles.from_directory.return_value.assemble_config.return_value = ConfigFactory()
+        get_targets.side_effect = lambda names, *_: {name: getattr(mock.sentinel, name) for name in names}
+        render.side_effect = lambda target, config, toolchain_name, target_name, **_: f"{target_name} {toolchain_name}"
+        hash_program_inputs.return_value = b"inputs"
+        ProgramPaths.from_directory.return_value.root = pathlib.Path("blinky")
+        with tempfile.TemporaryDirectory() as directory:
+            result_cache = ResultCache(pathlib.Path(directory))
+            generate_mbed_config_cmake_files(["K64F"], "blinky", ["ARM"], reproducible=True, result_cache=result_cache)
+
+            result = generate_mbed_config_cmake_files(
+                ["K64F", "K66F"], "blinky", ["ARM"], reproducible=True, result_cache=result_cache
+            )
+            ProgramConfigFiles.from_directory.reset_mock()
+            cached_result = generate_mbed_config_cmake_files(
+                ["K64F", "K66F"], "blinky", ["ARM"], reproducible=True, result_cache=result_cache
+            )
+
+        expected_result = {
+            ("K64F", "ARM"): {"mbed_config.cmake": "K64F ARM"},
+            ("K66F", "ARM"): {"mbed_config.cmake": "K66F ARM"},
+        }
+        self.assertEqual(result, expected_result)
+        self.assertEqual(cached_result, expected_result)
+        self.assertEqual(get_targets.call_args_list[1], mock.call(["K66F"], pathlib.Path("blinky"), None))
+        ProgramConfigFiles.from_directory.assert_not_called()
+
+    @mock.patch("mbed_build._internal.cmake_file.ProgramPaths", autospec=True)
+    @mock.patch("mbed_build._internal.cmake_file.hash_program_inputs", autospec=True)
+    @mock.patch("mbed_build._internal.cmake_file.assemble_config")
+    @mock.patch("mbed_build._internal.cmake_file.get_target")
+    def test_does_not_share_results_with_single_target_generation(
+        self,
+        get_target,
+        assemble_config,
+        hash_program_inputs,
+        ProgramPaths,
+        ProgramConfigFiles,
+        get_targets,
+        Source,
+        render,
+    ):
+        assemble_config.return_value = ConfigFactory()
+        ProgramConfigFiles.from_directory.return_value.assemble_config.return_value = ConfigFactory()
+        get_targets.return_value = {"K64F": mock.sentinel.K64F}
+        render.side_effect = lambda target, config, toolchain_name, target_name, **_: f"{target_name} {toolchain_name}"
+        hash_program_inputs.return_value = b"inputs"
+        ProgramPaths.from_directory.return_value.root = pathlib.Path("blinky")
+        with tempfile.TemporaryDirectory() as directory:
+            result_cache = ResultCache(pathlib.Path(directory))
+            generate_toolchain_mbed_config_cmake_files(
+                "K64F", "blinky", ["ARM"], reproducible=True, result_cache=result_cache
+            )
+
+            generate_mbed_config_cmake_files(["K64F"], "blinky", ["ARM"], reproducible=True, result_cache=result_cache)
+
+        ProgramConfigFiles.from_directory.return_value.assemble_config.assert_called_once()
+
+
 class TestRendersCMakeListsFile(TestCase):
+    @mock.patch("mbed_build._internal.cmake_file.datetime")
+    def test_omits_timestamp_when_reproducible(self, datetime):
+        datetime.datetime.now.return_value.timestamp.return_value = 2
+        target = mock.Mock(
+            labels={"foo", "bar", "baz"},
+            features=set(),
+            components=set(),
+            macros=set(),
+            device_has=set(),
+            core="core",
+            supported_form_factors=set(),
+        )
+        config = ConfigFactory()
+
+        result = _render_mbed_config_cmake_template(target, config, "GCC_ARM", "K64F")
+        reproducible_result = _render_mbed_config_cmake_template(target, config, "GCC_ARM", "K64F", reproducible=True)
+
+        self.assertIn("-DMBED_BUILD_TIMESTAMP=2\n", result)
+        self.assertNotIn("MBED_BUILD_TIMESTAMP", reproducible_result)
+        self.assertIn("-DTARGET_bar\n    -DTARGET_baz\n    -DTARGET_foo\n", reproducible_result)
+        self.assertEqual(reproducible_result, result.replace("    -DMBED_BUILD_TIMESTAMP=2\n", ""))
+
     def test_returns_rendered_content(self):
         target = mock.Mock()
         target.labels = ["foo"]
@@ -60,3 +282,162 @@ class TestRendersCMakeListsFile(TestCase):
 
         for macro in target.features + target.components + [toolchain_name]:
             self.assertIn(macro.upper(), result)
+
+
+class TestRendersConfigFiles(TestCase):
+    def setUp(self):
+        self.target = mock.Mock(
+            labels=["foo"],
+            features=["bar"],
+            components=["baz"],
+            macros=["macbaz"],
+            device_has=["stuff"],
+            core="core",
+            supported_form_factors=["arduino"],
+        )
+        self.config = ConfigFactory(
+            options={
+                "a": OptionFactory(macro_name="MBED_CONF_A", value="{1, 2}"),
+                "b": OptionFactory(macro_name="MBED_CONF_B", value=None),
+            },
+            macros={"C": MacroFactory(name="C", value="(3)"), "D": MacroFactory(name="D", value=None)},
+        )
+
+    def test_renders_options_and_macros_as_definitions(self):
+        result = _render_config_files(self.target, self.config, "GCC_ARM", "K64F")
+
+        self.assertEqual(list(result), ["mbed_config.cmake"])
+        self.assertIn('"-DMBED_CONF_A={1, 2}"', result["mbed_config.cmake"])
+        self.assertIn('"-DC=(3)"', result["mbed_config.cmake"])
+        self.assertIn("-DD\n", result["mbed_config.cmake"])
+
+    def test_renders_options_and_macros_in_header(self):
+        result = _render_config_files(self.target, self.config, "GCC_ARM", "K64F", ConfigOutput.HEADER)
+
+        cmake_file, header = result["mbed_config.cmake"], result["mbed_config.h"]
+        self.assertIn("-include${CMAKE_CURRENT_LIST_DIR}/mbed_config.h", cmake_file)
+        self.assertIn("include_directories(${CMAKE_CURRENT_LIST_DIR})", cmake_file)
+        self.assertIn("-DTARGET_foo", cmake_file)
+        self.assertNotIn("MBED_CONF_A", cmake_file)
+        self.assertNotIn("-DC=", cmake_file)
+        self.assertRegex(header, r"#define MBED_CONF_A +\{1, 2\} // set by libname\n")
+        self.assertNotIn("MBED_CONF_B", header)
+        self.assertRegex(header, r"#define C +\(3\) // defined by source\n")
+        self.assertRegex(header, r"#define D +1 // defined by source\n")
+
+    @mock.patch("mbed_build._internal.cmake_file._absolute_posix_path", side_effect=lambda path: path.as_posix())
+    def test_renders_depfile_and_configure_dependencies_of_input_files(self, _):
+        self.config.input_files = [pathlib.Path("/program/targets.json"), pathlib.Path("/my program/mbed_lib.json")]
+
+        result = _render_config_files(self.target, self.config, "GCC_ARM", "K64F")
+
+        self.assertEqual(
+            result["mbed_config.d"],
+            "mbed_config.cmake: \\\n  /program/targets.json \\\n  /my\\ program/mbed_lib.json\n",
+        )
+        self.assertIn(
+            "set_property(DIRECTORY APPEND PROPERTY CMAKE_CONFIGURE_DEPENDS\n"
+            '    "/program/targets.json"\n    "/my program/mbed_lib.json"\n)\n',
+            result["mbed_config.cmake"],
+        )
+
+    @mock.patch("mbed_build._internal.cmake_file._absolute_posix_path", side_effect=lambda path: path.as_posix())
+    def test_escapes_configure_dependencies_in_quoted_arguments(self, _):
+        self.config.input_files = [pathlib.Path('/${HOME}/"quoted"/back\\slash/mbed_lib.json')]
+
+        result = _render_config_files(self.target, self.config, "GCC_ARM", "K64F")
+
+        self.assertIn('    "/\\${HOME}/\\"quoted\\"/back\\\\slash/mbed_lib.json"\n', result["mbed_config.cmake"])
+
+    def test_renders_input_files_as_absolute_paths(self):
+        self.config.input_files = [pathlib.Path("mbed_app.json")]
+
+        result = _render_config_files(self.target, self.config, "GCC_ARM", "K64F", ConfigOutput.HEADER)
+
+        absolute_path = pathlib.Path("mbed_app.json").absolute().as_posix()
+        self.assertIn(f'    "{absolute_path}"\n', result["mbed_config.cmake"])
+
+    def test_names_files_setting_options_relative_to_program_root(self):
+        headers = []
+        with tempfile.TemporaryDirectory() as directory:
+            for program_root in [pathlib.Path(directory, "first"), pathlib.Path(directory, "second")]:
+                mbed_lib = program_root / "mbed-os" / "mbed_lib.json"
+                self.config.options["a"].set_by = f"File: {mbed_lib}"
+                self.config.macros["C"].set_by = f"File: {mbed_lib}"
+                self.config.program_root = program_root
+                for config_output in [ConfigOutput.HEADER, ConfigOutput.SPLIT_HEADERS]:
+                    result = _render_config_files(self.target, self.config, "GCC_ARM", "K64F", config_output)
+                    headers.append({name: contents for name, contents in result.items() if name.endswith(".h")})
+
+            with mock.patch("os.getcwd", return_value=str(program_root)):
+                self.config.options["a"].set_by = "File: mbed-os/mbed_lib.json"
+                self.config.macros["C"].set_by = "File: mbed-os/mbed_lib.json"
+                result = _render_config_files(self.target, self.config, "GCC_ARM", "K64F", ConfigOutput.HEADER)
+
+        self.assertRegex(headers[0]["mbed_config.h"], r"// set by File: mbed-os/mbed_lib.json\n")
+        self.assertRegex(headers[0]["mbed_config.h"], r"// defined by File: mbed-os/mbed_lib.json\n")
+        self.assertEqual(headers[0], headers[2])
+        self.assertEqual(headers[1], headers[3])
+        self.assertEqual(result["mbed_config.h"], headers[0]["mbed_config.h"])
+
+    def test_renders_options_in_headers_of_each_namespace(self):
+        self.config.options = {
+            "lwip.a": OptionFactory(key="lwip.a", macro_name="MBED_CONF_LWIP_A", value="1"),
+            "lwip.b": OptionFactory(key="lwip.b", macro_name="MBED_CONF_LWIP_B", value=None),
+            "target.c": OptionFactory(key="target.c", macro_name="MBED_CONF_TARGET_C", value="2"),
+            "unset.d": OptionFactory(key="unset.d", macro_name="MBED_CONF_UNSET_D", value=None),
+        }
+
+        result = _render_config_files(self.target, self.config, "GCC_ARM", "K64F", ConfigOutput.SPLIT_HEADERS)
+
+        self.assertEqual(
+            sorted(result),
+            [
+                "mbed_config.cmake",
+                "mbed_config.h",
+                "mbed_config/lwip.h",
+                "mbed_config/target.h",
+                "mbed_config_macros.h",
+            ],
+        )
+        lwip_header, target_header = result["mbed_config/lwip.h"], result["mbed_config/target.h"]
+        self.assertIn("#ifndef MBED_CONFIG_LWIP_H\n", lwip_header)
+        self.assertRegex(lwip_header, r"#define MBED_CONF_LWIP_A +1 // set by libname\n")
+        self.assertNotIn("MBED_CONF_LWIP_B", lwip_header)
+        self.assertNotIn("MBED_CONF_TARGET_C", lwip_header)
+        self.assertRegex(target_header, r"#define MBED_CONF_TARGET_C +2 // set by libname\n")
+        self.assertIn('#include "mbed_config_macros.h"\n', lwip_header)
+        self.assertRegex(result["mbed_config_macros.h"], r"#define C +\(3\) // defined by source\n")
+        umbrella_header = result["mbed_config.h"]
+        self.assertIn(
+            '#include "mbed_config_macros.h"\n#include "mbed_config/lwip.h"\n#include "mbed_config/target.h"\n',
+            umbrella_header,
+        )
+        self.assertNotIn("#define", umbrella_header.replace("#define __MBED_CONFIG_DATA__", ""))
+        cmake_file = result["mbed_config.cmake"]
+        self.assertIn("target_compile_options(gen_config INTERFACE", cmake_file)
+        self.assertIn("add_library(mbed_config_lwip INTERFACE)", cmake_file)
+        self.assertIn("target_include_directories(mbed_config_lwip INTERFACE ${CMAKE_CURRENT_LIST_DIR})", cmake_file)
+        self.assertIn("-include${CMAKE_CURRENT_LIST_DIR}/mbed_config/target.h", cmake_file)
+        self.assertNotIn("mbed_config_unset", cmake_file)
+        self.assertNotIn("add_compile_options", cmake_file)
+
+    def test_changed_option_only_changes_header_of_its_namespace(self):
+        def render(tcp_mss):
+            self.config.options = {
+                "lwip.tcp-mss": OptionFactory(key="lwip.tcp-mss", macro_name="MBED_CONF_LWIP_TCP_MSS", value=tcp_mss),
+                "nsapi.buffer": OptionFactory(
+                    key="nsapi.buffer", macro_name="MBED_CONF_NSAPI_BUFFER", value="(MBED_CONF_LWIP_TCP_MSS * 2)"
+                ),
+                "platform.baud": OptionFactory(key="platform.baud", macro_name="MBED_CONF_PLATFORM_BAUD", value="9600"),
+            }
+            return _render_config_files(
+                self.target, self.config, "GCC_ARM", "K64F", ConfigOutput.SPLIT_HEADERS, reproducible=True
+            )
+
+        result, changed_result = render("536"), render("1460")
+
+        self.assertEqual([name for name in result if result[name] != changed_result[name]], ["mbed_config/lwip.h"])
+        self.assertIn('#include "mbed_config/lwip.h"\n', result["mbed_config/nsapi.h"])
+        self.assertNotIn('#include "mbed_config/', result["mbed_config/lwip.h"])
+        self.assertNotIn('#include "mbed_config/', result["mbed_config/platform.h"])
@@ -3,13 +3,24 @@
 # SPDX-License-Identifier: Apache-2.0
 #
 import contextlib
+import os
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from unittest import TestCase
+from unittest import TestCase, mock
 from typing import Iterable
 
 
-from mbed_build._internal.find_files import find_files, filter_files, MbedignoreFilter, LabelFilter
+from mbed_build._internal.find_files import (
+    find_files,
+    _find_files,
+    iter_files,
+    filter_files,
+    MbedignoreFilter,
+    LabelFilter,
+    LabelIndex,
+    ProgramFileIndex,
+    _TreeWalker,
+)
 
 
 @contextlib.contextmanager
@@ -75,6 +86,131 @@ class TestFindFiles(TestCase):
         for path in matching_paths:
             self.assertIn(Path(directory, path), subject)
 
+    def test_does_not_traverse_filtered_out_directories(self):
+        with create_files([Path("foo", "bar", "file.txt")]) as directory:
+            visited = []
+
+            def my_filter(path):
+                visited.append(path)
+                return path.name != "foo"
+
+            subject = _find_files("file.txt", directory, [my_filter])
+
+        self.assertEqual(subject, [])
+        self.assertEqual(visited, [Path(directory, "foo")])
+
+
+class TestIterFiles(TestCase):
+    def test_yields_files_before_traversal_finishes(self):
+        paths = [Path("a", "file.txt"), Path("b", "file.txt")]
+        with create_files(paths) as directory:
+            with mock.patch("mbed_build._internal.traversal_cache.os.scandir", wraps=os.scandir) as scandir:
+                subject = iter_files("file.txt", directory)
+
+                first_file = next(subject)
+                self.assertEqual(scandir.call_count, 2)
+                remaining_files = list(subject)
+
+            self.assertEqual(scandir.call_count, 3)
+            self.assertEqual([first_file] + remaining_files, find_files("file.txt", directory))
+            self.assertEqual(sorted([first_file] + remaining_files), [Path(directory, path) for path in paths])
+
+    def test_streaming_walker_does_not_keep_yielded_files(self):
+        paths = [Path("a", "file.txt"), Path(".mbedignore")]
+        with create_files(paths) as directory:
+            walker = _TreeWalker(["file.txt", ".mbedignore"], collect=False)
+
+            yielded_files = [path for _, path in walker.iter_walk(directory, [])]
+
+            self.assertEqual(yielded_files, [Path(directory, ".mbedignore"), Path(directory, "a", "file.txt")])
+            self.assertEqual(walker.found(), {})
+
+
+class TestProgramFileIndex(TestCase):
+    def test_indexes_files_by_name_in_single_traversal(self):
+        paths = [
+            Path("mbed_app.json"),
+            Path("mbed_lib.json"),
+            Path("lib", "mbed_lib.json"),
+            Path("lib", "mbed_app.json"),
+            Path("lib", "not_interested.json"),
+            Path("TESTS", "mbed_lib.json"),
+        ]
+        with create_files(paths) as directory:
+            Path(directory, "lib", ".mbedignore").write_text("*/ignored")
+            with mock.patch("mbed_build._internal.traversal_cache.os.scandir", wraps=os.scandir) as scandir:
+                subject = ProgramFileIndex.from_directory(directory)
+
+            self.assertEqual(scandir.call_count, 2)
+            self.assertEqual(
+                sorted(subject.get("mbed_lib.json")),
+                [Path(directory, "lib", "mbed_lib.json"), Path(directory, "mbed_lib.json")],
+            )
+            self.assertEqual(len(subject.get("mbed_app.json")), 2)
+            self.assertEqual(subject.get(".mbedignore"), [Path(directory, "lib", ".mbedignore")])
+            self.assertEqual(subject.get("targets.json"), [])
+
+    def test_skips_subtrees_with_labels_not_allowed_until_expanded(self):
+        paths = [
+            Path("TARGET_A", "mbed_lib.json"),
+            Path("TARGET_B", "mbed_lib.json"),
+            Path("TARGET_B", "FEATURE_X", "mbed_lib.json"),
+            Path("TARGET_B", "FEATURE_X", "TESTS", "mbed_lib.json"),
+            Path("lib", "mbed_lib.json"),
+        ]
+        with create_files(paths) as directory:
+            full_traversal = ProgramFileIndex.from_directory(directory)
+            with mock.patch("mbed_build._internal.traversal_cache.os.scandir", wraps=os.scandir) as scandir:
+                subject = ProgramFileIndex.from_directory(
+                    directory, allowed_label_values={"TARGET": ["A"], "FEATURE": []}
+                )
+
+            scandir_calls = [call[0][0] for call in scandir.call_args_list]
+            self.assertNotIn(Path(directory, "TARGET_B"), scandir_calls)
+            self.assertEqual(
+                sorted(subject.get("mbed_lib.json")),
+                [Path(directory, "TARGET_A", "mbed_lib.json"), Path(directory, "lib", "mbed_lib.json")],
+            )
+
+            self.assertFalse(subject.expand({"TARGET": ["A"], "FEATURE": ["X"]}))
+            self.assertTrue(subject.expand({"TARGET": ["A", "B"], "FEATURE": []}))
+            self.assertEqual(len(subject.get("mbed_lib.json")), 3)
+            self.assertTrue(subject.expand({"TARGET": ["A", "B"], "FEATURE": ["X"]}))
+            self.assertEqual(subject.get("mbed_lib.json"), full_traversal.get("mbed_lib.json"))
+            self.assertEqual(subject.directories, full_traversal.directories)
+
+    def test_records_listed_directories(self):
+        paths = [Path("TARGET_A", "mbed_lib.json"), Path("TARGET_B", "mbed_lib.json"), Path("TESTS", "mbed_lib.json")]
+        with create_files(paths) as directory:
+            subject = ProgramFileIndex.from_directory(directory, allowed_label_values={"TARGET": ["A"]})
+
+            self.assertEqual(subject.directories, [Path(directory), Path(directory, "TARGET_A")])
+            subject.expand({"TARGET": ["B"]})
+            self.assertEqual(subject.directories[0], Path(directory))
+            self.assertCountEqual(subject.directories[1:], [Path(directory, "TARGET_A"), Path(directory, "TARGET_B")])
+
+    def test_skips_hidden_directories_and_build_trees(self):
+        paths = [
+            Path("lib", "mbed_lib.json"),
+            Path(".git", "objects", "mbed_lib.json"),
+            Path("cmake_build", "CMakeCache.txt"),
+            Path("cmake_build", "CMakeFiles", "mbed_lib.json"),
+        ]
+        with create_files(paths) as directory:
+            subject = ProgramFileIndex.from_directory(directory)
+
+            self.assertEqual(subject.get("mbed_lib.json"), [Path(directory, "lib", "mbed_lib.json")])
+            self.assertEqual(subject.directories, [Path(directory), Path(directory, "lib")])
+
+    def test_does_not_record_directories_whose_contents_are_ignored(self):
+        paths = [Path("lib", "mbed_lib.json"), Path("ignored", "subdirectory", "mbed_lib.json")]
+        with create_files(paths) as directory:
+            Path(directory, ".mbedignore").write_text("ignored/*")
+
+            subject = ProgramFileIndex.from_directory(directory)
+
+            self.assertEqual(subject.directories, [Path(directory), Path(directory, "lib")])
+
 
 class TestFilterFiles(TestCase):
     def test_respects_given_filters(self):
@@ -113,6 +249,59 @@ class TestLabelFilter(TestCase):
         self.assertTrue(subject(Path("README.md")))
 
 
+class TestLabelIndex(TestCase):
+    def test_filters_paths_following_label_filter_rules(self):
+        paths = [
+            Path("mbed-os", "TARGET_FOO", "some_file.c"),
+            Path("mbed-os", "TARGET_BAR", "TARGET_FOO", "other_file.c"),
+            Path("mbed-os", "TARGET_BAR", "some_file.c"),
+            Path("mbed-os", "COMPONENT_X", "header.h"),
+            Path("mbed-os", "COMPONENT_Y", "TARGET_BAZ", "some_file.c"),
+            Path("mbed-os", "FEATURE_Z", "COMPONENT_X", "some_file.c"),
+            Path("README.md"),
+        ]
+        allowed_label_values = {"TARGET": ["BAR", "BAZ"], "COMPONENT": ["X", "Y"]}
+        label_filters = [
+            LabelFilter(label_type, allowed_label_values.get(label_type, []))
+            for label_type in ("TARGET", "FEATURE", "COMPONENT")
+        ]
+
+        subject = LabelIndex(paths).filter(allowed_label_values)
+
+        self.assertEqual(subject, filter_files(paths, label_filters))
+        self.assertEqual(
+            subject,
+            [
+                Path("mbed-os", "TARGET_BAR", "some_file.c"),
+                Path("mbed-os", "COMPONENT_X", "header.h"),
+                Path("mbed-os", "COMPONENT_Y", "TARGET_BAZ", "some_file.c"),
+                Path("README.md"),
+            ],
+        )
+
+    def test_can_be_queried_repeatedly(self):
+        paths = [Path("TARGET_FOO", "file.c"), Path("TARGET_BAR", "file.c")]
+        subject = LabelIndex(paths)
+
+        self.assertEqual(subject.filter({"TARGET": ["FOO"]}), [Path("TARGET_FOO", "file.c")])
+        self.assertEqual(subject.filter({"TARGET": ["BAR"]}), [Path("TARGET_BAR", "file.c")])
+
+    def test_filters_paths_with_changed_labels(self):
+        paths = [
+            Path("TARGET_FOO", "file.c"),
+            Path("TARGET_FOO", "FEATURE_BLE", "file.c"),
+            Path("FEATURE_BLE", "file.c"),
+            Path("TARGET_BAR", "file.c"),
+            Path("file.c"),
+        ]
+        subject = LabelIndex(paths)
+
+        allowed, disallowed = subject.filter_changed({"TARGET": ["BAR"], "FEATURE": ["BLE"]}, ["FEATURE_BLE"])
+
+        self.assertEqual(allowed, [Path("FEATURE_BLE", "file.c")])
+        self.assertEqual(disallowed, [Path("TARGET_FOO", "FEATURE_BLE", "file.c")])
+
+
 class TestMbedignoreFilter(TestCase):
     def test_matches_files_by_name(self):
         subject = MbedignoreFilter(("*.py",))
@@ -143,5 +332,36 @@ foo/*.txt
             subject = MbedignoreFilter.from_file(mbedignore)
 
             self.assertEqual(
-                subject._patterns, (str(Path(temp_directory, "foo/*.txt")), str(Path(temp_directory, "*.py")),)
+                subject._patterns, (str(Path(temp_directory, "foo/*.txt")), str(Path(temp_directory, "*.py")),),
             )
+            self.assertFalse(subject(Path(temp_directory, "foo", "bar.txt")))
+            self.assertFalse(subject(Path(temp_directory, "nested", "file.py")))
+            self.assertTrue(subject(Path(temp_directory, "bar.txt")))
+            self.assertTrue(subject(Path("elsewhere", "file.py")))
+
+    def test_matches_ignore_root_literally(self):
+        subject = MbedignoreFilter.from_lines(["*.py"], Path("root[1]"))
+
+        self.assertFalse(subject(Path("root[1]", "file.py")))
+        self.assertTrue(subject(Path("root1", "file.py")))
+
+    def test_without_patterns_matches_nothing(self):
+        subject = MbedignoreFilter.from_lines([], Path("root"))
+
+        self.assertTrue(subject(Path("root", "file.py")))
+
+    def test_merge(self):
+        subject = MbedignoreFilter.merge(
+            [
+                MbedignoreFilter(("*/TESTS",)),
+                MbedignoreFilter.from_lines(["*.py"], Path("foo")),
+                MbedignoreFilter.from_lines(["docs"], Path("foo", "bar")),
+            ]
+        )
+
+        self.assertFalse(subject(Path("foo", "TESTS")))
+        self.assertFalse(subject(Path("foo", "file.py")))
+        self.assertFalse(subject(Path("foo", "bar", "docs")))
+        self.assertTrue(subject(Path("foo", "docs")))
+        self.assertTrue(subject(Path("baz", "file.py")))
+        self.assertEqual(subject._patterns, ("*/TESTS", str(Path("foo", "*.py")), str(Path("foo", "bar", "docs"))))
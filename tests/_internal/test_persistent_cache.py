@@ -0,0 +1,60 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import pathlib
+import sys
+import tempfile
+from unittest import TestCase, skipIf
+
+from mbed_build._internal.persistent_cache import clear_caches, load_cache, save_cache
+
+
+class TestPersistentCache(TestCase):
+    def test_loads_saved_data(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_directory = pathlib.Path(directory, ".mbedbuild")
+            data = {"foo": (1, ["bar", True])}
+
+            save_cache(cache_directory, "name", 1, data)
+
+            self.assertEqual(load_cache(cache_directory, "name", 1), data)
+            self.assertEqual([path.name for path in cache_directory.iterdir()], ["name.cache"])
+
+    @skipIf(sys.platform == "win32", "File modes are not supported on Windows")
+    def test_saved_cache_has_permissions_allowed_by_umask(self):
+        with tempfile.TemporaryDirectory() as directory:
+            umask = os.umask(0o022)
+            try:
+                save_cache(pathlib.Path(directory), "name", 1, "data")
+            finally:
+                os.umask(umask)
+
+            self.assertEqual(pathlib.Path(directory, "name.cache").stat().st_mode & 0o777, 0o644)
+
+    def test_ignores_missing_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(load_cache(pathlib.Path(directory), "name", 1))
+
+    def test_ignores_corrupt_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            pathlib.Path(directory, "name.cache").write_bytes(b"\x00garbage")
+
+            self.assertIsNone(load_cache(pathlib.Path(directory), "name", 1))
+
+    def test_ignores_cache_with_different_version(self):
+        with tempfile.TemporaryDirectory() as directory:
+            save_cache(pathlib.Path(directory), "name", 1, "data")
+
+            self.assertIsNone(load_cache(pathlib.Path(directory), "name", 2))
+
+    def test_clears_caches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            save_cache(pathlib.Path(directory), "name", 1, "data")
+            pathlib.Path(directory, "mbed_config.cmake").touch()
+
+            clear_caches(pathlib.Path(directory))
+
+            self.assertIsNone(load_cache(pathlib.Path(directory), "name", 1))
+            self.assertTrue(pathlib.Path(directory, "mbed_config.cmake").exists())
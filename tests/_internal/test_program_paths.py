@@ -0,0 +1,41 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+from pathlib import Path
+from unittest import TestCase, mock
+
+from mbed_build._internal.program_paths import ProgramPaths, relative_to_program_root
+
+
+@mock.patch("mbed_build._internal.program_paths.MbedProgram", autospec=True)
+class TestProgramPaths(TestCase):
+    def test_locates_files_of_program_containing_directory(self, MbedProgram):
+        program = MbedProgram.from_existing.return_value
+        program.files.mbed_file = Path("foo", ".mbed")
+        program.files.app_config_file = Path("foo", "mbed_app.json")
+        program.mbed_os.targets_json_file = str(Path("foo", "mbed-os", "targets", "targets.json"))
+
+        subject = ProgramPaths.from_directory(Path("foo", "app"))
+
+        self.assertEqual(
+            subject,
+            ProgramPaths(
+                root=Path("foo"),
+                app_config_file=Path("foo", "mbed_app.json"),
+                targets_json_file=Path("foo", "mbed-os", "targets", "targets.json"),
+            ),
+        )
+        MbedProgram.from_existing.assert_called_once_with(Path("foo", "app"))
+
+
+class TestRelativeToProgramRoot(TestCase):
+    def test_returns_posix_path_relative_to_root_or_absolute_path_outside_of_it(self):
+        root = Path("/program").absolute()
+
+        self.assertEqual(relative_to_program_root(root / "mbed-os" / "mbed_lib.json", root), "mbed-os/mbed_lib.json")
+        self.assertEqual(relative_to_program_root(root, root), ".")
+        self.assertEqual(
+            relative_to_program_root(Path("/program2/mbed_lib.json"), root),
+            Path("/program2/mbed_lib.json").absolute().as_posix(),
+        )
@@ -0,0 +1,117 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import pathlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from mbed_build._internal.program_paths import ProgramPaths
+from mbed_build._internal.result_cache import ResultCache, hash_program_inputs, result_key
+
+
+class TestResultCache(TestCase):
+    def test_returns_stored_result(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(pathlib.Path(directory, "results"))
+
+            self.assertIsNone(cache.get("abcd"))
+
+            cache.put("abcd", {"GCC_ARM": {"mbed_config.cmake": "contents"}})
+
+            self.assertEqual(cache.get("abcd"), {"GCC_ARM": {"mbed_config.cmake": "contents"}})
+            self.assertEqual(ResultCache(pathlib.Path(directory, "results")).get("abcd"), cache.get("abcd"))
+
+    def test_evicts_least_recently_used_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(pathlib.Path(directory))
+            for index, key in enumerate(["aa01", "bb02", "cc03"]):
+                cache.put(key, "x" * 1000)
+                os.utime(pathlib.Path(directory, key[:2], f"{key}.cache"), (1_500_000_000 + index,) * 2)
+            # Reading marks the oldest result as the most recently used
+            cache.get("aa01")
+            cache.max_size = 2500
+
+            cache.put("dd04", "x" * 1000)
+
+            self.assertIsNotNone(cache.get("aa01"))
+            self.assertIsNone(cache.get("bb02"))
+            self.assertIsNone(cache.get("cc03"))
+            self.assertIsNotNone(cache.get("dd04"))
+
+    def test_stores_results_of_concurrent_writers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(pathlib.Path(directory))
+            keys = [f"{index:04x}" for index in range(20)]
+
+            with ThreadPoolExecutor(4) as executor:
+                list(executor.map(lambda key: ResultCache(pathlib.Path(directory)).put(key, key), keys))
+
+            self.assertEqual([cache.get(key) for key in keys], keys)
+
+
+class TestHashProgramInputs(TestCase):
+    def test_changes_with_contents_of_any_configuration_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            program_path = pathlib.Path(directory)
+            program_paths = ProgramPaths(
+                root=program_path, app_config_file=None, targets_json_file=pathlib.Path(directory, "targets.json")
+            )
+            program_paths.targets_json_file.write_text("{}")
+            mbed_lib = pathlib.Path(directory, "TARGET_A", "mbed_lib.json")
+            mbed_lib.parent.mkdir()
+            mbed_lib.write_text('{"name": "a"}')
+
+            digest = hash_program_inputs(program_path, program_paths)
+            self.assertEqual(hash_program_inputs(program_path, program_paths), digest)
+
+            mbed_lib.write_text('{"name": "b"}')
+            changed_lib_digest = hash_program_inputs(program_path, program_paths)
+            program_paths.targets_json_file.write_text('{"K64F": {}}')
+            changed_targets_digest = hash_program_inputs(program_path, program_paths)
+            pathlib.Path(directory, ".mbedignore").write_text("TARGET_A/*")
+            changed_mbedignore_digest = hash_program_inputs(program_path, program_paths)
+            pathlib.Path(directory, "TARGET_B").mkdir()
+            added_directory_digest = hash_program_inputs(program_path, program_paths)
+
+        self.assertEqual(
+            len(
+                {digest, changed_lib_digest, changed_targets_digest, changed_mbedignore_digest, added_directory_digest}
+            ),
+            5,
+        )
+
+    def test_does_not_depend_on_program_location(self):
+        digests = []
+        with tempfile.TemporaryDirectory() as directory:
+            for program_name in ["first", "second"]:
+                program_path = pathlib.Path(directory, program_name)
+                mbed_lib = pathlib.Path(program_path, "mbed-os", "mbed_lib.json")
+                mbed_lib.parent.mkdir(parents=True)
+                mbed_lib.write_text('{"name": "a"}')
+                program_paths = ProgramPaths(
+                    root=program_path,
+                    app_config_file=None,
+                    targets_json_file=pathlib.Path(program_path, "targets.json"),
+                )
+                program_paths.targets_json_file.write_text("{}")
+
+                digests.append(hash_program_inputs(program_path, program_paths))
+                digests.append(hash_program_inputs(program_path / "mbed-os", program_paths))
+
+        self.assertEqual(digests[0], digests[2])
+        self.assertEqual(digests[1], digests[3])
+        self.assertNotEqual(digests[0], digests[1])
+
+
+class TestResultKey(TestCase):
+    def test_depends_on_inputs_and_parameters(self):
+        key = result_key(b"inputs", "K64F", ["GCC_ARM"], "definitions")
+
+        self.assertEqual(result_key(b"inputs", "K64F", ["GCC_ARM"], "definitions"), key)
+        self.assertNotEqual(result_key(b"changed inputs", "K64F", ["GCC_ARM"], "definitions"), key)
+        self.assertNotEqual(result_key(b"inputs", "K66F", ["GCC_ARM"], "definitions"), key)
+        self.assertNotEqual(result_key(b"inputs", "K64F", ["ARM"], "definitions"), key)
+        self.assertNotEqual(result_key(b"inputs", "K64F", ["GCC_ARM"], "header"), key)
@@ -0,0 +1,82 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import json
+import pathlib
+import tempfile
+from unittest import TestCase, mock
+
+from mbed_targets import Target
+from mbed_targets.exceptions import TargetError
+
+from mbed_build._internal.target_cache import get_target, get_targets
+
+TARGETS = {
+    "Base": {"public": False, "core": "Cortex-M4", "device_has": ["SERIAL"], "config": {"foo": {"value": 1}}},
+    "K64F": {"inherits": ["Base"], "extra_labels": ["NXP"], "features": ["BLE"]},
+    "K66F": {"inherits": ["Base"]},
+}
+
+
+@mock.patch.dict("mbed_build._internal.target_cache._resolved_targets", clear=True)
+@mock.patch("mbed_build._internal.target_cache.Target.by_name", side_effect=Target.by_name)
+@mock.patch("mbed_build._internal.program_paths.MbedProgram")
+class TestGetTarget(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.program_path = pathlib.Path(directory.name)
+        self.targets_json_file = self.program_path / "targets.json"
+        self.targets_json_file.write_text(json.dumps(TARGETS))
+        self.cache_directory = self.program_path / ".mbedbuild"
+
+    def test_resolves_target_once_per_process(self, MbedProgram, by_name):
+        MbedProgram.from_existing.return_value.mbed_os.targets_json_file = self.targets_json_file
+
+        target = get_target("K64F", self.program_path)
+
+        self.assertEqual(target.features, {"BLE"})
+        self.assertEqual(target.device_has, {"SERIAL"})
+        self.assertIs(get_target("K64F", self.program_path), target)
+        by_name.assert_called_once_with("K64F", str(self.targets_json_file))
+        self.assertFalse(self.cache_directory.exists())
+
+    def test_resolves_target_again_when_targets_json_changes(self, MbedProgram, by_name):
+        MbedProgram.from_existing.return_value.mbed_os.targets_json_file = self.targets_json_file
+        get_target("K64F", self.program_path)
+
+        self.targets_json_file.write_text(json.dumps({**TARGETS, "K64F": TARGETS["K66F"]}))
+
+        self.assertEqual(get_target("K64F", self.program_path).features, set())
+
+    def test_stores_resolved_target_keyed_by_targets_json_contents(self, MbedProgram, by_name):
+        MbedProgram.from_existing.return_value.mbed_os.targets_json_file = self.targets_json_file
+        target = get_target("K64F", self.program_path, self.cache_directory)
+
+        with mock.patch.dict("mbed_build._internal.target_cache._resolved_targets", clear=True):
+            self.assertEqual(get_target("K64F", self.program_path, self.cache_directory), target)
+        by_name.assert_called_once()
+
+        # Same size, different contents
+        self.targets_json_file.write_text(json.dumps(TARGETS).replace("BLE", "LWB"))
+        with mock.patch.dict("mbed_build._internal.target_cache._resolved_targets", clear=True):
+            self.assertEqual(get_target("K64F", self.program_path, self.cache_directory).features, {"LWB"})
+        self.assertEqual(by_name.call_count, 2)
+
+    def test_resolves_many_targets_storing_them_once(self, MbedProgram, by_name):
+        MbedProgram.from_existing.return_value.mbed_os.targets_json_file = self.targets_json_file
+
+        with mock.patch("mbed_build._internal.target_cache.save_cache") as save_cache:
+            targets = get_targets(["K64F", "K66F", "K64F"], self.program_path, self.cache_directory)
+
+        self.assertEqual(list(targets), ["K64F", "K66F"])
+        self.assertEqual(targets["K66F"].features, set())
+        self.assertEqual(by_name.call_count, 2)
+        save_cache.assert_called_once()
+
+    def test_raises_for_missing_targets_json(self, MbedProgram, by_name):
+        MbedProgram.from_existing.return_value.mbed_os.targets_json_file = self.program_path / "missing.json"
+
+        with self.assertRaises(TargetError):
+            get_target("K64F", self.program_path, self.cache_directory)
@@ -0,0 +1,113 @@
+#
+# Copyright (C) 2020 Arm Mbed. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+import os
+import pathlib
+import tempfile
+from unittest import TestCase, mock
+
+from mbed_build._internal.traversal_cache import TraversalCache
+
+
+def make_settled(*paths):
+    # Same timestamp on every call, so that restoring it makes a directory look unchanged
+    settled_time = 1_500_000_000
+    for path in paths:
+        os.utime(path, (settled_time, settled_time))
+
+
+class TestTraversalCache(TestCase):
+    def test_reuses_listing_of_unchanged_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            directory = pathlib.Path(directory)
+            pathlib.Path(directory, "sub_directory").mkdir()
+            pathlib.Path(directory, "file.txt").touch()
+            make_settled(directory)
+            cache = TraversalCache.empty()
+            first_listing = cache.list_directory(directory)
+            cache.save(directory / ".mbedbuild")
+            make_settled(directory)
+
+            with mock.patch("mbed_build._internal.traversal_cache.os.scandir") as scandir:
+                subject = TraversalCache.load(directory / ".mbedbuild").list_directory(directory)
+
+            scandir.assert_not_called()
+            self.assertEqual(subject, first_listing)
+            self.assertIn(("sub_directory", True, False), subject)
+            self.assertIn(("file.txt", False, True), subject)
+
+    def test_lists_changed_directory_again(self):
+        with tempfile.TemporaryDirectory() as directory:
+            directory = pathlib.Path(directory)
+            make_settled(directory)
+            cache = TraversalCache.empty()
+            cache.list_directory(directory)
+            pathlib.Path(directory, "new_file.txt").touch()
+
+            subject = cache.list_directory(directory)
+
+            self.assertEqual(subject, [("new_file.txt", False, True)])
+
+    def test_does_not_cache_recently_modified_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            directory = pathlib.Path(directory)
+            cache = TraversalCache.empty()
+            cache.list_directory(directory)
+
+            cache.save(directory / ".mbedbuild")
+
+            self.assertFalse(pathlib.Path(directory, ".mbedbuild").exists())
+
+    def test_rereads_changed_mbedignore(self):
+        with tempfile.TemporaryDirectory() as directory:
+            mbedignore = pathlib.Path(directory, ".mbedignore")
+            mbedignore.write_text("foo/*\n")
+            make_settled(mbedignore)
+            cache = TraversalCache.empty()
+            self.assertEqual(cache.read_mbedignore(mbedignore), ["foo/*"])
+
+            mbedignore.write_text("# Comment\nbar/*\n")
+
+            self.assertEqual(cache.read_mbedignore(mbedignore), ["bar/*"])
+
+    def test_reuses_listing_of_directory_given_by_relative_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            directory = pathlib.Path(directory)
+            pathlib.Path(directory, "sub_directory").mkdir()
+            make_settled(directory / "sub_directory")
+            cache = TraversalCache.empty()
+            cache.list_directory(directory / "sub_directory")
+            cache.save(directory / ".mbedbuild")
+            make_settled(directory / "sub_directory")
+
+            with mock.patch("mbed_build._internal.traversal_cache.os.getcwd", return_value=str(directory)):
+                with mock.patch("mbed_build._internal.traversal_cache.os.scandir") as scandir:
+                    TraversalCache.load(directory / ".mbedbuild").list_directory(pathlib.Path("sub_directory"))
+
+            scandir.assert_not_called()
+
+    def test_stores_only_entries_used_since_loaded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            directory = pathlib.Path(directory)
+            for name in ["kept", "removed"]:
+                pathlib.Path(directory, name).mkdir()
+                pathlib.Path(directory, name, ".mbedignore").write_text("foo/*\n")
+                make_settled(pathlib.Path(directory, name), pathlib.Path(directory, name, ".mbedignore"))
+            cache = TraversalCache.empty()
+            for name in ["kept", "removed"]:
+                cache.list_directory(directory / name)
+                cache.read_mbedignore(directory / name / ".mbedignore")
+            cache.save(directory / ".mbedbuild")
+
+            cache = TraversalCache.load(directory / ".mbedbuild")
+            cache.list_directory(directory / "kept")
+            cache.read_mbedignore(directory / "kept" / ".mbedignore")
+            cache.save(directory / ".mbedbuild")
+
+            with mock.patch("mbed_build._internal.traversal_cache.os.scandir", wraps=os.scandir) as scandir:
+                cache = TraversalCache.load(directory / ".mbedbuild")
+                cache.list_directory(directory / "kept")
+                cache.list_directory(directory / "removed")
+
+            self.assertEqual(scandir.call_args_list, [mock.call(directory / "removed")])
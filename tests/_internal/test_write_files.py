@@ -2,9 +2,11 @@
 # Copyright (C) 2020 Arm Mbed. All rights reserved.
 # SPDX-License-Identifier: Apache-2.0
 #
+import os
 import pathlib
+import sys
 import tempfile
-from unittest import TestCase
+from unittest import TestCase, mock, skipIf
 
 from mbed_build._internal.write_files import write_file
 from mbed_build.exceptions import InvalidExportOutputDirectory
@@ -22,6 +24,60 @@ class TestWriteFile(TestCase):
             created_file = pathlib.Path(export_path, pathlib.Path(export_path, file_name))
             self.assertEqual(created_file.read_text(), content)
 
+    def test_creates_subdirectories_of_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            export_path = pathlib.Path(directory, "output")
+
+            write_file(export_path, "mbed_config/lwip.h", "contents")
+
+            self.assertEqual(pathlib.Path(export_path, "mbed_config", "lwip.h").read_text(), "contents")
+
+    def test_does_not_rewrite_unchanged_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            export_path = pathlib.Path(directory)
+            existing_file = pathlib.Path(directory, "some_file.txt")
+            existing_file.write_text("contents")
+            os.utime(existing_file, (1_500_000_000, 1_500_000_000))
+
+            self.assertFalse(write_file(export_path, "some_file.txt", "contents"))
+            self.assertEqual(existing_file.stat().st_mtime, 1_500_000_000)
+
+            self.assertTrue(write_file(export_path, "some_file.txt", "new contents"))
+            self.assertEqual(existing_file.read_text(), "new contents")
+
+    def test_replaces_file_without_leaving_temporary_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            export_path = pathlib.Path(directory)
+            pathlib.Path(directory, "some_file.txt").write_text("old contents")
+
+            write_file(export_path, "some_file.txt", "new contents")
+
+            self.assertEqual(os.listdir(directory), ["some_file.txt"])
+            self.assertEqual(pathlib.Path(directory, "some_file.txt").read_text(), "new contents")
+
+    @skipIf(sys.platform == "win32", "File modes are not supported on Windows")
+    def test_written_file_has_permissions_allowed_by_umask(self):
+        with tempfile.TemporaryDirectory() as directory:
+            umask = os.umask(0o027)
+            try:
+                write_file(pathlib.Path(directory), "some_file.txt", "contents")
+            finally:
+                os.umask(umask)
+
+            self.assertEqual(pathlib.Path(directory, "some_file.txt").stat().st_mode & 0o777, 0o640)
+
+    @mock.patch("mbed_build._internal.write_files.os.replace", side_effect=OSError)
+    def test_keeps_existing_file_if_writing_fails(self, _):
+        with tempfile.TemporaryDirectory() as directory:
+            export_path = pathlib.Path(directory)
+            pathlib.Path(directory, "some_file.txt").write_text("old contents")
+
+            with self.assertRaises(OSError):
+                write_file(export_path, "some_file.txt", "new contents")
+
+            self.assertEqual(os.listdir(directory), ["some_file.txt"])
+            self.assertEqual(pathlib.Path(directory, "some_file.txt").read_text(), "old contents")
+
     def test_output_dir_is_file(self):
         with tempfile.TemporaryDirectory() as directory:
             bad_export_dir = pathlib.Path(directory, "some_file.txt")